@@ -38,6 +38,16 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = BaseModel.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # The full-text search column/index are managed by hand-written migrations
+    # and are not part of the ORM model; keep autogenerate from dropping them.
+    if type_ == "column" and name == "search_vector":
+        return False
+    if type_ == "index" and name == "ix_post_search_vector":
+        return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -62,6 +72,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -80,11 +91,11 @@ def run_migrations_online() -> None:
     #     prefix="sqlalchemy.",
     #     poolclass=pool.NullPool,
     # )
-    from app.core.database import engine as app_engine
-    connectable = app_engine
+    from app.core.database import get_engine
+    connectable = get_engine()
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
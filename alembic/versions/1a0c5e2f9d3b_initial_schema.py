@@ -0,0 +1,87 @@
+"""initial schema
+
+Revision ID: 1a0c5e2f9d3b
+Revises:
+Create Date: 2026-10-18 10:05:12.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a0c5e2f9d3b'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('username', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('email', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column('hashed_password', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=True)
+    op.create_index(op.f('ix_user_id'), 'user', ['id'], unique=False)
+    op.create_index(op.f('ix_user_username'), 'user', ['username'], unique=True)
+    op.create_table(
+        'post',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('title', sqlmodel.sql.sqltypes.AutoString(length=200), nullable=False),
+        sa.Column('content', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('owner_id', sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_post_id'), 'post', ['id'], unique=False)
+    op.create_index(op.f('ix_post_owner_id'), 'post', ['owner_id'], unique=False)
+    op.create_index(op.f('ix_post_title'), 'post', ['title'], unique=False)
+    op.create_table(
+        'refreshtoken',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('token_hash', sa.String(length=128), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_revoked', sa.Boolean(), nullable=False),
+        sa.Column('user_agent', sqlmodel.sql.sqltypes.AutoString(length=512), nullable=True),
+        sa.Column('ip_address', sqlmodel.sql.sqltypes.AutoString(length=45), nullable=True),
+        sa.Column('family', sa.Uuid(), nullable=True),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_refreshtoken_family'), 'refreshtoken', ['family'], unique=False)
+    op.create_index(op.f('ix_refreshtoken_id'), 'refreshtoken', ['id'], unique=False)
+    op.create_index(op.f('ix_refreshtoken_token_hash'), 'refreshtoken', ['token_hash'], unique=True)
+    op.create_index(op.f('ix_refreshtoken_user_id'), 'refreshtoken', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_refreshtoken_user_id'), table_name='refreshtoken')
+    op.drop_index(op.f('ix_refreshtoken_token_hash'), table_name='refreshtoken')
+    op.drop_index(op.f('ix_refreshtoken_id'), table_name='refreshtoken')
+    op.drop_index(op.f('ix_refreshtoken_family'), table_name='refreshtoken')
+    op.drop_table('refreshtoken')
+    op.drop_index(op.f('ix_post_title'), table_name='post')
+    op.drop_index(op.f('ix_post_owner_id'), table_name='post')
+    op.drop_index(op.f('ix_post_id'), table_name='post')
+    op.drop_table('post')
+    op.drop_index(op.f('ix_user_username'), table_name='user')
+    op.drop_index(op.f('ix_user_id'), table_name='user')
+    op.drop_index(op.f('ix_user_email'), table_name='user')
+    op.drop_table('user')
@@ -0,0 +1,36 @@
+"""add post owner_id, updated_at index
+
+Revision ID: 2b6f9e4c7a18
+Revises: f0b7c3d8e2a4
+Create Date: 2026-10-18 19:12:40.603117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b6f9e4c7a18'
+down_revision: Union[str, None] = 'f0b7c3d8e2a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GET /users/{id} validators read max(updated_at) of the owner's posts
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_post_owner_id_updated_at', 'post', ['owner_id', 'updated_at'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_post_owner_id_updated_at', table_name='post', postgresql_concurrently=True, if_exists=True
+        )
@@ -0,0 +1,47 @@
+"""add refresh token audit
+
+Revision ID: 5e7b3a91c2d6
+Revises: 8c41d2b7a9f0
+Create Date: 2026-10-18 16:42:10.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e7b3a91c2d6'
+down_revision: Union[str, None] = '8c41d2b7a9f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'refreshtokenaudit',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('event', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+        sa.Column('token_hash', sqlmodel.sql.sqltypes.AutoString(length=128), nullable=True),
+        sa.Column('family', sa.Uuid(), nullable=True),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('user_agent', sqlmodel.sql.sqltypes.AutoString(length=512), nullable=True),
+        sa.Column('ip_address', sqlmodel.sql.sqltypes.AutoString(length=45), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_refreshtokenaudit_id'), 'refreshtokenaudit', ['id'], unique=False)
+    op.create_index(op.f('ix_refreshtokenaudit_family'), 'refreshtokenaudit', ['family'], unique=False)
+    op.create_index(op.f('ix_refreshtokenaudit_user_id'), 'refreshtokenaudit', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_refreshtokenaudit_user_id'), table_name='refreshtokenaudit')
+    op.drop_index(op.f('ix_refreshtokenaudit_family'), table_name='refreshtokenaudit')
+    op.drop_index(op.f('ix_refreshtokenaudit_id'), table_name='refreshtokenaudit')
+    op.drop_table('refreshtokenaudit')
@@ -0,0 +1,49 @@
+"""add user post count
+
+Revision ID: 8c41d2b7a9f0
+Revises: 3f2a9c1d7b4e
+Create Date: 2026-10-18 14:05:27.640113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41d2b7a9f0'
+down_revision: Union[str, None] = '3f2a9c1d7b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The server default fills existing rows without rewriting them one by one
+    op.add_column('user', sa.Column('post_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill in short batches keyed on id. The autocommit block commits the
+    # column first and then every UPDATE on its own, so each batch releases its
+    # row locks as it finishes instead of holding them until the migration ends.
+    user = sa.table('user', sa.column('id', sa.Uuid()), sa.column('post_count', sa.Integer()))
+    post = sa.table('post', sa.column('owner_id', sa.Uuid()))
+    actual = sa.select(sa.func.count()).select_from(post).where(post.c.owner_id == user.c.id).scalar_subquery()
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = None
+        while True:
+            statement = sa.select(user.c.id).order_by(user.c.id).limit(BACKFILL_BATCH_SIZE)
+            if last_id is not None:
+                statement = statement.where(user.c.id > last_id)
+            ids = bind.execute(statement).scalars().all()
+            if not ids:
+                break
+            bind.execute(sa.update(user).where(user.c.id.in_(ids)).values(post_count=actual))
+            last_id = ids[-1]
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'post_count')
@@ -0,0 +1,47 @@
+"""add follows
+
+Revision ID: b8d04e6f1a37
+Revises: 5e7b3a91c2d6
+Create Date: 2026-10-18 18:05:27.604113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d04e6f1a37'
+down_revision: Union[str, None] = '5e7b3a91c2d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # No follows exist yet, so the server default is already the right count
+    op.add_column('user', sa.Column('follower_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_table(
+        'follow',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('follower_id', sa.Uuid(), nullable=False),
+        sa.Column('followee_id', sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(['followee_id'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['follower_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('follower_id', 'followee_id', name='uq_follow_follower_id_followee_id'),
+    )
+    op.create_index(op.f('ix_follow_id'), 'follow', ['id'], unique=False)
+    op.create_index('ix_follow_followee_id_follower_id', 'follow', ['followee_id', 'follower_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_follow_followee_id_follower_id', table_name='follow')
+    op.drop_index(op.f('ix_follow_id'), table_name='follow')
+    op.drop_table('follow')
+    op.drop_column('user', 'follower_count')
@@ -0,0 +1,40 @@
+"""add keyset pagination indexes
+
+Revision ID: d3e9f6a2c5b1
+Revises: b8d04e6f1a37
+Create Date: 2026-10-18 18:20:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3e9f6a2c5b1'
+down_revision: Union[str, None] = 'b8d04e6f1a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns) of the (created_at, id) orderings used by keyset pages
+KEYSET_INDEXES = (
+    ('ix_post_created_at_id', 'post', ['created_at', 'id']),
+    ('ix_post_owner_id_created_at_id', 'post', ['owner_id', 'created_at', 'id']),
+    ('ix_user_created_at_id', 'user', ['created_at', 'id']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the tables writable while the indexes build; it cannot run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in KEYSET_INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(KEYSET_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
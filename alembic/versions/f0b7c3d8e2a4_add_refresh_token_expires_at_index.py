@@ -0,0 +1,36 @@
+"""add refresh token expires_at index
+
+Revision ID: f0b7c3d8e2a4
+Revises: d3e9f6a2c5b1
+Create Date: 2026-10-18 18:34:02.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f0b7c3d8e2a4'
+down_revision: Union[str, None] = 'd3e9f6a2c5b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The token reaper finds expired rows by expires_at, one batch at a time
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_refreshtoken_expires_at'), 'refreshtoken', ['expires_at'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f('ix_refreshtoken_expires_at'), table_name='refreshtoken', postgresql_concurrently=True, if_exists=True
+        )
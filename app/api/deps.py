@@ -0,0 +1,37 @@
+from uuid import UUID
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlmodel.ext.asyncio.session import AsyncSession
+import redis.asyncio as redis_async
+
+from app.config.settings import API_V1_PREFIX
+from app.core.database import get_async_session
+from app.core.redis import get_redis_client
+from app.core.security import decode_access_token
+from app.models.user_model import User
+from app.repositories.user_repository import async_user_repo
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{API_V1_PREFIX}/auth/login")
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_session),
+    redis_client: redis_async.Redis = Depends(get_redis_client),
+) -> User:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    token_payload = await decode_access_token(token, redis_client)
+    if not token_payload:
+        raise credentials_exception
+    try:
+        user_id = UUID(token_payload.sub)
+    except (TypeError, ValueError):
+        raise credentials_exception
+
+    user = await async_user_repo.get(db, id=user_id)
+    if not user or not user.is_active:
+        raise credentials_exception
+    return user
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+
+router = APIRouter()
+
+@router.get("/health/live", include_in_schema=False)
+def live():
+    return {"status": "ok"}
+
+@router.get("/health/ready", include_in_schema=False)
+def ready(request: Request):
+    # Set by the lifespan once warmup has finished
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse({"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"status": "ready"}
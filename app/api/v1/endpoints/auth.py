@@ -0,0 +1,73 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlmodel.ext.asyncio.session import AsyncSession
+import redis.asyncio as redis_async
+
+from app.core.database import get_async_session
+from app.core.rate_limit import (
+    LOGIN_LIMIT_PER_IP,
+    LOGIN_LIMIT_PER_USERNAME,
+    REFRESH_LIMIT_PER_FAMILY,
+    REFRESH_LIMIT_PER_IP,
+    rate_limiter,
+)
+from app.core.redis import get_redis_client
+from app.core.security import read_refresh_token_claims
+from app.schemas.token_schema import RefreshTokenRequest, Token
+from app.services.auth_service import auth_service
+from app.services.user_service import user_service
+
+router = APIRouter()
+
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+def _user_agent(request: Request) -> Optional[str]:
+    user_agent = request.headers.get("user-agent")
+    return user_agent[:512] if user_agent else None
+
+@router.post("/login", response_model=Token)
+async def login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_session),
+    redis_client: redis_async.Redis = Depends(get_redis_client),
+):
+    # Rate limit first: the session has not touched the DB yet and bcrypt has not run
+    await rate_limiter.hit(redis_client, endpoint="login", checks=[
+        ("ip", _client_ip(request), LOGIN_LIMIT_PER_IP),
+        ("username", form_data.username.lower(), LOGIN_LIMIT_PER_USERNAME),
+    ])
+    user = await user_service.authenticate_user_async(db, username=form_data.username, password_in=form_data.password)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await auth_service.issue_tokens(
+        db, user_id=user.id, redis_client=redis_client, ip_address=_client_ip(request), user_agent=_user_agent(request)
+    )
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    request: Request,
+    body: RefreshTokenRequest,
+    db: AsyncSession = Depends(get_async_session),
+    redis_client: redis_async.Redis = Depends(get_redis_client),
+):
+    checks = [("ip", _client_ip(request), REFRESH_LIMIT_PER_IP)]
+    # Signature check only; tokens issued before the "fam" claim are limited per user instead
+    claims = read_refresh_token_claims(body.refresh_token)
+    if claims and claims.sub:
+        checks.append(("family", claims.fam or f"user:{claims.sub}", REFRESH_LIMIT_PER_FAMILY))
+    await rate_limiter.hit(redis_client, endpoint="refresh", checks=checks)
+
+    return await auth_service.validate_and_process_refresh_token(
+        db,
+        received_refresh_token=body.refresh_token,
+        redis_client=redis_client,
+        ip_address=_client_ip(request),
+        user_agent=_user_agent(request),
+    )
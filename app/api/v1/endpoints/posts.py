@@ -0,0 +1,146 @@
+from datetime import datetime
+from typing import Optional, Sequence
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.deps import get_current_user
+from app.config.settings import get_settings
+from app.core.database import get_async_session, get_async_session_factory, get_read_session, get_session
+from app.core.responses import RawJSONResponse
+from app.models.user_model import User
+from app.schemas.post_schema import PostCreate, PostImportResponse, PostPageResponse, PostResponse, PostUpdate
+from app.services.post_service import post_service
+from app.utils.conditional import (
+    Validators,
+    body_validators,
+    collection_validators,
+    is_not_modified,
+    not_modified_response,
+)
+from app.utils.export import ExportFormat
+from app.utils.ndjson import iter_ndjson_lines
+
+router = APIRouter()
+
+def _page_validators(page: PostPageResponse) -> Validators:
+    # Items embed their owner, so owner changes must change the collection ETag too
+    owner_stamps = [f"{post.owner.id}@{post.owner.updated_at.isoformat()}" for post in page.items if post.owner]
+    return collection_validators(page.items, page.next_cursor, *owner_stamps)
+
+def _raw_json(request: Request, payload: str, timestamps: Sequence[Optional[datetime]] = ()) -> Response:
+    validators = body_validators(payload, timestamps=timestamps)
+    if is_not_modified(request.headers, validators):
+        return not_modified_response(validators)
+    return RawJSONResponse(content=payload, headers=validators.headers())
+
+def _conditional_page(request: Request, response: Response, page: PostPageResponse):
+    validators = _page_validators(page)
+    if is_not_modified(request.headers, validators):
+        return not_modified_response(validators)
+    validators.apply(response)
+    return page
+
+@router.get("/", response_model=PostPageResponse)
+def get_posts(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_session),
+):
+    return _raw_json(request, post_service.get_posts_json(db, cursor=cursor, limit=limit))
+
+@router.get("/search", response_model=PostPageResponse)
+def search_posts(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_session),
+):
+    return _conditional_page(request, response, post_service.search_posts(db, query=q, cursor=cursor, limit=limit))
+
+@router.get("/timeline", response_model=PostPageResponse)
+def get_timeline(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
+):
+    return _raw_json(request, post_service.get_timeline_json(db, user_id=current_user.id, cursor=cursor, limit=limit))
+
+@router.get("/by-owner/{owner_id}", response_model=PostPageResponse)
+def get_posts_by_owner(
+    request: Request,
+    owner_id: UUID,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_session),
+):
+    return _raw_json(request, post_service.get_posts_by_owner_json(db, owner_id=owner_id, cursor=cursor, limit=limit))
+
+@router.get("/export")
+async def export_posts(
+    format: ExportFormat = ExportFormat.ndjson,
+    owner_id: Optional[UUID] = None,
+    session_factory: async_sessionmaker = Depends(get_async_session_factory),
+    current_user: User = Depends(get_current_user),
+):
+    async def body():
+        async with session_factory() as db:
+            async for chunk in post_service.export_posts(db, format=format, owner_id=owner_id):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="posts.{format.value}"'},
+    )
+
+@router.get("/{post_id}", response_model=PostResponse)
+def get_post(post_id: UUID, request: Request, db: Session = Depends(get_read_session)):
+    # Validators come from the body actually sent, which may be a cached copy
+    post = post_service.get_post_by_id(db, post_id)
+    timestamps = [post.updated_at, post.owner.updated_at if post.owner else None]
+    return _raw_json(request, post.model_dump_json(), timestamps)
+
+@router.post("/", response_model=PostResponse)
+def create_post(
+    post_in: PostCreate,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    return post_service.create_post(db, post_in=post_in, current_user=current_user)
+
+@router.post("/import", response_model=PostImportResponse)
+async def import_posts(
+    request: Request,
+    batch_size: Optional[int] = Query(None, ge=1, le=10_000),
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Imports an NDJSON body (one PostCreate object per line) owned by the current user."""
+    lines = iter_ndjson_lines(request.stream(), max_line_bytes=get_settings().POST_IMPORT_MAX_LINE_BYTES)
+    return await post_service.import_posts(db, lines=lines, current_user=current_user, batch_size=batch_size)
+
+@router.put("/{post_id}", response_model=PostResponse)
+def update_post(
+    post_id: UUID,
+    post_in: PostUpdate,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    return post_service.update_post(db, post_id_to_update=post_id, post_in=post_in, current_user=current_user)
+
+@router.delete("/{post_id}", response_model=PostResponse)
+def delete_post(
+    post_id: UUID,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    return post_service.delete_post(db, post_id_to_delete=post_id, current_user=current_user)
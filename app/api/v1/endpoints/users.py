@@ -1,38 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlmodel import Session
-from typing import List
-from app.config.database import get_session
-from app.schemas.user import UserCreate, UserRead, UserUpdate
-from app.services.user_service import UserService
+from typing import List, Optional
+from uuid import UUID
+from app.api.deps import get_current_user
+from app.core.database import get_async_session_factory, get_read_session, get_session
+from app.models.user_model import User
+from app.schemas.user_schema import UserCreate, UserResponse, UserUpdate, UserWithPostsResponse
+from app.services.user_service import user_service
+from app.utils.conditional import collection_validators, is_not_modified, not_modified_response
+from app.utils.export import ExportFormat
 
 router = APIRouter()
-user_service = UserService()
 
-@router.post("/", response_model=UserRead)
+@router.post("/", response_model=UserResponse)
 def create_user(user: UserCreate, db: Session = Depends(get_session)):
-    return user_service.create(db, user)
-
-@router.get("/", response_model=List[UserRead])
-def get_users(db: Session = Depends(get_session)):
-    return user_service.get_all(db)
-
-@router.get("/{user_id}", response_model=UserRead)
-def get_user(user_id: int, db: Session = Depends(get_session)):
-    user = user_service.get(db, user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
-
-@router.put("/{user_id}", response_model=UserRead)
-def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_session)):
-    updated_user = user_service.update(db, user_id, user)
-    if not updated_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return updated_user
+    return user_service.create_user(db, user_in=user)
+
+@router.get("/", response_model=List[UserResponse])
+def get_users(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    db: Session = Depends(get_read_session),
+):
+    # The body stays a plain list; the cursor for the next page travels in a header
+    page = user_service.get_users(db, cursor=cursor, limit=limit)
+    validators = collection_validators(page.items, page.next_cursor)
+    if is_not_modified(request.headers, validators):
+        return not_modified_response(validators)
+    validators.apply(response)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
+
+@router.get("/export")
+async def export_users(
+    format: ExportFormat = ExportFormat.ndjson,
+    session_factory: async_sessionmaker = Depends(get_async_session_factory),
+    current_user: User = Depends(get_current_user),
+):
+    async def body():
+        async with session_factory() as db:
+            async for chunk in user_service.export_users(db, format=format):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format.value}"'},
+    )
+
+@router.get("/{user_id}", response_model=UserWithPostsResponse)
+def get_user(
+    request: Request,
+    response: Response,
+    user_id: UUID,
+    posts_cursor: Optional[str] = None,
+    posts_limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_session),
+):
+    validators = user_service.get_user_validators(db, user_id)
+    if is_not_modified(request.headers, validators):
+        return not_modified_response(validators)
+    validators.apply(response)
+    return user_service.get_user_with_posts(db, user_id=user_id, posts_cursor=posts_cursor, posts_limit=posts_limit)
+
+@router.put("/{user_id}", response_model=UserResponse)
+def update_user(
+    user_id: UUID,
+    user: UserUpdate,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    return user_service.update_user(db, user_id_to_update=user_id, user_in=user, current_user=current_user)
 
 @router.delete("/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_session)):
-    user = user_service.delete(db, user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+def delete_user(
+    user_id: UUID,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    user_service.delete_user(db, user_id_to_delete=user_id, current_user=current_user)
     return {"message": "User deleted successfully"}
+
+@router.post("/{user_id}/follow", status_code=status.HTTP_204_NO_CONTENT)
+def follow_user(
+    user_id: UUID,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    user_service.follow_user(db, followee_id=user_id, current_user=current_user)
+
+@router.delete("/{user_id}/follow", status_code=status.HTTP_204_NO_CONTENT)
+def unfollow_user(
+    user_id: UUID,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    user_service.unfollow_user(db, followee_id=user_id, current_user=current_user)
@@ -1,21 +1,50 @@
 from pydantic import computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import List, Optional
+
+# Fixed at import so that modules such as app.api.deps can build URLs without reading Settings
+API_V1_PREFIX = "/api/v1"
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file='.env', env_file_encoding='utf-8')
     PROJECT_NAME: str = "FastAPI Application"
     VERSION: str = "1.0.0"
     DESCRIPTION: str = "FastAPI application with SQLModel and PostgreSQL"
-    API_V1_STR: str = "/api/v1"
+    API_V1_STR: str = API_V1_PREFIX
     
     # Security
-    ACCESS_TOKEN_SECRET_KEY = "your_super_long_random_access_secret"
+    ACCESS_TOKEN_SECRET_KEY: str = "your_super_long_random_access_secret"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
     REFRESH_TOKEN_SECRET_KEY: str = "your-refresh-secret-key-here" # NÊN KHÁC SECRET_KEY
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 ngày
+    REFRESH_TOKEN_PURGE_BATCH_SIZE: int = 1000
+    REFRESH_TOKEN_PURGE_PAUSE_SECONDS: float = 0.1
+    # Where active refresh tokens live: "database" (refreshtoken table) or "redis"
+    # (hashes/sets expiring with the tokens). With "redis", REFRESH_SESSION_AUDIT_ENABLED
+    # also appends issue/rotate/revoke events to refreshtokenaudit, in batches off the request path.
+    REFRESH_SESSION_STORE: str = "database"
+    REFRESH_SESSION_AUDIT_ENABLED: bool = False
+    REFRESH_SESSION_AUDIT_FLUSH_SECONDS: float = 1.0
+    REFRESH_SESSION_AUDIT_BATCH_SIZE: int = 500
+    REFRESH_SESSION_AUDIT_MAX_PENDING: int = 10_000  # events beyond this are dropped and counted
+    POST_COUNT_RECONCILE_BATCH_SIZE: int = 1000
+    POST_COUNT_RECONCILE_PAUSE_SECONDS: float = 0.1
+
+    # Password hashing runs on a dedicated bounded thread pool
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # running + queued; beyond this requests fail fast with 503
+
+    # Sliding-window rate limits for login/refresh, checked before any hashing or DB work
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 100_000  # in-process fallback buckets while Redis is down
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    LOGIN_RATE_LIMIT_PER_USERNAME: int = 5
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = 60
+    REFRESH_RATE_LIMIT_PER_IP: int = 60
+    REFRESH_RATE_LIMIT_PER_FAMILY: int = 10
+    REFRESH_RATE_LIMIT_WINDOW_SECONDS: int = 60
     
     # Database
     POSTGRES_USER: str
@@ -26,13 +55,59 @@ class Settings(BaseSettings):
     @computed_field
     @property
     def DATABASE_URL(self) -> str:
-        return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
+        return f"postgresql+psycopg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
+
+    @computed_field
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        # psycopg3 ships both the sync and the async driver under the same dialect
+        return f"postgresql+psycopg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
+
+    # Connection pool (applies to both the sync and the async engine)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 disables recycling
+    DB_POOL_PRE_PING: bool = True
+
+    # Read replicas (full SQLAlchemy URLs, e.g. a JSON list in the environment). Read-only
+    # endpoints use them; writes and each client's reads for DB_READ_YOUR_WRITES_SECONDS
+    # after a write stay on the primary. Post cache fills always read the primary, so that
+    # stale rows are never cached; with POST_CACHE_ENABLED the replicas only serve the
+    # reads the cache does not cover (cache hits never reach a database).
+    DATABASE_REPLICA_URLS: List[str] = []
+    DB_REPLICA_BALANCING: str = "round_robin"  # or "least_connections"
+    DB_REPLICA_RETRY_SECONDS: float = 30.0  # how long a replica that failed to connect is skipped
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    # Startup warmup, run by the app lifespan before /health/ready reports ready
+    STARTUP_WARMUP_ENABLED: bool = True
+    WARMUP_DB_CONNECTIONS: int = 2  # per pool, capped at DB_POOL_SIZE
+    WARMUP_REDIS_CONNECTIONS: int = 2
+
+    # Per-request SQL statistics (replaces echo=True)
+    SQL_ECHO: bool = False
+    SQL_STATS_ENABLED: bool = True
+    SQL_STATS_HEADERS: bool = True  # X-DB-Query-Count / X-DB-Time-Ms on every response
+    SQL_STATS_SLOWEST: int = 3  # slowest statements kept per request for the log line
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = 10  # warn when one statement shape runs more often; 0 disables
     
     # Redis Configuration
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: Optional[str] = None
+    # One pool per client (async and sync). Callers wait up to REDIS_POOL_TIMEOUT for a
+    # free connection once REDIS_MAX_CONNECTIONS are in use; the revocation listener
+    # holds one async connection for the life of the worker.
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 2.0
+    REDIS_CONNECT_TIMEOUT: float = 1.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # idle connections are PINGed before reuse after this many seconds
+    REDIS_RETRY_ATTEMPTS: int = 2  # retries on connection errors/timeouts, with exponential backoff
+    REDIS_RETRY_BACKOFF_BASE: float = 0.05
+    REDIS_RETRY_BACKOFF_CAP: float = 0.5
 
     @computed_field
     @property
@@ -40,11 +115,41 @@ class Settings(BaseSettings):
         if self.REDIS_PASSWORD:
             return f"redis://:{self.REDIS_PASSWORD}@{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
+
+    # Local cache in front of the Redis token blacklist
+    REVOCATION_CACHE_NEGATIVE_TTL_SECONDS: float = 5.0
+    REVOCATION_CACHE_MAX_ENTRIES: int = 100_000
+
+    # Tokens that already passed jwt.decode, kept until they expire; 0 disables
+    DECODED_TOKEN_CACHE_MAX_ENTRIES: int = 10_000
+
+    # Read-through cache for post reads
+    POST_CACHE_ENABLED: bool = True
+    POST_CACHE_TTL_SECONDS: int = 300
+    POST_LIST_CACHE_TTL_SECONDS: int = 30
+    POST_CACHE_L1_MAX_ENTRIES: int = 0  # 0 disables the in-process tier
+    POST_CACHE_L1_TTL_SECONDS: float = 1.0
+
+    # Home timelines: capped Redis sorted sets of post ids, filled when followed authors post.
+    # Authors with more followers than TIMELINE_FANOUT_MAX_FOLLOWERS are not fanned out;
+    # their recent posts are merged in when a timeline is read.
+    TIMELINE_MAX_ENTRIES: int = 800
+    TIMELINE_TTL_SECONDS: int = 3 * 24 * 3600  # timelines not read for this long are dropped and rebuilt on demand
+    TIMELINE_FANOUT_MAX_FOLLOWERS: int = 10_000
+    TIMELINE_FANOUT_BATCH_SIZE: int = 1000  # timelines written per round-trip
+
+    # Bulk inserts: rows per multi-row INSERT / transaction
+    BULK_INSERT_BATCH_SIZE: int = 1000
+    POST_IMPORT_MAX_LINE_BYTES: int = 64 * 1024
+
+    # Exports stream rows from a server-side cursor, this many at a time
+    EXPORT_BATCH_SIZE: int = 1000
     
 from functools import lru_cache
 
+# Nothing below app.main reads settings at import. Long-lived objects (caches,
+# rate limiters, stores) take their limits as optional keyword arguments and
+# read the ones left as None from get_settings() the first time they need them.
 @lru_cache()
 def get_settings() -> Settings:
     return Settings()
-current_settings = get_settings()
-print(current_settings.DATABASE_URL)
\ No newline at end of file
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+import redis
+
+from app.core.metrics import Counter
+from app.core.redis import observe_redis
+
+class LocalTTLCache:
+    """Small thread-safe LRU with a per-entry TTL, used as an optional L1 in front of Redis."""
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+class ReadThroughCache:
+    """
+    Read-through cache of serialized payloads in Redis, with an optional
+    in-process L1 tier (disabled when l1_max_entries is 0).
+
+    Collections are cached under versioned keys: writers bump the version
+    with INCR instead of hunting down every cached page, and pages cached
+    under an old version simply age out. Redis errors never fail a read;
+    the loader is used instead.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], redis.Redis],
+        *,
+        namespace: str,
+        l1_max_entries: int = 0,
+        l1_ttl_seconds: float = 1.0,
+    ):
+        self._client_factory = client_factory
+        self.namespace = namespace
+        self._l1 = LocalTTLCache(max_entries=l1_max_entries, ttl_seconds=l1_ttl_seconds) if l1_max_entries > 0 else None
+
+        self.hits = Counter()
+        self.l1_hits = Counter()
+        self.misses = Counter()
+        self.errors = Counter()
+
+    def key(self, *parts: object) -> str:
+        return ":".join([self.namespace, *(str(part) for part in parts)])
+
+    def version(self, version_key: str) -> int:
+        try:
+            with observe_redis("get"):
+                value = self._client_factory().get(version_key)
+        except redis.RedisError:
+            self.errors.inc()
+            return 0
+        return int(value or 0)
+
+    def get_or_load(self, key: str, loader: Callable[[], str], ttl_seconds: int) -> str:
+        if self._l1 is not None:
+            value = self._l1.get(key)
+            if value is not None:
+                self.l1_hits.inc()
+                return value
+
+        client = self._client_factory()
+        try:
+            with observe_redis("get"):
+                value = client.get(key)
+        except redis.RedisError:
+            self.errors.inc()
+            value = None
+        if value is not None:
+            self.hits.inc()
+            if self._l1 is not None:
+                self._l1.set(key, value)
+            return value
+
+        self.misses.inc()
+        value = loader()
+        try:
+            with observe_redis("set"):
+                client.set(key, value, ex=ttl_seconds)
+        except redis.RedisError:
+            self.errors.inc()
+        if self._l1 is not None:
+            self._l1.set(key, value)
+        return value
+
+    def invalidate(self, *, keys: Iterable[str] = (), bump_versions: Iterable[str] = ()) -> None:
+        keys = list(keys)
+        bump_versions = list(bump_versions)
+        if self._l1 is not None and keys:
+            self._l1.delete(*keys)
+        if not keys and not bump_versions:
+            return
+        try:
+            pipe = self._client_factory().pipeline(transaction=False)
+            if keys:
+                pipe.delete(*keys)
+            for version_key in bump_versions:
+                pipe.incr(version_key)
+            with observe_redis("pipeline"):
+                pipe.execute()
+        except redis.RedisError as e:
+            self.errors.inc()
+            print(f"Cache invalidation failed for {keys} / {bump_versions}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits.value,
+            "l1_hits": self.l1_hits.value,
+            "misses": self.misses.value,
+            "errors": self.errors.value,
+        }
@@ -1,11 +1,99 @@
+import asyncio
+from contextlib import ExitStack
+from functools import lru_cache
+from typing import Dict, Optional
+
+from fastapi import Depends, Request
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from sqlmodel import create_engine, SQLModel as SQLModelBase, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.config.settings import get_settings
+from app.core import sql_stats
+from app.core.db_pool import InstrumentedQueuePool, InstrumentedAsyncAdaptedQueuePool
+from app.core.metrics import registry
+from app.core.replicas import PRIMARY_SESSION_INFO_KEY, ReplicaSet, db_read_routing, wants_primary
+
+# Engines are built on first use (or by the app lifespan's warmup), never at
+# import, so importing the app or a task does not need a reachable database.
+# Created engines are recorded here for pool stats; async engines by their sync_engine.
+_engines: Dict[str, Engine] = {}
+
+def _pool_options() -> dict:
+    settings = get_settings()
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def _install_sql_stats() -> None:
+    # Per-request query counts/timings instead of echoing every statement
+    if get_settings().SQL_STATS_ENABLED:
+        sql_stats.install()
+
+@lru_cache()
+def get_engine() -> Engine:
+    settings = get_settings()
+    _install_sql_stats()
+    engine = create_engine(
+        str(settings.DATABASE_URL),
+        echo=settings.SQL_ECHO,
+        poolclass=InstrumentedQueuePool,
+        **_pool_options(),
+    )
+    _engines["sync"] = engine
+    return engine
+
+@lru_cache()
+def get_async_engine() -> AsyncEngine:
+    settings = get_settings()
+    _install_sql_stats()
+    async_engine = create_async_engine(
+        str(settings.ASYNC_DATABASE_URL),
+        echo=settings.SQL_ECHO,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        **_pool_options(),
+    )
+    _engines["async"] = async_engine.sync_engine
+    return async_engine
 
-engine = create_engine(
-    str(get_settings().DATABASE_URL),
-    echo=True,
-)
+@lru_cache()
+def get_replica_set() -> ReplicaSet:
+    """Read replicas for read-only sessions (get_read_session); none configured means primary only."""
+    settings = get_settings()
+    if settings.DATABASE_REPLICA_URLS:
+        _install_sql_stats()
+    replica_set = ReplicaSet(
+        [
+            create_engine(url, echo=settings.SQL_ECHO, poolclass=InstrumentedQueuePool, **_pool_options())
+            for url in settings.DATABASE_REPLICA_URLS
+        ],
+        strategy=settings.DB_REPLICA_BALANCING,
+        retry_after_seconds=settings.DB_REPLICA_RETRY_SECONDS,
+    )
+    for replica in replica_set.engines:
+        _engines[replica_set.name(replica)] = replica
+    return replica_set
+
+@lru_cache()
+def get_async_session_factory() -> async_sessionmaker:
+    """
+    Also used directly by StreamingResponse bodies: yield dependencies are
+    torn down before the body is iterated, so a streaming body opens its own
+    session from this.
+    """
+    # expire_on_commit=False: attributes must stay readable after commit without
+    # an implicit lazy refresh, which is not allowed outside the greenlet context.
+    return async_sessionmaker(
+        get_async_engine(),
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
 
 def create_db_and_tables():
     print("Creating tables...")
@@ -16,14 +104,122 @@ def create_db_and_tables():
     except ImportError as e:
         print(f"Error importing models: {e}")
     print("Creating database tables if not exists...")
-    SQLModelBase.metadata.create_all(engine)
+    SQLModelBase.metadata.create_all(get_engine())
     print("Database tables created")
 
 def get_session():
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         try:
             yield session
         except Exception:
             session.rollback()
             raise
-        
\ No newline at end of file
+
+def _open_replica_session(request: Request, replica_set: ReplicaSet) -> Optional[Session]:
+    if wants_primary(request.method, request.cookies):
+        db_read_routing.labels("primary_pinned").inc()
+        return None
+    replica = replica_set.choose()
+    if replica is None:
+        db_read_routing.labels("primary_fallback").inc()
+        return None
+    session = Session(replica)
+    try:
+        # Check out now, so an unreachable replica fails over before the service runs
+        session.connection()
+    except OperationalError as e:
+        print(f"Replica {replica_set.name(replica)} unavailable, using the primary: {e}")
+        replica_set.mark_down(replica)
+        session.close()
+        db_read_routing.labels("primary_fallback").inc()
+        return None
+    except PoolTimeoutError:
+        # Saturated rather than down: serve this read from the primary, keep the replica in rotation
+        session.close()
+        db_read_routing.labels("primary_fallback").inc()
+        return None
+    db_read_routing.labels("replica").inc()
+    return session
+
+def get_read_session(request: Request, primary: Session = Depends(get_session)):
+    """
+    Session for read-only service calls: a healthy replica unless the request
+    is a write or falls in the client's read-your-writes window (see
+    ReadYourWritesMiddleware), otherwise the primary session. Sessions open
+    their connection lazily, so the unused primary session costs nothing;
+    replica sessions carry it for primary_session(). Do not write through it.
+    """
+    replica_set = get_replica_set()
+    replica_session = _open_replica_session(request, replica_set) if replica_set.engines else None
+    if replica_session is None:
+        yield primary
+        return
+    replica_session.info[PRIMARY_SESSION_INFO_KEY] = primary
+    with replica_session:
+        try:
+            yield replica_session
+        except Exception:
+            replica_session.rollback()
+            raise
+
+async def get_async_session():
+    async with get_async_session_factory()() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+
+def warm_up_pool(engine: Engine, connections: int) -> int:
+    """
+    Opens up to `connections` connections at once (capped at the pool size)
+    and returns them to the pool, so the first requests do not pay for
+    connecting. Returns the number opened.
+    """
+    connections = min(connections, engine.pool.size())
+    with ExitStack() as stack:
+        for _ in range(connections):
+            stack.enter_context(engine.connect())
+    return connections
+
+async def warm_up_async_pool(engine: AsyncEngine, connections: int) -> int:
+    connections = min(connections, engine.sync_engine.pool.size())
+    opened = [await engine.connect().start() for _ in range(connections)]
+    await asyncio.gather(*(connection.close() for connection in opened))
+    return connections
+
+async def dispose_engines() -> None:
+    """Closes every pool that was created; the next use builds fresh engines."""
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+    if get_replica_set.cache_info().currsize:
+        for replica in get_replica_set().engines:
+            replica.dispose()
+    for factory in (get_async_session_factory, get_async_engine, get_engine, get_replica_set):
+        factory.cache_clear()
+    _engines.clear()
+
+def get_pool_stats() -> dict:
+    """Live pool usage of the engines created so far, used to size workers against max_connections."""
+    return {name: engine.pool.snapshot() for name, engine in _engines.items()}
+
+def _pool_metrics():
+    pools = {name: engine.pool for name, engine in _engines.items()}
+    return [
+        ("db_pool_checkout_wait_seconds", "histogram", "Time spent waiting for a pooled connection", [
+            ({"pool": name}, pool.stats.checkout_wait_seconds) for name, pool in pools.items()
+        ]),
+        ("db_pool_checkout_timeouts_total", "counter", "Checkouts that gave up after pool_timeout", [
+            ({"pool": name}, pool.stats.checkout_timeouts) for name, pool in pools.items()
+        ]),
+        ("db_pool_checked_out", "gauge", "Connections currently checked out", [
+            ({"pool": name}, pool.checkedout()) for name, pool in pools.items()
+        ]),
+        ("db_pool_size", "gauge", "Configured pool size (excluding overflow)", [
+            ({"pool": name}, pool.size()) for name, pool in pools.items()
+        ]),
+    ]
+
+registry.add_collector(_pool_metrics)
@@ -0,0 +1,57 @@
+import time
+from typing import Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.metrics import Counter, Histogram
+
+class PoolStats:
+    def __init__(self):
+        self.checkout_wait_seconds = Histogram()
+        self.checkout_timeouts = Counter()
+
+class _InstrumentedPoolMixin:
+    """
+    Records how long callers wait for a connection and how often the wait
+    ends in a TimeoutError. The stats object survives pool.recreate() so
+    engine.dispose() does not reset the counters.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.stats.checkout_timeouts.inc()
+            raise
+        finally:
+            self.stats.checkout_wait_seconds.observe(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        new_pool = super().recreate()
+        new_pool.stats = self.stats
+        return new_pool
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            # overflow() is negative while the pool has not filled up yet
+            "overflow_in_use": max(0, self.overflow()),
+            "checkout_timeouts": self.stats.checkout_timeouts.value,
+            "checkout_wait_seconds": self.stats.checkout_wait_seconds.snapshot(),
+        }
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
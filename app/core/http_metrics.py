@@ -0,0 +1,50 @@
+import time
+
+from app.core.metrics import registry
+
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method, route template and status",
+    labels=("method", "route", "status"),
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", labels=("method",)
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+class HTTPMetricsMiddleware:
+    """
+    ASGI middleware recording request latency and in-flight requests. Routes
+    are labeled by their template (/posts/{post_id}), never the raw path, so
+    label cardinality stays bounded. Latency covers the whole response,
+    streamed bodies included.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        in_flight = http_requests_in_flight.labels(method)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            # The router stores the matched route in the (shared) scope
+            route_path = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            http_request_seconds.labels(method, route_path, status_code).observe(time.perf_counter() - started)
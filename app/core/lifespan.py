@@ -0,0 +1,89 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from redis.exceptions import RedisError
+from starlette.concurrency import run_in_threadpool
+
+from app.config.settings import get_settings
+from app.core.database import (
+    dispose_engines,
+    get_async_engine,
+    get_engine,
+    get_replica_set,
+    warm_up_async_pool,
+    warm_up_pool,
+)
+from app.core.redis import close_redis_client, close_sync_redis_client, get_redis_client, warm_up_redis
+from app.core.revocation_cache import listen_for_revocations
+from app.core.security import get_password_hasher
+from app.repositories.refresh_session_store import audit_enabled, refresh_session_audit
+
+async def warm_up(*, db_connections: int, redis_connections: int) -> dict:
+    """
+    Builds the lazily created resources and pays their first-use costs before
+    traffic arrives: DB connections for every pool, Redis connections, and
+    the bcrypt backend plus hasher threads. Returns seconds spent per step.
+
+    Database errors propagate, so a worker that cannot reach its database
+    never reports ready. Redis errors are only logged: every Redis caller
+    already degrades without it.
+    """
+    timings = {}
+
+    started = time.perf_counter()
+    if db_connections > 0:
+        await run_in_threadpool(warm_up_pool, get_engine(), db_connections)
+        await warm_up_async_pool(get_async_engine(), db_connections)
+        for replica in get_replica_set().engines:
+            await run_in_threadpool(warm_up_pool, replica, db_connections)
+    timings["database"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    if redis_connections > 0:
+        try:
+            await warm_up_redis(redis_connections)
+        except RedisError as e:
+            print(f"Redis warmup failed, continuing without it: {e}")
+    timings["redis"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await get_password_hasher().warm_up()
+    timings["bcrypt"] = time.perf_counter() - started
+    return timings
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Owns the process-wide resources: warms them up before the app reports
+    ready (GET /health/ready), runs the background tasks (revocation
+    listener, refresh token audit writer), and closes them on shutdown.
+    """
+    settings = get_settings()
+    app.state.ready = False
+    if settings.STARTUP_WARMUP_ENABLED:
+        timings = await warm_up(
+            db_connections=settings.WARMUP_DB_CONNECTIONS,
+            redis_connections=settings.WARMUP_REDIS_CONNECTIONS,
+        )
+        print("Warmup done: " + ", ".join(f"{step} {seconds * 1000:.0f}ms" for step, seconds in timings.items()))
+    # Keeps this worker's revocation cache in sync with revocations made by the others
+    background_tasks = [asyncio.create_task(listen_for_revocations(await get_redis_client()))]
+    if audit_enabled():
+        # Flushes refresh token audit events from the Redis session store; flushes once more when cancelled
+        background_tasks.append(asyncio.create_task(refresh_session_audit.run()))
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await close_redis_client()
+        close_sync_redis_client()
+        await dispose_engines()
+        if get_password_hasher.cache_info().currsize:
+            get_password_hasher().shutdown()
+            get_password_hasher.cache_clear()
@@ -0,0 +1,191 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+class Histogram:
+    """Fixed-bucket histogram, cheap enough to observe on every request."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        # One extra slot for observations above the last bound (+Inf).
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+            total_count = self._count
+
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = total_count
+        return {"buckets": buckets, "sum": total_sum, "count": total_count}
+
+class Counter:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+class Gauge:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+Metric = Union[Counter, Gauge, Histogram]
+
+class Labeled:
+    """A metric per combination of label values, created on first use."""
+
+    def __init__(self, factory: Callable[[], Metric], label_names: Sequence[str]):
+        self._factory = factory
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+        self._children: Dict[Tuple[str, ...], Metric] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: object) -> Metric:
+        key = tuple(str(value) for value in values)
+        if len(key) != len(self.label_names):
+            raise ValueError(f"Expected labels {self.label_names}, got {key}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def children(self) -> List[Tuple[Dict[str, str], Metric]]:
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.label_names, key)), child) for key, child in items]
+
+# (labels, metric or plain number) pairs of one metric family
+Series = List[Tuple[Dict[str, str], Union[Metric, float]]]
+# (name, type, help, series) as returned by collectors
+Family = Tuple[str, str, str, Series]
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(str(value))}"' for key, value in labels.items()) + "}"
+
+def _render_series(name: str, labels: Dict[str, str], metric: Union[Metric, float]) -> List[str]:
+    if isinstance(metric, Histogram):
+        snapshot = metric.snapshot()
+        lines = [
+            f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}"
+            for bound, count in snapshot["buckets"].items()
+        ]
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+        lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+        return lines
+    value = metric.value if isinstance(metric, (Counter, Gauge)) else metric
+    return [f"{name}{_format_labels(labels)} {_format_value(value)}"]
+
+class MetricsRegistry:
+    """
+    Metrics exported at /metrics in the Prometheus text format. Metrics are
+    either registered objects (optionally labeled) or collectors: callables
+    that read existing stats objects at scrape time and return families.
+    """
+
+    def __init__(self):
+        self._families: Dict[str, Tuple[str, str, Union[Metric, Labeled]]] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, name: str, type_: str, help: str, metric: Union[Metric, Labeled]) -> Union[Metric, Labeled]:
+        with self._lock:
+            if name in self._families:
+                raise ValueError(f"Metric {name} is already registered")
+            self._families[name] = (type_, help, metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Union[Counter, Labeled]:
+        return self.register(name, "counter", help, Labeled(Counter, labels) if labels else Counter())
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Union[Gauge, Labeled]:
+        return self.register(name, "gauge", help, Labeled(Gauge, labels) if labels else Gauge())
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> Union[Histogram, Labeled]:
+        factory = lambda: Histogram(buckets)
+        return self.register(name, "histogram", help, Labeled(factory, labels) if labels else factory())
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def families(self) -> List[Family]:
+        with self._lock:
+            registered = list(self._families.items())
+            collectors = list(self._collectors)
+        families: List[Family] = [
+            (name, type_, help, metric.children() if isinstance(metric, Labeled) else [({}, metric)])
+            for name, (type_, help, metric) in registered
+        ]
+        for collector in collectors:
+            families.extend(collector())
+        return families
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, type_, help, series in self.families():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type_}")
+            for labels, metric in series:
+                lines.extend(_render_series(name, labels, metric))
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
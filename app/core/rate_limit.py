@@ -0,0 +1,197 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple, Union
+from uuid import uuid4
+
+from fastapi import HTTPException, status
+import redis.asyncio as redis
+
+from app.config.settings import get_settings
+from app.core.metrics import registry
+from app.core.redis import observe_redis
+
+RATE_LIMIT_REDIS_PREFIX = "rate_limit:"
+
+rate_limit_decisions = registry.counter(
+    "rate_limit_decisions_total",
+    "Rate limit checks by endpoint, outcome (allowed, rejected) and backend (redis, local)",
+    labels=("endpoint", "outcome", "backend"),
+)
+
+# Sliding-window log: one sorted set per key, scored by hit time in ms.
+# KEYS are the limited keys; ARGV = now_ms, member, then (limit, window_ms)
+# per key. Every key is checked before any is written, so a request is
+# either counted against all of its keys or against none of them, and
+# rejected attempts do not extend the window. Returns 0 when allowed,
+# otherwise the ms until the fullest key frees a slot.
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local member = ARGV[2]
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[1 + 2 * i])
+    local window = tonumber(ARGV[2 + 2 * i])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= limit then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        local wait = tonumber(oldest[2]) + window - now
+        if wait > retry_after then
+            retry_after = wait
+        end
+    end
+end
+if retry_after > 0 then
+    return retry_after
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, member)
+    redis.call('PEXPIRE', key, ARGV[2 + 2 * i])
+end
+return 0
+"""
+
+@dataclass(frozen=True)
+class RateLimit:
+    limit: int
+    window_seconds: float
+
+class ConfiguredRateLimit:
+    """A RateLimit whose limit and window are read from settings when checked."""
+
+    def __init__(self, limit_setting: str, window_setting: str):
+        self.limit_setting = limit_setting
+        self.window_setting = window_setting
+
+    @property
+    def limit(self) -> int:
+        return getattr(get_settings(), self.limit_setting)
+
+    @property
+    def window_seconds(self) -> float:
+        return getattr(get_settings(), self.window_setting)
+
+# (dimension, value, limit), e.g. ("ip", "203.0.113.7", RateLimit(20, 60))
+RateLimitCheck = Tuple[str, str, Union[RateLimit, ConfiguredRateLimit]]
+
+class RateLimitExceeded(HTTPException):
+    def __init__(self, retry_after_seconds: float):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after_seconds)))},
+        )
+
+class TokenBucketLimiter:
+    """
+    In-process fallback used while Redis is unreachable. Each key gets a
+    bucket of `limit` tokens refilled at limit/window per second, which
+    allows about the same sustained rate as the sliding window. Counts are
+    per worker, so the effective limit is looser until Redis is back.
+    """
+
+    def __init__(self, *, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _tokens(self, key: str, rule: RateLimit, now: float) -> float:
+        tokens, updated_at = self._buckets.get(key, (float(rule.limit), now))
+        refill = (now - updated_at) * rule.limit / rule.window_seconds
+        return min(float(rule.limit), tokens + refill)
+
+    def hit(self, keys: Sequence[Tuple[str, RateLimit]]) -> float:
+        """Takes one token from every key, or none if any is empty; returns seconds to wait (0 if allowed)."""
+        now = time.monotonic()
+        with self._lock:
+            available = [(key, rule, self._tokens(key, rule, now)) for key, rule in keys]
+            retry_after = max(
+                ((1 - tokens) * rule.window_seconds / rule.limit for _, rule, tokens in available if tokens < 1),
+                default=0.0,
+            )
+            if retry_after > 0:
+                return retry_after
+            for key, _, tokens in available:
+                self._buckets[key] = (tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0.0
+
+class RateLimiter:
+    """
+    Sliding-window rate limiting shared by all workers through Redis (one
+    EVALSHA per request), falling back to a local token bucket when Redis
+    errors. Call it before doing any expensive work for the request.
+    """
+
+    def __init__(self, *, prefix: str = RATE_LIMIT_REDIS_PREFIX, local_max_keys: Optional[int] = None, enabled: Optional[bool] = None):
+        self.prefix = prefix
+        self._enabled = enabled
+        self._local_max_keys = local_max_keys
+        self._local: Optional[TokenBucketLimiter] = None
+        self._script = None
+
+    @property
+    def enabled(self) -> bool:
+        if self._enabled is None:
+            self._enabled = get_settings().RATE_LIMIT_ENABLED
+        return self._enabled
+
+    @property
+    def local(self) -> TokenBucketLimiter:
+        if self._local is None:
+            max_keys = self._local_max_keys
+            if max_keys is None:
+                max_keys = get_settings().RATE_LIMIT_LOCAL_MAX_KEYS
+            self._local = TokenBucketLimiter(max_keys=max_keys)
+        return self._local
+
+    def key(self, endpoint: str, dimension: str, value: str) -> str:
+        # Values are client-controlled (usernames, IPs); hash them into fixed-size keys
+        digest = hashlib.sha256(value.encode("utf-8")).hexdigest()[:32]
+        return f"{self.prefix}{endpoint}:{dimension}:{digest}"
+
+    def _get_script(self, redis_client: redis.Redis):
+        if self._script is None or self._script.registered_client is not redis_client:
+            self._script = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+        return self._script
+
+    async def _hit_redis(self, redis_client: redis.Redis, keys: Sequence[Tuple[str, RateLimit]]) -> float:
+        args = [int(time.time() * 1000), uuid4().hex]
+        for _, rule in keys:
+            args.extend([rule.limit, int(rule.window_seconds * 1000)])
+        with observe_redis("evalsha"):
+            retry_after_ms = await self._get_script(redis_client)(keys=[key for key, _ in keys], args=args)
+        return int(retry_after_ms) / 1000
+
+    async def hit(self, redis_client: Optional[redis.Redis], *, endpoint: str, checks: Sequence[RateLimitCheck]) -> None:
+        """Counts one request against every check; raises RateLimitExceeded if any is over its limit."""
+        if not self.enabled or not checks:
+            return
+        keys = [(self.key(endpoint, dimension, value), rule) for dimension, value, rule in checks]
+
+        backend = "redis"
+        try:
+            if redis_client is None:
+                raise redis.ConnectionError("No Redis client")
+            retry_after = await self._hit_redis(redis_client, keys)
+        except redis.RedisError as e:
+            print(f"Rate limiter falling back to local buckets: {e}")
+            backend = "local"
+            retry_after = self.local.hit(keys)
+
+        if retry_after > 0:
+            rate_limit_decisions.labels(endpoint, "rejected", backend).inc()
+            raise RateLimitExceeded(retry_after)
+        rate_limit_decisions.labels(endpoint, "allowed", backend).inc()
+
+rate_limiter = RateLimiter()
+
+LOGIN_LIMIT_PER_IP = ConfiguredRateLimit("LOGIN_RATE_LIMIT_PER_IP", "LOGIN_RATE_LIMIT_WINDOW_SECONDS")
+LOGIN_LIMIT_PER_USERNAME = ConfiguredRateLimit("LOGIN_RATE_LIMIT_PER_USERNAME", "LOGIN_RATE_LIMIT_WINDOW_SECONDS")
+REFRESH_LIMIT_PER_IP = ConfiguredRateLimit("REFRESH_RATE_LIMIT_PER_IP", "REFRESH_RATE_LIMIT_WINDOW_SECONDS")
+REFRESH_LIMIT_PER_FAMILY = ConfiguredRateLimit("REFRESH_RATE_LIMIT_PER_FAMILY", "REFRESH_RATE_LIMIT_WINDOW_SECONDS")
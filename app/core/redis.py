@@ -1,18 +1,125 @@
+import asyncio
+import time
+from contextlib import contextmanager
+
 import redis.asyncio as redis
+import redis as sync_redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry as SyncRetry
 from app.config.settings import get_settings
+from app.core.metrics import registry
+
+redis_command_seconds = registry.histogram(
+    "redis_command_duration_seconds", "Redis round-trip time by command", labels=("command",)
+)
+
+@contextmanager
+def observe_redis(command: str):
+    """Times one Redis round-trip (a command or a whole pipeline); works around awaits too."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        redis_command_seconds.labels(command).observe(time.perf_counter() - started)
+
+def _pool_options() -> dict:
+    settings = get_settings()
+    return {
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        "timeout": settings.REDIS_POOL_TIMEOUT,
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+        "decode_responses": True,
+    }
 
-settings = get_settings()
+def _backoff() -> ExponentialBackoff:
+    settings = get_settings()
+    return ExponentialBackoff(cap=settings.REDIS_RETRY_BACKOFF_CAP, base=settings.REDIS_RETRY_BACKOFF_BASE)
 
-redis_pool = redis.ConnectionPool.from_url(str(settings.REDIS_URL), decode_responses=True)
+def create_redis_client() -> redis.Redis:
+    """Async client over a capped, blocking pool; the client owns the pool and closes it with itself."""
+    settings = get_settings()
+    pool = redis.BlockingConnectionPool.from_url(
+        str(settings.REDIS_URL),
+        retry=Retry(_backoff(), settings.REDIS_RETRY_ATTEMPTS),
+        **_pool_options(),
+    )
+    return redis.Redis.from_pool(pool)
+
+def create_sync_redis_client() -> sync_redis.Redis:
+    settings = get_settings()
+    pool = sync_redis.BlockingConnectionPool.from_url(
+        str(settings.REDIS_URL),
+        retry=SyncRetry(_backoff(), settings.REDIS_RETRY_ATTEMPTS),
+        **_pool_options(),
+    )
+    return sync_redis.Redis.from_pool(pool)
 
 async def get_redis_client() -> redis.Redis:
     if not hasattr(get_redis_client, "client_instance") or get_redis_client.client_instance is None:
         print("Initializing Redis client")
-        get_redis_client.client_instance = redis.Redis.from_url(str(settings.REDIS_URL), decode_responses = True)
+        get_redis_client.client_instance = create_redis_client()
     return get_redis_client.client_instance
 
 async def close_redis_client():
     if hasattr(get_redis_client, "client_instance") and get_redis_client.client_instance:
         print("Closing Redis client")
-        await get_redis_client.client_instance.close()
-        get_redis_client.client_instance = None
\ No newline at end of file
+        await get_redis_client.client_instance.aclose()
+        get_redis_client.client_instance = None
+
+def get_sync_redis_client() -> sync_redis.Redis:
+    """Blocking client for sync code paths (e.g. services running in the request threadpool)."""
+    if getattr(get_sync_redis_client, "client_instance", None) is None:
+        print("Initializing sync Redis client")
+        get_sync_redis_client.client_instance = create_sync_redis_client()
+    return get_sync_redis_client.client_instance
+
+def close_sync_redis_client():
+    if getattr(get_sync_redis_client, "client_instance", None) is not None:
+        print("Closing sync Redis client")
+        get_sync_redis_client.client_instance.close()
+        get_sync_redis_client.client_instance = None
+
+class RedisBatch:
+    """
+    Queues commands and sends them in one round-trip (a non-transactional
+    pipeline) when the `async with` block exits cleanly; their replies are
+    then in .results, in the order queued. Commands are called on the batch
+    itself, e.g. batch.exists(key). Nothing is sent if the block raises.
+
+        async with RedisBatch(client, command="revoke") as batch:
+            batch.setex(key, ttl, "revoked")
+            batch.publish(channel, message)
+    """
+
+    def __init__(self, redis_client: redis.Redis, *, command: str = "pipeline"):
+        self.pipeline = redis_client.pipeline(transaction=False)
+        self.command = command
+        self.results: list = []
+
+    def __getattr__(self, name):
+        return getattr(self.pipeline, name)
+
+    def __len__(self) -> int:
+        return len(self.pipeline)
+
+    async def __aenter__(self) -> "RedisBatch":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None and len(self.pipeline):
+                with observe_redis(self.command):
+                    self.results = await self.pipeline.execute()
+        finally:
+            await self.pipeline.reset()
+
+async def warm_up_redis(connections: int) -> int:
+    """Opens `connections` pooled connections with concurrent PINGs, so early requests find them ready."""
+    client = await get_redis_client()
+    connections = min(connections, get_settings().REDIS_MAX_CONNECTIONS)
+    with observe_redis("ping"):
+        await asyncio.gather(*(client.ping() for _ in range(connections)))
+    return connections
@@ -0,0 +1,117 @@
+import itertools
+import math
+import threading
+import time
+from typing import Dict, List, Mapping, Optional, Sequence
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.metrics import registry
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Set after a successful write; reads from that client stay on the primary
+# until the timestamp it holds, so they see their own writes despite lag
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+db_read_routing = registry.counter(
+    "db_read_routing_total",
+    "Read-only sessions by target: replica, primary_pinned (write or read-your-writes), primary_fallback",
+    labels=("target",),
+)
+db_replica_failures = registry.counter(
+    "db_replica_failures_total", "Replica connection failures that marked it down", labels=("replica",)
+)
+
+class ReplicaSet:
+    """
+    Picks a replica engine for a read-only session, round-robin or by fewest
+    checked-out connections. A replica that fails to connect is skipped for
+    retry_after_seconds, after which it is tried again; with every replica
+    down (or none configured) choose() returns None and callers use the
+    primary.
+    """
+
+    STRATEGIES = ("round_robin", "least_connections")
+
+    def __init__(self, engines: Sequence[Engine], *, strategy: str = "round_robin", retry_after_seconds: float = 30.0):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown replica balancing strategy: {strategy}")
+        self.engines = list(engines)
+        self.strategy = strategy
+        self.retry_after_seconds = retry_after_seconds
+        self._down_until: Dict[int, float] = {}
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def name(self, engine: Engine) -> str:
+        return f"replica{self.engines.index(engine)}"
+
+    def healthy(self) -> List[Engine]:
+        now = time.monotonic()
+        with self._lock:
+            return [engine for i, engine in enumerate(self.engines) if self._down_until.get(i, 0) <= now]
+
+    def choose(self) -> Optional[Engine]:
+        candidates = self.healthy()
+        if not candidates:
+            return None
+        if self.strategy == "least_connections":
+            return min(candidates, key=lambda engine: engine.pool.checkedout())
+        return candidates[next(self._turn) % len(candidates)]
+
+    def mark_down(self, engine: Engine) -> None:
+        db_replica_failures.labels(self.name(engine)).inc()
+        with self._lock:
+            self._down_until[self.engines.index(engine)] = time.monotonic() + self.retry_after_seconds
+
+# Session.info key under which get_read_session leaves the request's primary
+# session on a replica session
+PRIMARY_SESSION_INFO_KEY = "primary_session"
+
+def primary_session(session: Session) -> Session:
+    """
+    The primary behind a read session (the session itself when it is not a
+    replica). For reads whose result outlives the request, such as shared
+    cache fills: a lagging replica would store its stale rows for every client.
+    """
+    return session.info.get(PRIMARY_SESSION_INFO_KEY, session)
+
+def wants_primary(method: str, cookies: Mapping[str, str], *, now: Optional[float] = None) -> bool:
+    """Writes, and reads inside the client's read-your-writes window, go to the primary."""
+    if method not in SAFE_METHODS:
+        return True
+    try:
+        pinned_until = float(cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+    except ValueError:
+        return False
+    return pinned_until > (time.time() if now is None else now)
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware that marks a client after a successful write (any
+    non-safe method answered below 400) with a cookie pinning its reads to
+    the primary for window_seconds.
+    """
+
+    def __init__(self, app, *, window_seconds: float):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or self.window_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                pinned_until = int(time.time() + self.window_seconds)
+                cookie = (
+                    f"{READ_YOUR_WRITES_COOKIE}={pinned_until}; Max-Age={math.ceil(self.window_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,11 @@
+from fastapi.responses import ORJSONResponse, Response
+
+__all__ = ["ORJSONResponse", "RawJSONResponse"]
+
+class RawJSONResponse(Response):
+    """
+    Sends an already serialized JSON document (e.g. straight from the cache)
+    without decoding, validating or re-encoding it. Routes returning this skip
+    FastAPI's response_model processing entirely.
+    """
+    media_type = "application/json"
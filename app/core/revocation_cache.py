@@ -0,0 +1,124 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import redis.asyncio as redis
+
+from app.config.settings import get_settings
+from app.core.metrics import Counter
+
+REVOKED_TOKENS_CHANNEL = "revoked_tokens:events"
+LISTEN_POLL_SECONDS = 1.0
+
+class RevocationCache:
+    """
+    Per-worker view of the Redis revocation blacklist.
+
+    Revoked JTIs are kept until the token itself expires. "Not revoked"
+    answers are kept only for negative_ttl seconds: pub/sub pushes new
+    revocations to every worker right away, and the short TTL bounds how
+    stale a worker can be if it misses a message (e.g. while reconnecting).
+    """
+
+    def __init__(self, *, negative_ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self._negative_ttl = negative_ttl
+        self._max_entries = max_entries
+        self._revoked: "OrderedDict[str, float]" = OrderedDict()
+        self._not_revoked: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    @staticmethod
+    def _get_live(entries: "OrderedDict[str, float]", jti: str, now: float) -> bool:
+        valid_until = entries.get(jti)
+        if valid_until is None:
+            return False
+        if valid_until <= now:
+            entries.pop(jti, None)
+            return False
+        return True
+
+    def _put(self, entries: "OrderedDict[str, float]", jti: str, valid_until: float) -> None:
+        entries[jti] = valid_until
+        entries.move_to_end(jti)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def lookup(self, jti: str) -> Optional[bool]:
+        """True if known revoked, False if recently confirmed not revoked, None if Redis must be asked."""
+        now = time.monotonic()
+        if self._get_live(self._revoked, jti, now):
+            self.hits.inc()
+            return True
+        if self._get_live(self._not_revoked, jti, now):
+            self.hits.inc()
+            return False
+        self.misses.inc()
+        return None
+
+    @property
+    def negative_ttl(self) -> float:
+        if self._negative_ttl is None:
+            self._negative_ttl = get_settings().REVOCATION_CACHE_NEGATIVE_TTL_SECONDS
+        return self._negative_ttl
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is None:
+            self._max_entries = get_settings().REVOCATION_CACHE_MAX_ENTRIES
+        return self._max_entries
+
+    def mark_revoked(self, jti: str, ttl_seconds: float) -> None:
+        self._not_revoked.pop(jti, None)
+        if ttl_seconds > 0:
+            self._put(self._revoked, jti, time.monotonic() + ttl_seconds)
+
+    def mark_not_revoked(self, jti: str) -> None:
+        if self.negative_ttl > 0:
+            self._put(self._not_revoked, jti, time.monotonic() + self.negative_ttl)
+
+    def clear_negative(self) -> None:
+        self._not_revoked.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits.value,
+            "misses": self.misses.value,
+            "revoked_entries": len(self._revoked),
+            "not_revoked_entries": len(self._not_revoked),
+        }
+
+revocation_cache = RevocationCache()
+
+def format_revocation_message(jti: str, ttl_seconds: int) -> str:
+    return f"{jti}:{ttl_seconds}"
+
+async def listen_for_revocations(redis_client: redis.Redis, cache: RevocationCache = revocation_cache):
+    """
+    Long-running task (one per worker) that applies revocations published by
+    any worker to the local cache. Negative entries are dropped whenever the
+    subscription is (re)established, since messages may have been missed.
+    """
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(REVOKED_TOKENS_CHANNEL)
+            cache.clear_negative()
+            while True:
+                # Poll with a timeout instead of listen(): a blocking read would hit the pool's
+                # socket_timeout on a quiet channel, and each poll lets the health check run
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=LISTEN_POLL_SECONDS)
+                if message is None or message.get("type") != "message":
+                    continue
+                jti, _, ttl = str(message["data"]).rpartition(":")
+                if jti:
+                    cache.mark_revoked(jti, float(ttl))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Revocation listener error: {e}. Reconnecting...")
+            cache.clear_negative()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
@@ -1,39 +1,180 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union, Optional
-from uuid import uuid4
+from functools import lru_cache
+from typing import Any, Callable, List, Sequence, Set, Tuple, Union, Optional
+from uuid import UUID, uuid4
 
+from fastapi import HTTPException, status
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 import redis
 
 from app.config.settings import get_settings
+from app.core.metrics import Counter, Histogram, registry
+from app.core.redis import RedisBatch
+from app.core.revocation_cache import REVOKED_TOKENS_CHANNEL, format_revocation_message, revocation_cache
+from app.core.token_cache import decoded_token_cache
 from app.schemas.token_schema import TokenPayload
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-settings = get_settings()
+REVOKED_TOKENS_REDIS_PREFIX = "revoked_tokens:"
 
-ALGORITHM = settings.ALGORITHM
-ACCESS_TOKEN_SECRET_KEY = settings.ACCESS_TOKEN_SECRET_KEY
-ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+class PasswordHasherBusyError(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent password operations, please retry",
+            headers={"Retry-After": "1"},
+        )
 
-REFRESH_TOKEN_SECRET_KEY = settings.REFRESH_TOKEN_SECRET_KEY
-REFRESH_TOKEN_EXPIRE_MINUTES = settings.REFRESH_TOKEN_EXPIRE_MINUTES
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, size-limited thread pool (bcrypt releases the
+    GIL while hashing) so a login storm cannot occupy the event loop or the
+    request threadpool. Once max_pending jobs are running or queued, new
+    work is rejected immediately instead of piling up behind them.
+    """
 
-REVOKED_TOKENS_REDIS_PREFIX = "revoked_tokens:"
+    def __init__(self, context: CryptContext, *, max_workers: int, max_pending: int):
+        self._context = context
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hasher")
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        self.hash_seconds = Histogram()
+        self.verify_seconds = Histogram()
+        self.queue_wait_seconds = Histogram()
+        self.rejected = Counter()
+
+    def _submit(self, fn: Callable[..., Any], histogram: Histogram, *args: Any) -> Future:
+        with self._lock:
+            if self._pending >= self._max_pending:
+                self.rejected.inc()
+                raise PasswordHasherBusyError()
+            self._pending += 1
+
+        submitted_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            self.queue_wait_seconds.observe(started_at - submitted_at)
+            try:
+                return fn(*args)
+            finally:
+                histogram.observe(time.perf_counter() - started_at)
+                with self._lock:
+                    self._pending -= 1
+
+        return self._executor.submit(job)
+
+    def hash(self, password: str) -> str:
+        return self._submit(self._context.hash, self.hash_seconds, password).result()
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit(self._context.verify, self.verify_seconds, plain_password, hashed_password).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(self._context.hash, self.hash_seconds, password))
+
+    async def hash_many_async(self, passwords: Sequence[str]) -> List[str]:
+        """
+        Hashes with one job in flight per worker thread: a bulk insert keeps
+        every worker busy without filling the queue that logins share (and
+        being rejected by it).
+        """
+        hashed: List[str] = []
+        for start in range(0, len(passwords), self._max_workers):
+            hashed.extend(await asyncio.gather(*(
+                self.hash_async(password) for password in passwords[start:start + self._max_workers]
+            )))
+        return hashed
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(
+            self._submit(self._context.verify, self.verify_seconds, plain_password, hashed_password)
+        )
+
+    async def warm_up(self) -> None:
+        """
+        Loads the bcrypt backend and starts every worker thread, so the first
+        logins do not pay for either.
+        """
+        await self.hash_async("warm-up")
+        # Jobs that wait for each other force the executor to start all of its threads
+        barrier = threading.Barrier(self._max_workers)
+        await asyncio.gather(*(
+            asyncio.wrap_future(self._executor.submit(barrier.wait)) for _ in range(self._max_workers)
+        ))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._pending,
+            "max_pending": self._max_pending,
+            "rejected": self.rejected.value,
+            "hash_seconds": self.hash_seconds.snapshot(),
+            "verify_seconds": self.verify_seconds.snapshot(),
+            "queue_wait_seconds": self.queue_wait_seconds.snapshot(),
+        }
+
+@lru_cache()
+def get_password_hasher() -> PasswordHasher:
+    # Built on first use or by the app lifespan's warmup, not at import
+    settings = get_settings()
+    return PasswordHasher(
+        CryptContext(schemes=["bcrypt"], deprecated="auto"),
+        max_workers=settings.PASSWORD_HASH_WORKERS,
+        max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    )
+
+def _password_hasher_metrics():
+    # The families are always listed; they have no samples until the hasher is first used
+    hashers = [get_password_hasher()] if get_password_hasher.cache_info().currsize else []
+    return [
+        ("password_hash_duration_seconds", "histogram", "bcrypt time per operation, excluding queueing", [
+            series
+            for hasher in hashers
+            for series in (({"operation": "hash"}, hasher.hash_seconds), ({"operation": "verify"}, hasher.verify_seconds))
+        ]),
+        ("password_hash_queue_wait_seconds", "histogram", "Time bcrypt jobs wait for a hasher thread", [
+            ({}, hasher.queue_wait_seconds) for hasher in hashers
+        ]),
+        ("password_hash_pending", "gauge", "bcrypt jobs running or queued", [({}, hasher._pending) for hasher in hashers]),
+        ("password_hash_rejected_total", "counter", "bcrypt jobs rejected because the queue was full", [
+            ({}, hasher.rejected) for hasher in hashers
+        ]),
+    ]
+
+registry.add_collector(_password_hasher_metrics)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_password_hasher().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_password_hasher().verify(plain_password, hashed_password)
 
-def _create_token(
+async def get_password_hash_async(password: str) -> str:
+    return await get_password_hasher().hash_async(password)
+
+async def get_password_hashes_async(passwords: Sequence[str]) -> List[str]:
+    return await get_password_hasher().hash_many_async(passwords)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await get_password_hasher().verify_async(plain_password, hashed_password)
+
+def _create_token_with_payload(
     subject: Union[str, Any],
     expires_delta_minutes: int,
     secret_key: str,
     token_type: str,
     additional_payload: Optional[dict] = None,
-) -> str:
+) -> Tuple[str, TokenPayload]:
     expire = datetime.now(timezone.utc) + timedelta(minutes=expires_delta_minutes)
     jti = str(uuid4())
     to_encode = {
@@ -44,49 +185,134 @@ def _create_token(
     }
     if additional_payload:
         to_encode.update(additional_payload)
-    encoded_jwt = jwt.encode(to_encode, secret_key, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, secret_key, algorithm=get_settings().ALGORITHM)
+    payload = TokenPayload(
+        sub=str(subject), jti=jti, exp=int(expire.timestamp()), type=token_type, **(additional_payload or {})
+    )
+    return encoded_jwt, payload
+
+def _create_token(
+    subject: Union[str, Any],
+    expires_delta_minutes: int,
+    secret_key: str,
+    token_type: str,
+    additional_payload: Optional[dict] = None,
+) -> str:
+    encoded_jwt, _ = _create_token_with_payload(
+        subject, expires_delta_minutes, secret_key, token_type, additional_payload
+    )
     return encoded_jwt
 
 def create_access_token(subject: Union[str, Any]) -> str:
     return _create_token(
         subject=subject,
-        expires_delta_minutes=ACCESS_TOKEN_EXPIRE_MINUTES,
-        secret_key= ACCESS_TOKEN_SECRET_KEY,
+        expires_delta_minutes=get_settings().ACCESS_TOKEN_EXPIRE_MINUTES,
+        secret_key=get_settings().ACCESS_TOKEN_SECRET_KEY,
         token_type="access"
     )
     
 def create_refresh_token(subject: Union[str, Any]) -> str:
     return _create_token(
         subject=subject,
-        expires_delta_minutes=REFRESH_TOKEN_EXPIRE_MINUTES,
-        secret_key=REFRESH_TOKEN_SECRET_KEY,
+        expires_delta_minutes=get_settings().REFRESH_TOKEN_EXPIRE_MINUTES,
+        secret_key=get_settings().REFRESH_TOKEN_SECRET_KEY,
         token_type="refresh"
     )
 
+def create_refresh_token_with_payload(
+    subject: Union[str, Any], family: Optional[UUID] = None
+) -> Tuple[str, TokenPayload]:
+    """
+    Like create_refresh_token, but also returns the claims so callers need not
+    decode it again. The family, when given, is carried in the "fam" claim so
+    it is known without a DB lookup (e.g. for rate limiting).
+    """
+    return _create_token_with_payload(
+        subject=subject,
+        expires_delta_minutes=get_settings().REFRESH_TOKEN_EXPIRE_MINUTES,
+        secret_key=get_settings().REFRESH_TOKEN_SECRET_KEY,
+        token_type="refresh",
+        additional_payload={"fam": str(family)} if family else None,
+    )
+
+def read_refresh_token_claims(token: str) -> Optional[TokenPayload]:
+    """
+    Checks only the signature and expiry, without the revocation lookup.
+    Cheap enough to run before any other work, but not proof that the token
+    is still usable: only use it for things like rate-limit keys.
+    """
+    settings = get_settings()
+    try:
+        payload = jwt.decode(token, settings.REFRESH_TOKEN_SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("type") != "refresh":
+        return None
+    return TokenPayload(
+        sub=payload.get("sub"), jti=payload.get("jti"), exp=payload.get("exp"), type="refresh", fam=payload.get("fam")
+    )
+
+async def find_revoked(tokens: Sequence[Tuple[str, int]], redis_client: redis.Redis) -> Set[str]:
+    """
+    JTIs among (jti, exp) pairs that are revoked. The local revocation cache
+    answers first; the rest are checked with one pipelined round-trip.
+    """
+    revoked = set()
+    unknown = []
+    for jti, expires_at_timestamp in tokens:
+        is_revoked = revocation_cache.lookup(jti)
+        if is_revoked is None:
+            unknown.append((jti, expires_at_timestamp))
+        elif is_revoked:
+            revoked.add(jti)
+    if not unknown:
+        return revoked
+
+    async with RedisBatch(redis_client, command="exists") as batch:
+        for jti, _ in unknown:
+            batch.exists(f"{REVOKED_TOKENS_REDIS_PREFIX}{jti}")
+    now_timestamp = datetime.now(timezone.utc).timestamp()
+    for (jti, expires_at_timestamp), exists in zip(unknown, batch.results):
+        if exists:
+            revoked.add(jti)
+            revocation_cache.mark_revoked(jti, expires_at_timestamp - now_timestamp)
+        else:
+            revocation_cache.mark_not_revoked(jti)
+    return revoked
+
 async def _decode_and_validate_token(
     token: str,
     secret_key: str,
     expected_token_type: str,
-    redis_client: redis.Redis
+    redis_client: redis.Redis,
+    cache_decoded: bool = False,
 ) -> Optional[TokenPayload]:
     try:
-        payload = jwt.decode(token, secret_key, algorithms=[ALGORITHM])
-        token_jti: Optional[str] = payload.get("jti")
-        token_type: Optional[str] = payload.get("type")
-        subject: Optional[str] = payload.get("sub")
-        expires_at_timestamp: Optional[int] = payload.get("exp")
-        
-        if not all([token_jti, token_type, subject, expires_at_timestamp]):
-            return None
-        
-        if token_type != expected_token_type:
-            return None
+        claims = decoded_token_cache.get(expected_token_type, token) if cache_decoded else None
+        if claims is None:
+            payload = jwt.decode(token, secret_key, algorithms=[get_settings().ALGORITHM])
+            token_jti: Optional[str] = payload.get("jti")
+            token_type: Optional[str] = payload.get("type")
+            subject: Optional[str] = payload.get("sub")
+            expires_at_timestamp: Optional[int] = payload.get("exp")
+            
+            if not all([token_jti, token_type, subject, expires_at_timestamp]):
+                return None
+            
+            if token_type != expected_token_type:
+                return None
+
+            claims = TokenPayload(
+                sub=subject, jti=token_jti, exp=expires_at_timestamp, type=token_type, fam=payload.get("fam")
+            )
+            if cache_decoded:
+                decoded_token_cache.put(expected_token_type, token, claims)
         
-        is_revoked = await redis_client.exists(f"{REVOKED_TOKENS_REDIS_PREFIX}{token_jti}")
-        if is_revoked:
+        # Revocation is checked on every call, cached decode or not
+        if await find_revoked([(claims.jti, claims.exp)], redis_client):
             return None
         
-        return TokenPayload(sub=subject, jti=token_jti, exp=expires_at_timestamp, type=token_type)
+        return claims
     except JWTError:
         return None
     except Exception:
@@ -95,33 +321,53 @@ async def _decode_and_validate_token(
 async def decode_access_token(token: str, redis_client: redis.Redis) -> Optional[TokenPayload]:
     return await _decode_and_validate_token(
         token=token,
-        secret_key=ACCESS_TOKEN_SECRET_KEY,
+        secret_key=get_settings().ACCESS_TOKEN_SECRET_KEY,
         expected_token_type="access",
-        redis_client=redis_client       
+        redis_client=redis_client,
+        # Bearer tokens are presented on every request; refresh tokens are single-use
+        cache_decoded=True,
     )
 
 async def decode_refresh_token(token: str, redis_client: redis.Redis) -> Optional[TokenPayload]:
     return await _decode_and_validate_token(
         token=token,
-        secret_key=REFRESH_TOKEN_SECRET_KEY,
+        secret_key=get_settings().REFRESH_TOKEN_SECRET_KEY,
         expected_token_type="refresh",
         redis_client=redis_client
     )
 
+async def revoke_tokens(tokens: Sequence[Tuple[str, int]], redis_client: redis.Redis) -> None:
+    """
+    Blacklists (jti, exp) pairs until they expire and tells every worker, in
+    one round-trip however many tokens there are. Already expired tokens are
+    skipped. Redis errors are logged, not raised: the local cache still
+    rejects the tokens in this worker.
+    """
+    now_timestamp = int(datetime.now(timezone.utc).timestamp())
+    live = []
+    for jti, expires_at_timestamp in tokens:
+        ttl_seconds = expires_at_timestamp - now_timestamp
+        if ttl_seconds > 0:
+            revocation_cache.mark_revoked(jti, ttl_seconds)
+            live.append((jti, ttl_seconds))
+        else:
+            print(f"Token JTI {jti} already expired. Not added to Redis blacklist")
+    if not live:
+        return
+
+    try:
+        async with RedisBatch(redis_client, command="revoke") as batch:
+            for jti, ttl_seconds in live:
+                batch.setex(f"{REVOKED_TOKENS_REDIS_PREFIX}{jti}", ttl_seconds, "revoked")
+                batch.publish(REVOKED_TOKENS_CHANNEL, format_revocation_message(jti, ttl_seconds))
+        for jti, ttl_seconds in live:
+            print(f"Token JTI {jti} revoked. Will expire in Redis in {ttl_seconds} seconds")
+    except Exception as e:
+        print(f"Error revoking tokens {', '.join(jti for jti, _ in live)}: {e}")
+
 async def revoke_token(
     jti: str,
     expires_at_timestamp: int,
     redis_client: redis.Redis
 ):
-    now_timestamp = int(datetime.now(timezone.utc).timestamp())
-    ttl_seconds = max(0, expires_at_timestamp - now_timestamp)
-    
-    if ttl_seconds > 0:
-        try: 
-            await redis_client.setex(f"{REVOKED_TOKENS_REDIS_PREFIX}{jti}", ttl_seconds, "revoked")
-            print(f"Token JTI {jti} revoked. Will expire in Redis in {ttl_seconds} seconds")
-        except Exception as e:
-            print(f"Error revoking token {jti}: {e}")
-    else:
-        print(f"Token JTI {jti} already expired. Not added to Redis blacklist")
-        return True
+    await revoke_tokens([(jti, expires_at_timestamp)], redis_client)
@@ -0,0 +1,168 @@
+import heapq
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# "IN (?, ?, ?)" / "VALUES (%(a)s, %(b)s), (...)" collapse to one placeholder group
+_PLACEHOLDER_GROUP = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+))*\s*\)")
+_REPEATED_GROUPS = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+
+def statement_shape(statement: str) -> str:
+    """Normalizes SQL so that executions differing only in parameters compare equal."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _PLACEHOLDER_GROUP.sub("(?)", shape)
+    return _REPEATED_GROUPS.sub(r"\1", shape)
+
+@dataclass
+class QueryStats:
+    """SQL executed within one request (or one `track_queries` block)."""
+    count: int = 0
+    total_seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+    slowest_limit: Optional[int] = None  # None: SQL_STATS_SLOWEST
+    _slowest: List[Tuple[float, int, str]] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.slowest_limit is None:
+            self.slowest_limit = get_settings().SQL_STATS_SLOWEST
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_seconds += duration
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        if self.slowest_limit <= 0:
+            return
+        entry = (duration, self.count, shape)
+        if len(self._slowest) < self.slowest_limit:
+            heapq.heappush(self._slowest, entry)
+        else:
+            heapq.heappushpop(self._slowest, entry)
+
+    @property
+    def slowest(self) -> List[Tuple[float, str]]:
+        return [(duration, shape) for duration, _, shape in sorted(self._slowest, reverse=True)]
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Statement shapes executed more than `threshold` times; the usual N+1 signature."""
+        return {shape: count for shape, count in self.shapes.items() if count > threshold}
+
+    def log_fields(self) -> dict:
+        return {
+            "db_query_count": self.count,
+            "db_time_ms": round(self.total_seconds * 1000, 2),
+            "db_slowest": [{"ms": round(d * 1000, 2), "sql": s[:200]} for d, s in self.slowest],
+        }
+
+    def assert_max_queries(self, expected: int) -> None:
+        if self.count > expected:
+            raise AssertionError(f"Expected at most {expected} queries, got {self.count}:\n{self._describe()}")
+
+    def assert_no_repeated_statements(self, threshold: int = 1) -> None:
+        repeated = self.repeated(threshold)
+        if repeated:
+            details = "\n".join(f"  {count}x {shape}" for shape, count in repeated.items())
+            raise AssertionError(f"Statements repeated more than {threshold} times (N+1?):\n{details}")
+
+    def _describe(self) -> str:
+        return "\n".join(f"  {count}x {shape}" for shape, count in self.shapes.most_common())
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("sql_query_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_stats.get() is not None:
+        context._sql_stats_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = getattr(context, "_sql_stats_started", None)
+    if stats is None or started is None:
+        return
+    stats.record(statement, time.perf_counter() - started)
+
+_installed = False
+
+def install() -> None:
+    """Hooks every Engine (sync engines and the ones behind async engines). Idempotent."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Collects the SQL run inside the block, e.g. in tests:
+
+        with track_queries() as stats:
+            service.get_users(db)
+        stats.assert_max_queries(1)
+    """
+    install()
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def warn_on_repeats(stats: QueryStats, *, where: str, threshold: Optional[int] = None) -> None:
+    if threshold is None:
+        threshold = get_settings().SQL_REPEATED_STATEMENT_THRESHOLD
+    if threshold <= 0:
+        return
+    for shape, count in stats.repeated(threshold).items():
+        logger.warning("Possible N+1 in %s: statement ran %d times: %s", where, count, shape[:300])
+
+class SQLStatsMiddleware:
+    """
+    ASGI middleware that tracks the SQL of each HTTP request, adds
+    X-DB-Query-Count / X-DB-Time-Ms response headers and logs one line with
+    the counts and slowest statements. Headers cover the queries run before
+    the response starts; the log line covers the whole request, including
+    streamed bodies.
+    """
+
+    def __init__(self, app, *, headers: Optional[bool] = None):
+        self.app = app
+        self.headers = get_settings().SQL_STATS_HEADERS if headers is None else headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_stats(message):
+            if self.headers and message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-db-query-count", str(stats.count).encode("latin-1")),
+                    (b"x-db-time-ms", f"{stats.total_seconds * 1000:.2f}".encode("latin-1")),
+                ]
+            await send(message)
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                where = f"{scope['method']} {scope['path']}"
+                logger.info("%s sql", where, extra=stats.log_fields())
+                warn_on_repeats(stats, where=where)
@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import redis
+
+from app.config.settings import get_settings
+from app.core.metrics import registry
+from app.core.redis import get_sync_redis_client, observe_redis
+
+# (score, post id), newest first. Scores are created_at in integer
+# microseconds, exact in a sorted set's double and orderable like
+# (created_at, id) keyset cursors.
+TimelineEntry = Tuple[int, UUID]
+
+_EPOCH = datetime(1970, 1, 1)
+
+timeline_reads = registry.counter(
+    "timeline_reads_total",
+    "Home timeline reads by source: cached, rebuilt (missing or expired), database (Redis unavailable)",
+    labels=("source",),
+)
+
+# KEYS are timelines; ARGV = score, post id, max entries. Only timelines that
+# exist are written: a missing one is rebuilt in full on its next read, and
+# creating it here would hide the posts it never received.
+FAN_OUT_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('ZADD', key, ARGV[1], ARGV[2])
+        redis.call('ZREMRANGEBYRANK', key, 0, -(tonumber(ARGV[3]) + 1))
+    end
+end
+return 0
+"""
+
+def timeline_score(created_at: datetime) -> int:
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return (created_at - _EPOCH) // timedelta(microseconds=1)
+
+def score_datetime(score: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=score)
+
+class TimelineStore:
+    """
+    Per-user home timelines as capped Redis sorted sets of post ids, kept
+    for ttl_seconds after their last read. Holds ids only; callers hydrate
+    posts from the database. Redis errors on writes are logged and
+    swallowed; reads raise redis.RedisError so callers can fall back.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], redis.Redis],
+        *,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        prefix: str = "timeline:",
+    ):
+        self._client_factory = client_factory
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._script = None
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is None:
+            self._max_entries = get_settings().TIMELINE_MAX_ENTRIES
+        return self._max_entries
+
+    @property
+    def ttl_seconds(self) -> int:
+        if self._ttl_seconds is None:
+            self._ttl_seconds = get_settings().TIMELINE_TTL_SECONDS
+        return self._ttl_seconds
+
+    def key(self, user_id: UUID) -> str:
+        return f"{self.prefix}{user_id}"
+
+    def _get_script(self, client: redis.Redis):
+        if self._script is None or self._script.registered_client is not client:
+            self._script = client.register_script(FAN_OUT_SCRIPT)
+        return self._script
+
+    def fan_out(self, user_ids: Sequence[UUID], entry: TimelineEntry) -> None:
+        """Adds the post to the existing timelines among user_ids, in one round-trip."""
+        if not user_ids:
+            return
+        score, post_id = entry
+        try:
+            client = self._client_factory()
+            with observe_redis("evalsha"):
+                self._get_script(client)(keys=[self.key(user_id) for user_id in user_ids], args=[score, str(post_id), self.max_entries])
+        except redis.RedisError as e:
+            print(f"Timeline fan-out of post {post_id} failed: {e}")
+
+    def remove(self, user_ids: Sequence[UUID], post_ids: Sequence[UUID]) -> None:
+        if not user_ids or not post_ids:
+            return
+        try:
+            pipe = self._client_factory().pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.zrem(self.key(user_id), *[str(post_id) for post_id in post_ids])
+            with observe_redis("pipeline"):
+                pipe.execute()
+        except redis.RedisError as e:
+            print(f"Removing posts {post_ids} from timelines failed: {e}")
+
+    def forget(self, user_id: UUID) -> None:
+        """Drops a timeline so the next read rebuilds it (e.g. after a follow or unfollow)."""
+        try:
+            with observe_redis("delete"):
+                self._client_factory().delete(self.key(user_id))
+        except redis.RedisError as e:
+            print(f"Dropping timeline of {user_id} failed: {e}")
+
+    def replace(self, user_id: UUID, entries: Sequence[TimelineEntry]) -> None:
+        key = self.key(user_id)
+        try:
+            pipe = self._client_factory().pipeline(transaction=True)
+            pipe.delete(key)
+            if entries:
+                pipe.zadd(key, {str(post_id): score for score, post_id in entries[: self.max_entries]})
+                pipe.expire(key, self.ttl_seconds)
+            with observe_redis("pipeline"):
+                pipe.execute()
+        except redis.RedisError as e:
+            print(f"Rebuilding timeline of {user_id} failed: {e}")
+
+    def read(self, user_id: UUID, *, before: Optional[TimelineEntry], limit: int) -> Optional[List[TimelineEntry]]:
+        """
+        Up to `limit` entries older than `before` (all if None), newest first,
+        or None if the timeline does not exist. Refreshes its TTL; one round-trip.
+        """
+        key = self.key(user_id)
+        pipe = self._client_factory().pipeline(transaction=False)
+        pipe.exists(key)
+        if before is None:
+            pipe.zrevrange(key, 0, limit - 1, withscores=True)
+        else:
+            # Strictly older scores, plus ties on the cursor's score (resolved by id below)
+            pipe.zrevrangebyscore(key, f"({before[0]}", "-inf", start=0, num=limit, withscores=True)
+            pipe.zrangebyscore(key, before[0], before[0], withscores=True)
+        pipe.expire(key, self.ttl_seconds)
+        with observe_redis("pipeline"):
+            exists, *ranges, _ = pipe.execute()
+        if not exists:
+            return None
+
+        entries = [(int(score), UUID(member)) for found in ranges for member, score in found]
+        if before is not None:
+            entries = [entry for entry in entries if entry < before]
+        return sorted(entries, reverse=True)[:limit]
+
+timeline_store = TimelineStore(get_sync_redis_client)
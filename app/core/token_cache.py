@@ -0,0 +1,79 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config.settings import get_settings
+from app.core.metrics import Counter, registry
+from app.schemas.token_schema import TokenPayload
+
+class DecodedTokenCache:
+    """
+    Per-worker LRU of tokens that already passed signature and claims
+    checks, so a client reusing its bearer token skips jwt.decode. Entries
+    are keyed by a digest of the token (never the token itself) and expire
+    with the token's exp. Only decoding is cached: callers still check the
+    revocation list on every request.
+    """
+
+    def __init__(self, *, max_entries: Optional[int] = None):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[TokenPayload, int]]" = OrderedDict()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is None:
+            self._max_entries = get_settings().DECODED_TOKEN_CACHE_MAX_ENTRIES
+        return self._max_entries
+
+    @staticmethod
+    def _key(token_type: str, token: str) -> bytes:
+        # The type is part of the key: the same string must not pass as another token type
+        return hashlib.sha256(f"{token_type}:{token}".encode("utf-8")).digest()
+
+    def get(self, token_type: str, token: str) -> Optional[TokenPayload]:
+        if self.max_entries <= 0:
+            return None
+        key = self._key(token_type, token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses.inc()
+            return None
+        claims, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses.inc()
+            return None
+        self._entries.move_to_end(key)
+        self.hits.inc()
+        return claims
+
+    def put(self, token_type: str, token: str, claims: TokenPayload) -> None:
+        if self.max_entries <= 0 or not claims.exp:
+            return
+        key = self._key(token_type, token)
+        self._entries[key] = (claims, claims.exp)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits.value, "misses": self.misses.value, "entries": len(self._entries)}
+
+decoded_token_cache = DecodedTokenCache()
+
+def _decoded_token_cache_metrics():
+    return [
+        ("decoded_token_cache_lookups_total", "counter", "Decoded-token cache lookups by result", [
+            ({"result": "hit"}, decoded_token_cache.hits),
+            ({"result": "miss"}, decoded_token_cache.misses),
+        ]),
+        ("decoded_token_cache_entries", "gauge", "Tokens currently cached", [({}, len(decoded_token_cache._entries))]),
+    ]
+
+registry.add_collector(_decoded_token_cache_metrics)
@@ -0,0 +1,26 @@
+from fastapi import FastAPI
+
+from app.api import health, metrics
+from app.api.v1.router import api_router
+from app.config.settings import get_settings
+from app.core.http_metrics import HTTPMetricsMiddleware
+from app.core.lifespan import lifespan
+from app.core.replicas import ReadYourWritesMiddleware
+from app.core.responses import ORJSONResponse
+from app.core.sql_stats import SQLStatsMiddleware
+
+settings = get_settings()
+
+app = FastAPI(title=settings.PROJECT_NAME, default_response_class=ORJSONResponse, lifespan=lifespan)
+
+if settings.DATABASE_REPLICA_URLS:
+    app.add_middleware(ReadYourWritesMiddleware, window_seconds=settings.DB_READ_YOUR_WRITES_SECONDS)
+
+if settings.SQL_STATS_ENABLED:
+    app.add_middleware(SQLStatsMiddleware)
+
+app.add_middleware(HTTPMetricsMiddleware)
+
+app.include_router(api_router, prefix=settings.API_V1_STR)
+app.include_router(metrics.router)
+app.include_router(health.router)
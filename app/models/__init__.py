@@ -0,0 +1,6 @@
+# Import every table model so SQLAlchemy can resolve string relationship
+# targets (e.g. User.posts -> "Post") no matter which model is imported first.
+from app.models.user_model import User
+from app.models.post_model import Post
+from app.models.refresh_token_model import RefreshToken, RefreshTokenAudit
+from app.models.follow_model import Follow
@@ -0,0 +1,15 @@
+from uuid import UUID
+from app.models.base_model import BaseModel
+from sqlmodel import Field
+from sqlalchemy import Index, UniqueConstraint
+
+class Follow(BaseModel, table=True):
+    """follower_id follows followee_id."""
+    __table_args__ = (
+        # Also serves "who does this user follow" lookups (leftmost column)
+        UniqueConstraint("follower_id", "followee_id", name="uq_follow_follower_id_followee_id"),
+        # Fan-out walks an author's followers in follower_id order
+        Index("ix_follow_followee_id_follower_id", "followee_id", "follower_id"),
+    )
+    follower_id: UUID = Field(foreign_key="user.id", nullable=False)
+    followee_id: UUID = Field(foreign_key="user.id", nullable=False)
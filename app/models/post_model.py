@@ -2,6 +2,7 @@ from typing import Optional, TYPE_CHECKING
 from uuid import UUID
 from app.models.base_model import BaseModel
 from sqlmodel import Field, Relationship
+from sqlalchemy import DDL, Index, event
 
 if TYPE_CHECKING:
     from .user_model import User
@@ -11,7 +12,62 @@ class PostBase(BaseModel):
     content: str = Field(default= None)
     
 class Post(PostBase, table = True):
+    # Keyset pagination seeks on (created_at, id), globally and per owner;
+    # user validators read an owner's latest updated_at
+    __table_args__ = (
+        Index("ix_post_created_at_id", "created_at", "id"),
+        Index("ix_post_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_post_owner_id_updated_at", "owner_id", "updated_at"),
+    )
     owner_id: UUID = Field(foreign_key="user.id", index=True)
     owner: Optional["User"] = Relationship(back_populates="posts")
-    
-    
\ No newline at end of file
+
+# Full-text search index. It lives outside the ORM model so that the same
+# metadata works on Postgres (generated tsvector column + GIN index, also
+# created by the matching Alembic migration) and on SQLite (FTS5 external
+# content table kept in sync by triggers, used by the test suite).
+POST_SEARCH_TEXT_CONFIG = "english"
+POST_SEARCH_VECTOR_COLUMN = "search_vector"
+POST_SEARCH_INDEX = "ix_post_search_vector"
+POST_FTS_TABLE = "post_fts"
+
+POSTGRES_SEARCH_DDL = [
+    f"""
+    ALTER TABLE post ADD COLUMN IF NOT EXISTS {POST_SEARCH_VECTOR_COLUMN} tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{POST_SEARCH_TEXT_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{POST_SEARCH_TEXT_CONFIG}', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS {POST_SEARCH_INDEX} ON post USING GIN ({POST_SEARCH_VECTOR_COLUMN})",
+]
+
+SQLITE_SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {POST_FTS_TABLE} USING fts5(title, content, content='post', content_rowid='rowid')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS post_fts_ai AFTER INSERT ON post BEGIN
+        INSERT INTO {POST_FTS_TABLE}(rowid, title, content) VALUES (new.rowid, new.title, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS post_fts_ad AFTER DELETE ON post BEGIN
+        INSERT INTO {POST_FTS_TABLE}({POST_FTS_TABLE}, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS post_fts_au AFTER UPDATE ON post BEGIN
+        INSERT INTO {POST_FTS_TABLE}({POST_FTS_TABLE}, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+        INSERT INTO {POST_FTS_TABLE}(rowid, title, content) VALUES (new.rowid, new.title, new.content);
+    END
+    """,
+]
+
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Post.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Post.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Post.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {POST_FTS_TABLE}").execute_if(dialect="sqlite"),
+)
@@ -8,11 +8,11 @@ from .base_model import BaseModel
 if TYPE_CHECKING:
     from .user_model import User
     
-class RefreshToken(BaseModel):
+class RefreshTokenBase(BaseModel):
     
     token_hash: str = Field(sa_column=Column(String(128), unique=True, index=True, nullable=False))
     
-    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False, index=True))
     
     is_revoked: bool = Field(default=False, nullable=False)
     
@@ -23,6 +23,19 @@ class RefreshToken(BaseModel):
     
     user_id: UUID = Field(foreign_key="user.id", index=True, nullable=False)
     
-class RefreshToken(RefreshToken, table=True):
+class RefreshToken(RefreshTokenBase, table=True):
     
-    user: Optional["User"] = Relationship(back_populates="refresh_tokens")
\ No newline at end of file
+    user: Optional["User"] = Relationship(back_populates="refresh_tokens")
+class RefreshTokenAudit(BaseModel, table=True):
+    """
+    Append-only history of refresh tokens kept in the Redis session store
+    (issued, rotated, family_revoked, all_revoked). Rows are never updated,
+    and outlive the user on purpose, so there is no foreign key.
+    """
+
+    event: str = Field(max_length=32, nullable=False)
+    token_hash: Optional[str] = Field(default=None, max_length=128)
+    family: Optional[UUID] = Field(default=None, index=True)
+    user_id: UUID = Field(index=True, nullable=False)
+    user_agent: Optional[str] = Field(default=None, max_length=512)
+    ip_address: Optional[str] = Field(default=None, max_length=45)
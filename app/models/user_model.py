@@ -1,6 +1,7 @@
 from typing import List, TYPE_CHECKING
 from app.models.base_model import BaseModel
 from sqlmodel import Field, Relationship
+from sqlalchemy import Index
 
 if TYPE_CHECKING:
     from .post_model import Post
@@ -11,7 +12,15 @@ class UserBase(BaseModel):
     is_active: bool = Field(default=True)
     email: str = Field(unique=True, index=True, max_length=255)
 class User(UserBase, table=True):
+    __table_args__ = (Index("ix_user_created_at_id", "created_at", "id"),)
     hashed_password: str = Field(max_length=255)
-    posts: List["Post"] = Relationship(back_populates="owner", sa_relationship_kwargs={"lazy": "selectin"})
+    # Denormalized COUNT(*) of the user's posts, kept in step by PostRepository
+    # writes; app.tasks.post_count_reconciler repairs any drift
+    post_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Denormalized follower count, kept in step by FollowRepository; decides
+    # whether an author's posts are fanned out to timelines on write
+    follower_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Not eager-loaded: pass repository load options when posts are needed
+    posts: List["Post"] = Relationship(back_populates="owner")
     refresh_tokens: List["RefreshToken"] = Relationship(back_populates="user", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
     
\ No newline at end of file
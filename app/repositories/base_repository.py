@@ -1,33 +1,115 @@
-from typing import Any, Dict, Generic, TypeVar, Type, Optional, List, Union
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Generic, Iterable, Iterator, Mapping, TypeVar, Type, Optional, List, Sequence, Union
+from sqlalchemy import insert
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy.orm.interfaces import ORMOption
 from sqlmodel import SQLModel, select, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import datetime
 from uuid import UUID
 
+from app.config.settings import get_settings
 from app.models.base_model import BaseModel
+from app.utils.pagination import Page, apply_keyset, build_page
 
 ModelType = TypeVar("ModelType", bound=BaseModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=SQLModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=SQLModel)
 
+
+def _stream_statement(model, columns: Sequence[ColumnElement], where: Sequence[ColumnElement], batch_size: int):
+    # Plain column rows, not ORM objects: nothing accumulates in the session while streaming
+    return (
+        select(*columns)
+        .where(*where)
+        .order_by(model.created_at, model.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
 class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         self.model = model
     
-    def get(self, db: Session, id: UUID) -> Optional[ModelType]:
-        return db.get(self.model, id)
+    # `options` are per-query loader options (e.g. selectinload(User.posts));
+    # relationships are only loaded when a caller asks for them.
+    def get(self, db: Session, id: UUID, *, options: Sequence[ORMOption] = ()) -> Optional[ModelType]:
+        return db.get(self.model, id, options=options)
     
+    def get_updated_at(self, db: Session, id: UUID) -> Optional[datetime]:
+        """Narrow (id, updated_at) lookup for cache validators; None when the row does not exist."""
+        statement = select(self.model.updated_at).where(self.model.id == id)
+        return db.exec(statement).first()
+
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self, db: Session, *, skip: int = 0, limit: int = 100, options: Sequence[ORMOption] = ()
     ) -> List[ModelType]:
-        statement = select(self.model).offset(skip).limit(limit)
+        statement = select(self.model).options(*options).offset(skip).limit(limit)
         return db.exec(statement).all()
+
+    def get_page(
+        self, db: Session, *, cursor: Optional[str] = None, limit: int = 100, options: Sequence[ORMOption] = ()
+    ) -> Page[ModelType]:
+        statement = apply_keyset(select(self.model).options(*options), self.model, cursor=cursor, limit=limit)
+        return build_page(db.exec(statement).all(), limit=limit)
     
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-       db_obj = self.model.model_validate(obj_in)
+       # Re-validating a table instance would copy its unloaded relationships as None
+       db_obj = obj_in if isinstance(obj_in, self.model) else self.model.model_validate(obj_in)
        db.add(db_obj)
        db.commit()
        db.refresh(db_obj)
        return db_obj
+
+    def _build_row(self, obj_in: Union[CreateSchemaType, Dict[str, Any]], update: Dict[str, Any]) -> Dict[str, Any]:
+        # Validate through the table model so column defaults (id, timestamps) are filled in
+        return self.model.model_validate(obj_in, update=update).model_dump()
+
+    def _after_insert_rows(self, db: Session, rows: List[Dict[str, Any]]) -> None:
+        """Runs in each create_many batch's transaction, after its INSERT; for keeping derived data in step."""
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Iterable[Union[CreateSchemaType, Dict[str, Any]]],
+        batch_size: Optional[int] = None,
+        update: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """
+        Inserts `objs_in` as multi-row INSERTs, one transaction per batch,
+        without loading the rows back. Returns the number of rows inserted.
+        `objs_in` may be a generator; only one batch is held in memory.
+        """
+        inserted = 0
+        for batch in chunked(objs_in, batch_size or get_settings().BULK_INSERT_BATCH_SIZE):
+            rows = [self._build_row(obj_in, update or {}) for obj_in in batch]
+            db.exec(insert(self.model), params=rows)
+            self._after_insert_rows(db, rows)
+            db.commit()
+            inserted += len(rows)
+        return inserted
     
+    def stream_rows(
+        self,
+        db: Session,
+        *,
+        columns: Sequence[ColumnElement],
+        where: Sequence[ColumnElement] = (),
+        batch_size: Optional[int] = None,
+    ) -> Iterator[Mapping[str, Any]]:
+        """
+        Yields `columns` of every matching row, oldest first, from a
+        server-side cursor (yield_per) so memory stays flat with table size.
+        """
+        statement = _stream_statement(self.model, columns, where, batch_size or get_settings().EXPORT_BATCH_SIZE)
+        for row in db.exec(statement):
+            yield row._mapping
+
     def update(
         self, db: Session, *, db_obj: ModelType, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
@@ -51,4 +133,105 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         if obj:
             db.delete(obj)
             db.commit()
-        return obj
\ No newline at end of file
+        return obj
+
+
+class AsyncBaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType]):
+        self.model = model
+
+    async def get(self, db: AsyncSession, id: UUID, *, options: Sequence[ORMOption] = ()) -> Optional[ModelType]:
+        return await db.get(self.model, id, options=options)
+
+    async def get_updated_at(self, db: AsyncSession, id: UUID) -> Optional[datetime]:
+        statement = select(self.model.updated_at).where(self.model.id == id)
+        result = await db.exec(statement)
+        return result.first()
+
+    async def get_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, options: Sequence[ORMOption] = ()
+    ) -> List[ModelType]:
+        statement = select(self.model).options(*options).offset(skip).limit(limit)
+        result = await db.exec(statement)
+        return result.all()
+
+    async def get_page(
+        self, db: AsyncSession, *, cursor: Optional[str] = None, limit: int = 100, options: Sequence[ORMOption] = ()
+    ) -> Page[ModelType]:
+        statement = apply_keyset(select(self.model).options(*options), self.model, cursor=cursor, limit=limit)
+        result = await db.exec(statement)
+        return build_page(result.all(), limit=limit)
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        db_obj = obj_in if isinstance(obj_in, self.model) else self.model.model_validate(obj_in)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    def _build_row(self, obj_in: Union[CreateSchemaType, Dict[str, Any]], update: Dict[str, Any]) -> Dict[str, Any]:
+        return self.model.model_validate(obj_in, update=update).model_dump()
+
+    async def _build_rows(
+        self, batch: List[Union[CreateSchemaType, Dict[str, Any]]], update: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """One create_many batch's rows; async so overrides can do their I/O for the whole batch at once."""
+        return [self._build_row(obj_in, update) for obj_in in batch]
+
+    async def _after_insert_rows(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+        pass
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Iterable[Union[CreateSchemaType, Dict[str, Any]]],
+        batch_size: Optional[int] = None,
+        update: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        inserted = 0
+        for batch in chunked(objs_in, batch_size or get_settings().BULK_INSERT_BATCH_SIZE):
+            rows = await self._build_rows(batch, update or {})
+            await db.exec(insert(self.model), params=rows)
+            await self._after_insert_rows(db, rows)
+            await db.commit()
+            inserted += len(rows)
+        return inserted
+
+    async def stream_rows(
+        self,
+        db: AsyncSession,
+        *,
+        columns: Sequence[ColumnElement],
+        where: Sequence[ColumnElement] = (),
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[Mapping[str, Any]]:
+        statement = _stream_statement(self.model, columns, where, batch_size or get_settings().EXPORT_BATCH_SIZE)
+        result = await db.stream(statement)
+        async for row in result:
+            yield row._mapping
+
+    async def update(
+        self, db: AsyncSession, *, db_obj: ModelType, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        obj_data = {}
+        if isinstance(obj_in, dict):
+            obj_data = obj_in
+        else:
+            obj_data = obj_in.model_dump(exclude_unset=True)
+        for field, value in obj_data.items():
+            if hasattr(db_obj, field):
+                setattr(db_obj, field, value)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def remove(
+        self, db: AsyncSession, *, id: UUID
+    ) -> Optional[ModelType]:
+        obj = await db.get(self.model, id)
+        if obj:
+            await db.delete(obj)
+            await db.commit()
+        return obj
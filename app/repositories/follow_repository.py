@@ -0,0 +1,64 @@
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, select
+
+from app.models.follow_model import Follow
+from app.models.user_model import User
+from app.repositories.base_repository import BaseRepository
+
+def _adjust_follower_count_statement(followee_id: UUID, delta: int):
+    # Relative UPDATE, like the post counts, so concurrent follows cannot lose increments
+    return update(User).where(User.id == followee_id).values(follower_count=User.follower_count + delta)
+
+class FollowRepository(BaseRepository[Follow, SQLModel, SQLModel]):
+    def follow(self, db: Session, *, follower_id: UUID, followee_id: UUID) -> bool:
+        """Adds the follow and bumps the followee's follower_count; False if it already existed."""
+        try:
+            db.add(Follow(follower_id=follower_id, followee_id=followee_id))
+            # Autoflushes the insert first, so a duplicate fails here before the count moves
+            db.exec(_adjust_follower_count_statement(followee_id, 1))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return False
+        return True
+
+    def unfollow(self, db: Session, *, follower_id: UUID, followee_id: UUID) -> bool:
+        result = db.exec(
+            delete(Follow)
+            .where(Follow.follower_id == follower_id)
+            .where(Follow.followee_id == followee_id)
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            db.rollback()
+            return False
+        db.exec(_adjust_follower_count_statement(followee_id, -1))
+        db.commit()
+        return True
+
+    def get_follower_ids(
+        self, db: Session, *, followee_id: UUID, after: Optional[UUID] = None, limit: int = 1000
+    ) -> List[UUID]:
+        """One batch of followers in follower_id order; pass the last id as `after` for the next."""
+        statement = select(Follow.follower_id).where(Follow.followee_id == followee_id)
+        if after is not None:
+            statement = statement.where(Follow.follower_id > after)
+        return db.exec(statement.order_by(Follow.follower_id).limit(limit)).all()
+
+    def get_followee_ids(
+        self, db: Session, *, follower_id: UUID, min_follower_count: Optional[int] = None, max_follower_count: Optional[int] = None
+    ) -> List[UUID]:
+        """Who follower_id follows, optionally only authors within a follower_count range (bounds inclusive)."""
+        statement = select(Follow.followee_id).where(Follow.follower_id == follower_id)
+        if min_follower_count is not None or max_follower_count is not None:
+            statement = statement.join(User, User.id == Follow.followee_id)
+            if min_follower_count is not None:
+                statement = statement.where(User.follower_count >= min_follower_count)
+            if max_follower_count is not None:
+                statement = statement.where(User.follower_count <= max_follower_count)
+        return db.exec(statement).all()
+
+follow_repo = FollowRepository(Follow)
@@ -1,21 +1,115 @@
-from typing import List, Optional
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 from uuid import UUID
+from sqlalchemy import cast, column, func, literal, literal_column, table, tuple_, update
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm.interfaces import ORMOption
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.models.post_model import Post
+from app.models.user_model import User
+from app.models.post_model import Post, POST_FTS_TABLE, POST_SEARCH_TEXT_CONFIG, POST_SEARCH_VECTOR_COLUMN
 from app.schemas.post_schema import PostCreate, PostUpdate
-from app.repositories.base_repository import BaseRepository
+from app.repositories.base_repository import BaseRepository, AsyncBaseRepository
+from app.utils.pagination import Page, apply_keyset, build_page, build_ranked_page, decode_rank_cursor
+
+# bm25 column weights for (title, content), mirroring the A/B weights of the tsvector
+SQLITE_SEARCH_WEIGHTS = (2.0, 1.0)
+
+# Owner columns for row projections, labeled so they cannot clash with Post's own columns
+OWNER_ROW_PREFIX = "owner__"
+_OWNER_ROW_COLUMNS = [
+    column.label(f"{OWNER_ROW_PREFIX}{column.key}")
+    for column in (User.username, User.email, User.is_active, User.id, User.created_at, User.updated_at, User.post_count)
+]
+
+def _adjust_post_count_statement(owner_id: UUID, delta: int):
+    # Relative UPDATE, so concurrent writers for the same owner cannot lose increments
+    return update(User).where(User.id == owner_id).values(post_count=User.post_count + delta)
+
+def _post_count_deltas(rows: List[Dict[str, Any]]) -> Dict[UUID, int]:
+    return Counter(row["owner_id"] for row in rows)
+
+def _page_rows_statement(*, owner_id: Optional[UUID], cursor: Optional[str], limit: int):
+    statement = select(*Post.__table__.columns, *_OWNER_ROW_COLUMNS).join(User, User.id == Post.owner_id)
+    if owner_id is not None:
+        statement = statement.where(Post.owner_id == owner_id)
+    return apply_keyset(statement, Post, cursor=cursor, limit=limit)
+
+def _fts5_query(query: str) -> str:
+    # Quote every term so user input is matched literally instead of parsed as FTS5 syntax
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+def _ranked_matches(dialect_name: str, query: str):
+    """Subquery of (id, rank) for posts matching `query`, higher rank first."""
+    if dialect_name == "postgresql":
+        tsquery = func.websearch_to_tsquery(cast(literal(POST_SEARCH_TEXT_CONFIG), REGCONFIG), query)
+        search_vector = literal_column(f"post.{POST_SEARCH_VECTOR_COLUMN}")
+        return (
+            select(Post.id, func.ts_rank(search_vector, tsquery).label("rank"))
+            .where(search_vector.op("@@")(tsquery))
+            .subquery("ranked")
+        )
+    if dialect_name == "sqlite":
+        fts = table(POST_FTS_TABLE, column("rowid"))
+        # FTS5 takes the table name itself as the MATCH target and bm25() argument
+        fts_ref = literal_column(POST_FTS_TABLE)
+        return (
+            select(Post.id, (-func.bm25(fts_ref, *SQLITE_SEARCH_WEIGHTS)).label("rank"))
+            .join_from(Post, fts, fts.c.rowid == literal_column("post.rowid"))
+            .where(fts_ref.op("MATCH")(_fts5_query(query)))
+            .subquery("ranked")
+        )
+    raise NotImplementedError(f"Full-text search is not supported on {dialect_name}")
+
+def _search_statement(
+    dialect_name: str, query: str, *, cursor: Optional[str], limit: int, options: Sequence[ORMOption]
+):
+    """
+    Ranked keyset pagination: orders by (rank, id) descending and seeks past
+    the cursor, the same way apply_keyset does for (created_at, id).
+    """
+    ranked = _ranked_matches(dialect_name, query)
+    statement = select(Post, ranked.c.rank).join(ranked, ranked.c.id == Post.id).options(*options)
+    if cursor:
+        rank, last_id = decode_rank_cursor(cursor)
+        statement = statement.where(tuple_(ranked.c.rank, ranked.c.id) < tuple_(rank, last_id))
+    return statement.order_by(ranked.c.rank.desc(), ranked.c.id.desc()).limit(limit + 1)
 
 class PostRepository(BaseRepository[Post, PostCreate, PostUpdate]):
     def create_with_owner(
         self, db: Session, *, obj_in: PostCreate, owner_id: UUID
     ) -> Post:
-        db_obj = Post.model_validate(obj_in, update={"owener_id": owner_id})
+        db_obj = Post.model_validate(obj_in, update={"owner_id": owner_id})
         
         db.add(db_obj)
+        db.exec(_adjust_post_count_statement(owner_id, 1))
         db.commit()
         db.refresh(db_obj)
         return db_obj
+
+    def remove(self, db: Session, *, id: UUID) -> Optional[Post]:
+        obj = db.get(Post, id)
+        if obj:
+            db.delete(obj)
+            db.exec(_adjust_post_count_statement(obj.owner_id, -1))
+            db.commit()
+        return obj
+
+    def _after_insert_rows(self, db: Session, rows: List[Dict[str, Any]]) -> None:
+        for owner_id, delta in _post_count_deltas(rows).items():
+            db.exec(_adjust_post_count_statement(owner_id, delta))
+
+    def create_many_with_owner(
+        self,
+        db: Session,
+        *,
+        objs_in: Iterable[Union[PostCreate, Dict[str, Any]]],
+        owner_id: UUID,
+        batch_size: Optional[int] = None,
+    ) -> int:
+        return self.create_many(db, objs_in=objs_in, batch_size=batch_size, update={"owner_id": owner_id})
     
     def get_multi_by_owner(
         self, db: Session, *, owner_id: UUID, skip: int = 0, limit: int = 100
@@ -28,5 +122,159 @@ class PostRepository(BaseRepository[Post, PostCreate, PostUpdate]):
             .limit(limit)
         )
         return db.exec(statement).all()
+
+    def get_page_by_owner(
+        self,
+        db: Session,
+        *,
+        owner_id: UUID,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        options: Sequence[ORMOption] = (),
+    ) -> Page[Post]:
+        statement = apply_keyset(
+            select(Post).where(Post.owner_id == owner_id).options(*options), Post, cursor=cursor, limit=limit
+        )
+        return build_page(db.exec(statement).all(), limit=limit)
+
+    def get_page_rows(
+        self, db: Session, *, owner_id: Optional[UUID] = None, cursor: Optional[str] = None, limit: int = 100
+    ) -> Page[Any]:
+        """
+        Same page as get_page/get_page_by_owner with the owner joined in, as
+        plain rows rather than ORM objects. Owner columns are prefixed with
+        OWNER_ROW_PREFIX.
+        """
+        statement = _page_rows_statement(owner_id=owner_id, cursor=cursor, limit=limit)
+        return build_page(db.exec(statement).all(), limit=limit)
+
+    def get_recent_ids(
+        self, db: Session, *, owner_ids: Sequence[UUID], cursor: Optional[str] = None, limit: int = 100
+    ) -> List[Tuple[UUID, datetime]]:
+        """
+        (id, created_at) of the newest posts by any of owner_ids, keyset-paged
+        like get_page; up to limit + 1 rows, so callers can tell if more exist.
+        """
+        if not owner_ids:
+            return []
+        statement = apply_keyset(
+            select(Post.id, Post.created_at).where(Post.owner_id.in_(owner_ids)), Post, cursor=cursor, limit=limit
+        )
+        return [tuple(row) for row in db.exec(statement).all()]
+
+    def get_rows_by_ids(self, db: Session, *, ids: Sequence[UUID]) -> List[Any]:
+        """Posts with their owner as get_page_rows rows, in no particular order; missing ids are skipped."""
+        if not ids:
+            return []
+        statement = (
+            select(*Post.__table__.columns, *_OWNER_ROW_COLUMNS)
+            .join(User, User.id == Post.owner_id)
+            .where(Post.id.in_(ids))
+        )
+        return db.exec(statement).all()
+
+    def search(
+        self,
+        db: Session,
+        *,
+        query: str,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        options: Sequence[ORMOption] = (),
+    ) -> Page[Post]:
+        if not query.split():
+            return Page()
+        statement = _search_statement(
+            db.get_bind().dialect.name, query, cursor=cursor, limit=limit, options=options
+        )
+        return build_ranked_page(db.exec(statement).all(), limit=limit)
     
-post_repo = PostRepository(Post)
\ No newline at end of file
+post_repo = PostRepository(Post)
+
+
+class AsyncPostRepository(AsyncBaseRepository[Post, PostCreate, PostUpdate]):
+    async def create_with_owner(
+        self, db: AsyncSession, *, obj_in: PostCreate, owner_id: UUID
+    ) -> Post:
+        db_obj = Post.model_validate(obj_in, update={"owner_id": owner_id})
+
+        db.add(db_obj)
+        await db.exec(_adjust_post_count_statement(owner_id, 1))
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: UUID) -> Optional[Post]:
+        obj = await db.get(Post, id)
+        if obj:
+            await db.delete(obj)
+            await db.exec(_adjust_post_count_statement(obj.owner_id, -1))
+            await db.commit()
+        return obj
+
+    async def _after_insert_rows(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+        for owner_id, delta in _post_count_deltas(rows).items():
+            await db.exec(_adjust_post_count_statement(owner_id, delta))
+
+    async def create_many_with_owner(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Iterable[Union[PostCreate, Dict[str, Any]]],
+        owner_id: UUID,
+        batch_size: Optional[int] = None,
+    ) -> int:
+        return await self.create_many(db, objs_in=objs_in, batch_size=batch_size, update={"owner_id": owner_id})
+
+    async def get_multi_by_owner(
+        self, db: AsyncSession, *, owner_id: UUID, skip: int = 0, limit: int = 100
+    ) -> List[Post]:
+        statement = (
+            select(Post)
+            .where(Post.owner_id == owner_id)
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await db.exec(statement)
+        return result.all()
+
+    async def get_page_by_owner(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: UUID,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        options: Sequence[ORMOption] = (),
+    ) -> Page[Post]:
+        statement = apply_keyset(
+            select(Post).where(Post.owner_id == owner_id).options(*options), Post, cursor=cursor, limit=limit
+        )
+        result = await db.exec(statement)
+        return build_page(result.all(), limit=limit)
+
+    async def get_page_rows(
+        self, db: AsyncSession, *, owner_id: Optional[UUID] = None, cursor: Optional[str] = None, limit: int = 100
+    ) -> Page[Any]:
+        statement = _page_rows_statement(owner_id=owner_id, cursor=cursor, limit=limit)
+        result = await db.exec(statement)
+        return build_page(result.all(), limit=limit)
+
+    async def search(
+        self,
+        db: AsyncSession,
+        *,
+        query: str,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        options: Sequence[ORMOption] = (),
+    ) -> Page[Post]:
+        if not query.split():
+            return Page()
+        statement = _search_statement(
+            db.get_bind().dialect.name, query, cursor=cursor, limit=limit, options=options
+        )
+        result = await db.exec(statement)
+        return build_ranked_page(result.all(), limit=limit)
+
+async_post_repo = AsyncPostRepository(Post)
@@ -0,0 +1,411 @@
+import asyncio
+import math
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, status
+import redis.asyncio as redis
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config.settings import get_settings
+from app.core.database import get_async_session_factory
+from app.core.metrics import registry
+from app.core.redis import observe_redis
+from app.models.refresh_token_model import RefreshToken, RefreshTokenAudit
+from app.repositories.refresh_token_repository import AsyncRefreshTokenRepository, async_refresh_token_repo
+from app.repositories.user_repository import async_user_repo
+
+REFRESH_SESSION_REDIS_PREFIX = "refresh_session:"
+
+refresh_session_audit_events = registry.counter(
+    "refresh_session_audit_events_total",
+    "Refresh token audit events by outcome: written, dropped (queue full), failed (insert error)",
+    labels=("outcome",),
+)
+
+class DatabaseRefreshSessionStore:
+    """
+    Refresh tokens as rows of the refreshtoken table (the default). Revoked
+    rows stay until they expire, which is what lets a replayed token be
+    traced back to its family; token_reaper deletes them afterwards.
+    """
+
+    def __init__(self, repository: AsyncRefreshTokenRepository = async_refresh_token_repo):
+        self.repository = repository
+
+    async def save(
+        self,
+        db: AsyncSession,
+        *,
+        redis_client: redis.Redis,
+        user_id: UUID,
+        token_hash: str,
+        expires_at: datetime,
+        family: Optional[UUID] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> RefreshToken:
+        # Kiểm tra xem hash này đã tồn tại chưa (để tránh lỗi unique constraint)
+        existing_token = await self.repository.get_by_token_hash(db, token_hash=token_hash)
+        if existing_token:
+            print(f"Warning: Refresh token hash {token_hash} already exists in DB.")
+            if existing_token.user_id == user_id and not existing_token.is_revoked:
+                print(f"Updating existing refresh token {existing_token.id} for user {user_id}")
+                existing_token.updated_at = datetime.now(timezone.utc)
+                return await self.repository.update(db, db_obj=existing_token, obj_in={"expires_at": expires_at})
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Refresh token hash conflict")
+
+        created_token = await self.repository.create(db, obj_in=RefreshToken(
+            user_id=user_id,
+            token_hash=token_hash,
+            expires_at=expires_at,
+            family=family,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            is_revoked=False,
+        ))
+        print(f"Refresh token for user {user_id} (ID: {created_token.id}) stored in DB.")
+        return created_token
+
+    async def get(self, db: AsyncSession, *, redis_client: redis.Redis, token_hash: str) -> Optional[RefreshToken]:
+        return await self.repository.get_by_token_hash(db, token_hash=token_hash)
+
+    async def rotate(
+        self,
+        db: AsyncSession,
+        *,
+        redis_client: redis.Redis,
+        token_hash: str,
+        user_id: UUID,
+        new_token_hash: str,
+        new_expires_at: datetime,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> Optional[RefreshToken]:
+        return await self.repository.rotate(
+            db,
+            token_hash=token_hash,
+            user_id=user_id,
+            new_token_hash=new_token_hash,
+            new_expires_at=new_expires_at,
+            ip_address=ip_address,
+            user_agent=user_agent,
+        )
+
+    async def revoke_family(
+        self, db: AsyncSession, *, redis_client: redis.Redis, user_id: UUID, family_id: UUID, except_token_hash: Optional[str] = None
+    ) -> int:
+        return await self.repository.revoke_family(db, user_id=user_id, family_id=family_id, except_token_hash=except_token_hash)
+
+    async def revoke_all_for_user(
+        self, db: AsyncSession, *, redis_client: redis.Redis, user_id: UUID, except_token_hash: Optional[str] = None
+    ) -> int:
+        return await self.repository.revoke_all_for_user(db, user_id=user_id, except_token_hash=except_token_hash)
+
+@dataclass(frozen=True)
+class RefreshSession:
+    """A refresh token as stored in Redis; same attributes as the RefreshToken row."""
+
+    token_hash: str
+    user_id: UUID
+    family: Optional[UUID]
+    expires_at: datetime
+    is_revoked: bool
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+
+# Layout, under the store prefix:
+#   token:<hash>    hash: user_id, family ("" if none), expires_at (unix s), revoked ("0"/"1"),
+#                   ip_address, user_agent; expires with the token, revoked or not, so a
+#                   replay is still traced to its family
+#   family:<family> set of token hashes (tokens without a family: family:none:<user_id>)
+#   user:<user_id>  set of the user's family set names
+# Sets live as long as their longest-lived member. Every script gets the
+# prefix as ARGV[1] and derives its keys from it, so the store needs a single
+# Redis instance (not Cluster).
+_SESSION_LUA_FUNCTIONS = """
+local function extend(key, ttl)
+    if redis.call('TTL', key) < ttl then
+        redis.call('EXPIRE', key, ttl)
+    end
+end
+
+local function add_token(prefix, hash, user_id, family, expires_at, ttl, ip_address, user_agent)
+    ttl = tonumber(ttl)
+    local key = prefix .. 'token:' .. hash
+    redis.call('HSET', key, 'user_id', user_id, 'family', family, 'expires_at', expires_at, 'revoked', '0',
+        'ip_address', ip_address, 'user_agent', user_agent)
+    redis.call('EXPIRE', key, ttl)
+    local family_set = family
+    if family_set == '' then
+        family_set = 'none:' .. user_id
+    end
+    redis.call('SADD', prefix .. 'family:' .. family_set, hash)
+    extend(prefix .. 'family:' .. family_set, ttl)
+    redis.call('SADD', prefix .. 'user:' .. user_id, family_set)
+    extend(prefix .. 'user:' .. user_id, ttl)
+end
+
+local function revoke_family(prefix, user_id, family_set, except_hash)
+    local family_key = prefix .. 'family:' .. family_set
+    local revoked = 0
+    for _, hash in ipairs(redis.call('SMEMBERS', family_key)) do
+        local key = prefix .. 'token:' .. hash
+        local token = redis.call('HMGET', key, 'user_id', 'revoked')
+        if not token[1] then
+            redis.call('SREM', family_key, hash)
+        elseif hash ~= except_hash and token[1] == user_id and token[2] == '0' then
+            redis.call('HSET', key, 'revoked', '1')
+            revoked = revoked + 1
+        end
+    end
+    return revoked
+end
+"""
+
+# ARGV: prefix, hash, user_id, family, expires_at, ttl, ip_address, user_agent.
+# Returns 0 if the hash is already stored.
+_SAVE_SCRIPT = _SESSION_LUA_FUNCTIONS + """
+if redis.call('EXISTS', ARGV[1] .. 'token:' .. ARGV[2]) == 1 then
+    return 0
+end
+add_token(ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5], ARGV[6], ARGV[7], ARGV[8])
+return 1
+"""
+
+# Claims the old token (active, this user's, not expired) and adds the new one
+# to its family in one step, so of several concurrent refreshes with the same
+# token exactly one succeeds. ARGV: prefix, old hash, user_id, now, family for
+# an old token without one, new hash, expires_at, ttl, ip_address, user_agent.
+# Returns the new token's family, or false if the old token was not claimed.
+_ROTATE_SCRIPT = _SESSION_LUA_FUNCTIONS + """
+local key = ARGV[1] .. 'token:' .. ARGV[2]
+local token = redis.call('HMGET', key, 'user_id', 'family', 'expires_at', 'revoked')
+if token[1] ~= ARGV[3] or token[4] ~= '0' or tonumber(token[3]) <= tonumber(ARGV[4]) then
+    return false
+end
+redis.call('HSET', key, 'revoked', '1')
+local family = token[2]
+if family == '' then
+    family = ARGV[5]
+end
+add_token(ARGV[1], ARGV[6], ARGV[3], family, ARGV[7], ARGV[8], ARGV[9], ARGV[10])
+return family
+"""
+
+# ARGV: prefix, user_id, family, except hash. Returns the number revoked.
+_REVOKE_FAMILY_SCRIPT = _SESSION_LUA_FUNCTIONS + """
+return revoke_family(ARGV[1], ARGV[2], ARGV[3], ARGV[4])
+"""
+
+# ARGV: prefix, user_id, except hash. Returns the number revoked.
+_REVOKE_ALL_SCRIPT = _SESSION_LUA_FUNCTIONS + """
+local revoked = 0
+for _, family_set in ipairs(redis.call('SMEMBERS', ARGV[1] .. 'user:' .. ARGV[2])) do
+    revoked = revoked + revoke_family(ARGV[1], ARGV[2], family_set, ARGV[3])
+end
+return revoked
+"""
+
+class RefreshTokenAuditWriter:
+    """
+    Buffers audit events and inserts them in batches from a background task
+    (run), so recording one never waits on the database. Events beyond
+    max_pending are dropped and counted; a failed batch is logged and lost.
+    """
+
+    def __init__(self, *, session_factory: Callable[[], AsyncSession], batch_size: Optional[int] = None,
+                 max_pending: Optional[int] = None, flush_seconds: Optional[float] = None):
+        self.session_factory = session_factory
+        self._batch_size = batch_size
+        self._max_pending = max_pending
+        self._flush_seconds = flush_seconds
+        self._pending: "deque[RefreshTokenAudit]" = deque()
+
+    @property
+    def batch_size(self) -> int:
+        if self._batch_size is None:
+            self._batch_size = get_settings().REFRESH_SESSION_AUDIT_BATCH_SIZE
+        return self._batch_size
+
+    @property
+    def max_pending(self) -> int:
+        if self._max_pending is None:
+            self._max_pending = get_settings().REFRESH_SESSION_AUDIT_MAX_PENDING
+        return self._max_pending
+
+    @property
+    def flush_seconds(self) -> float:
+        if self._flush_seconds is None:
+            self._flush_seconds = get_settings().REFRESH_SESSION_AUDIT_FLUSH_SECONDS
+        return self._flush_seconds
+
+    def record(self, event: str, *, user_id: UUID, token_hash: Optional[str] = None, family: Optional[UUID] = None,
+               ip_address: Optional[str] = None, user_agent: Optional[str] = None) -> None:
+        if len(self._pending) >= self.max_pending:
+            refresh_session_audit_events.labels("dropped").inc()
+            return
+        self._pending.append(RefreshTokenAudit(
+            event=event, user_id=user_id, token_hash=token_hash, family=family, ip_address=ip_address, user_agent=user_agent,
+        ))
+
+    async def flush(self) -> int:
+        """Writes everything pending, one batch per transaction; returns the number of rows written."""
+        written = 0
+        while self._pending:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            try:
+                async with self.session_factory() as session:
+                    session.add_all(batch)
+                    await session.commit()
+            except Exception as e:
+                print(f"Failed to write {len(batch)} refresh token audit rows: {e}")
+                refresh_session_audit_events.labels("failed").inc(len(batch))
+                continue
+            refresh_session_audit_events.labels("written").inc(len(batch))
+            written += len(batch)
+        return written
+
+    async def run(self) -> None:
+        """Long-running task: flushes every flush_seconds, and once more when cancelled."""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_seconds)
+                await self.flush()
+        finally:
+            await asyncio.shield(self.flush())
+
+class RedisRefreshSessionStore:
+    """
+    Refresh tokens in Redis (see the layout above), expiring natively with
+    the tokens, so rotations do not write to Postgres. Claims, family and
+    user revocation run as Lua scripts: one round-trip each, atomic against
+    concurrent refreshes. Reuse detection works as with the database store:
+    a rotated token stays stored, revoked, until it expires.
+    """
+
+    def __init__(self, *, prefix: str = REFRESH_SESSION_REDIS_PREFIX, user_repository=async_user_repo,
+                 audit: Optional[RefreshTokenAuditWriter] = None):
+        self.prefix = prefix
+        self.user_repository = user_repository
+        self.audit = audit
+        self._scripts = {}
+
+    async def _run(self, redis_client: redis.Redis, name: str, script: str, args: list):
+        registered = self._scripts.get(name)
+        if registered is None or registered.registered_client is not redis_client:
+            registered = self._scripts[name] = redis_client.register_script(script)
+        with observe_redis(f"refresh_session_{name}"):
+            return await registered(keys=[], args=[self.prefix, *args])
+
+    def _record(self, event: str, **fields) -> None:
+        if self.audit is not None:
+            self.audit.record(event, **fields)
+
+    @staticmethod
+    def _ttl(expires_at: datetime) -> int:
+        return math.ceil(expires_at.timestamp() - datetime.now(timezone.utc).timestamp())
+
+    async def save(
+        self,
+        db: AsyncSession,
+        *,
+        redis_client: redis.Redis,
+        user_id: UUID,
+        token_hash: str,
+        expires_at: datetime,
+        family: Optional[UUID] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> RefreshSession:
+        session = RefreshSession(token_hash, user_id, family, expires_at, False, ip_address, user_agent)
+        ttl = self._ttl(expires_at)
+        if ttl <= 0:
+            return session  # already expired: the database store's row would never validate either
+        saved = await self._run(redis_client, "save", _SAVE_SCRIPT, [
+            token_hash, str(user_id), str(family or ""), int(expires_at.timestamp()), ttl, ip_address or "", user_agent or "",
+        ])
+        if not saved:
+            # Only reachable on a SHA-256 collision: tokens are unique (random jti) and stored once
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Refresh token hash conflict")
+        self._record("issued", user_id=user_id, token_hash=token_hash, family=family, ip_address=ip_address, user_agent=user_agent)
+        return session
+
+    async def get(self, db: AsyncSession, *, redis_client: redis.Redis, token_hash: str) -> Optional[RefreshSession]:
+        with observe_redis("hgetall"):
+            fields = await redis_client.hgetall(f"{self.prefix}token:{token_hash}")
+        if not fields:
+            return None
+        return RefreshSession(
+            token_hash=token_hash,
+            user_id=UUID(fields["user_id"]),
+            family=UUID(fields["family"]) if fields["family"] else None,
+            expires_at=datetime.fromtimestamp(int(fields["expires_at"]), tz=timezone.utc),
+            is_revoked=fields["revoked"] == "1",
+            ip_address=fields["ip_address"] or None,
+            user_agent=fields["user_agent"] or None,
+        )
+
+    async def rotate(
+        self,
+        db: AsyncSession,
+        *,
+        redis_client: redis.Redis,
+        token_hash: str,
+        user_id: UUID,
+        new_token_hash: str,
+        new_expires_at: datetime,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> Optional[RefreshSession]:
+        # Like the database claim, an inactive user's token is neither claimed nor rotated
+        user = await self.user_repository.get(db, user_id)
+        if user is None or not user.is_active:
+            return None
+        family = await self._run(redis_client, "rotate", _ROTATE_SCRIPT, [
+            token_hash, str(user_id), int(datetime.now(timezone.utc).timestamp()), str(uuid4()),
+            new_token_hash, int(new_expires_at.timestamp()), max(1, self._ttl(new_expires_at)),
+            ip_address or "", user_agent or "",
+        ])
+        if not family:
+            return None
+        family = UUID(family)
+        self._record("rotated", user_id=user_id, token_hash=new_token_hash, family=family, ip_address=ip_address, user_agent=user_agent)
+        return RefreshSession(new_token_hash, user_id, family, new_expires_at, False, ip_address, user_agent)
+
+    async def revoke_family(
+        self, db: AsyncSession, *, redis_client: redis.Redis, user_id: UUID, family_id: UUID, except_token_hash: Optional[str] = None
+    ) -> int:
+        if not family_id:
+            return 0
+        revoked = await self._run(redis_client, "revoke_family", _REVOKE_FAMILY_SCRIPT, [
+            str(user_id), str(family_id), except_token_hash or "",
+        ])
+        self._record("family_revoked", user_id=user_id, family=family_id)
+        return int(revoked)
+
+    async def revoke_all_for_user(
+        self, db: AsyncSession, *, redis_client: redis.Redis, user_id: UUID, except_token_hash: Optional[str] = None
+    ) -> int:
+        revoked = await self._run(redis_client, "revoke_all", _REVOKE_ALL_SCRIPT, [str(user_id), except_token_hash or ""])
+        self._record("all_revoked", user_id=user_id)
+        return int(revoked)
+
+refresh_session_audit = RefreshTokenAuditWriter(session_factory=lambda: get_async_session_factory()())
+
+def audit_enabled() -> bool:
+    """Whether the app lifespan must run refresh_session_audit."""
+    settings = get_settings()
+    return settings.REFRESH_SESSION_STORE == "redis" and settings.REFRESH_SESSION_AUDIT_ENABLED
+
+def create_refresh_session_store():
+    """The store selected by REFRESH_SESSION_STORE."""
+    settings = get_settings()
+    if settings.REFRESH_SESSION_STORE == "database":
+        return DatabaseRefreshSessionStore()
+    if settings.REFRESH_SESSION_STORE == "redis":
+        return RedisRefreshSessionStore(audit=refresh_session_audit if audit_enabled() else None)
+    raise ValueError(f"Unknown refresh session store: {settings.REFRESH_SESSION_STORE}")
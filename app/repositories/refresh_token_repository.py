@@ -1,12 +1,66 @@
+import asyncio
+import time
 from typing import Optional, List
-from uuid import UUID
+from uuid import UUID, uuid4
+from sqlalchemy import delete, update
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timezone
 
 from app.models.refresh_token_model import RefreshToken
+from app.models.user_model import User
 # RefreshTokenCreate có thể là RefreshTokenBase hoặc một schema Pydantic riêng nếu cần
 from app.models.refresh_token_model import RefreshTokenBase as RefreshTokenCreateSchema
-from app.repositories.base_repository import BaseRepository
+from app.repositories.base_repository import BaseRepository, AsyncBaseRepository
+
+def _revoke_all_for_user_statement(user_id: UUID, except_token_hash: Optional[str]):
+    now = datetime.now(timezone.utc)
+    statement = (
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id)
+        .where(RefreshToken.is_revoked == False)
+        .where(RefreshToken.expires_at > now)
+        .values(is_revoked=True, updated_at=now)
+        # "fetch" keeps already-loaded instances in sync without evaluating
+        # the datetime criteria in Python
+        .execution_options(synchronize_session="fetch")
+    )
+    if except_token_hash:
+        statement = statement.where(RefreshToken.token_hash != except_token_hash)
+    return statement
+
+def _revoke_family_statement(user_id: UUID, family_id: UUID, except_token_hash: Optional[str]):
+    # Thu hồi cả token đã hết hạn trong family
+    statement = (
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id)
+        .where(RefreshToken.family == family_id)
+        .where(RefreshToken.is_revoked == False)
+        .values(is_revoked=True, updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session="fetch")
+    )
+    if except_token_hash: # Nếu đang tạo token mới trong family này, không thu hồi nó
+        statement = statement.where(RefreshToken.token_hash != except_token_hash)
+    return statement
+
+def _delete_expired_statement():
+    return (
+        delete(RefreshToken)
+        .where(RefreshToken.expires_at <= datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+
+def _delete_expired_batch_statement(batch_size: int):
+    batch_ids = (
+        select(RefreshToken.id)
+        .where(RefreshToken.expires_at <= datetime.now(timezone.utc))
+        .limit(batch_size)
+    )
+    return (
+        delete(RefreshToken)
+        .where(RefreshToken.id.in_(batch_ids))
+        .execution_options(synchronize_session=False)
+    )
 
 class RefreshTokenRepository(BaseRepository[RefreshToken, RefreshTokenCreateSchema, RefreshTokenCreateSchema]):
     # Lưu ý: UpdateSchemaType ở đây có thể giống CreateSchemaType nếu bạn không có schema update riêng
@@ -61,27 +115,9 @@ class RefreshTokenRepository(BaseRepository[RefreshToken, RefreshTokenCreateSche
         ngoại trừ một token_hash nhất định (nếu được cung cấp, ví dụ token hiện tại).
         Trả về số lượng token đã bị thu hồi.
         """
-        query = (
-            select(RefreshToken)
-            .where(RefreshToken.user_id == user_id)
-            .where(RefreshToken.is_revoked == False)
-            .where(RefreshToken.expires_at > datetime.now(timezone.utc))
-        )
-        if except_token_hash:
-            query = query.where(RefreshToken.token_hash != except_token_hash)
-
-        tokens_to_revoke = db.exec(query).all()
-        count = 0
-        for token in tokens_to_revoke:
-            token.is_revoked = True
-            token.updated_at = datetime.now(timezone.utc)
-            db.add(token)
-            count += 1
-
-        if count > 0:
-            db.commit()
-            # Không cần refresh từng cái, chỉ cần commit là đủ
-        return count
+        result = db.exec(_revoke_all_for_user_statement(user_id, except_token_hash))
+        db.commit()
+        return result.rowcount
 
     def revoke_family(self, db: Session, *, user_id: UUID, family_id: UUID, except_token_hash: Optional[str] = None) -> int:
         """
@@ -91,50 +127,161 @@ class RefreshTokenRepository(BaseRepository[RefreshToken, RefreshTokenCreateSche
         if not family_id:
             return 0
 
-        query = (
+        result = db.exec(_revoke_family_statement(user_id, family_id, except_token_hash))
+        db.commit()
+        return result.rowcount
+
+    def delete_expired_tokens(self, db: Session) -> int:
+        """
+        Xóa tất cả RefreshToken đã hết hạn bằng một câu DELETE duy nhất.
+        Token bị thu hồi nhưng chưa hết hạn được giữ lại để còn phát hiện token bị dùng lại.
+        Với bảng lớn nên dùng delete_expired_tokens_in_batches.
+        """
+        result = db.exec(_delete_expired_statement())
+        db.commit()
+        return result.rowcount
+
+    def delete_expired_tokens_in_batches(
+        self, db: Session, *, batch_size: int = 1000, pause_seconds: float = 0.0
+    ) -> int:
+        """
+        Xóa token hết hạn theo từng lô, commit sau mỗi lô và nghỉ pause_seconds giữa các lô,
+        để không giữ lock lâu và không tạo một transaction WAL khổng lồ.
+        """
+        total = 0
+        while True:
+            result = db.exec(_delete_expired_batch_statement(batch_size))
+            db.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                return total
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)
+
+
+# Tạo instance của repository
+refresh_token_repo = RefreshTokenRepository(RefreshToken)
+
+
+class AsyncRefreshTokenRepository(AsyncBaseRepository[RefreshToken, RefreshTokenCreateSchema, RefreshTokenCreateSchema]):
+    """
+    Phiên bản async của RefreshTokenRepository, dùng với AsyncSession
+    để các luồng xác thực async không chặn event loop.
+    """
+
+    async def get_by_token_hash(self, db: AsyncSession, *, token_hash: str) -> Optional[RefreshToken]:
+        statement = select(RefreshToken).where(RefreshToken.token_hash == token_hash)
+        result = await db.exec(statement)
+        return result.first()
+
+    async def get_active_by_token_hash_and_user(
+        self, db: AsyncSession, *, token_hash: str, user_id: UUID
+    ) -> Optional[RefreshToken]:
+        statement = (
             select(RefreshToken)
+            .where(RefreshToken.token_hash == token_hash)
             .where(RefreshToken.user_id == user_id)
-            .where(RefreshToken.family == family_id)
             .where(RefreshToken.is_revoked == False)
-            # .where(RefreshToken.expires_at > datetime.now(timezone.utc)) # Có thể thu hồi cả token đã hết hạn trong family
+            .where(RefreshToken.expires_at > datetime.now(timezone.utc))
         )
-        if except_token_hash: # Nếu đang tạo token mới trong family này, không thu hồi nó
-             query = query.where(RefreshToken.token_hash != except_token_hash)
-
-        tokens_to_revoke = db.exec(query).all()
-        count = 0
-        for token in tokens_to_revoke:
-            token.is_revoked = True
-            token.updated_at = datetime.now(timezone.utc)
-            db.add(token)
-            count += 1
-
-        if count > 0:
-            db.commit()
-        return count
+        result = await db.exec(statement)
+        return result.first()
 
+    async def mark_as_revoked(self, db: AsyncSession, *, token_id: Optional[UUID] = None, token_hash: Optional[str] = None) -> Optional[RefreshToken]:
+        if not token_id and not token_hash:
+            return None
 
-    def delete_expired_tokens(self, db: Session) -> int:
+        token_to_revoke: Optional[RefreshToken] = None
+        if token_id:
+            token_to_revoke = await self.get(db, id=token_id)
+        elif token_hash:
+            token_to_revoke = await self.get_by_token_hash(db, token_hash=token_hash)
+
+        if token_to_revoke and not token_to_revoke.is_revoked:
+            token_to_revoke.is_revoked = True
+            token_to_revoke.updated_at = datetime.now(timezone.utc)
+            db.add(token_to_revoke)
+            await db.commit()
+            await db.refresh(token_to_revoke)
+        return token_to_revoke
+
+    async def rotate(
+        self,
+        db: AsyncSession,
+        *,
+        token_hash: str,
+        user_id: UUID,
+        new_token_hash: str,
+        new_expires_at: datetime,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> Optional[RefreshToken]:
         """
-        Xóa các RefreshToken đã hết hạn hoặc đã bị thu hồi quá lâu.
-        Hàm này có thể được gọi bởi một cron job.
+        Thu hồi token cũ và lưu token mới (cùng family) trong một transaction duy nhất.
+        UPDATE ... RETURNING vừa kiểm tra vừa "chiếm" token cũ, nên khi nhiều request
+        refresh cùng một token chạy đồng thời, chỉ đúng một request nhận được dòng trả về.
+        Trả về None nếu token không hợp lệ (đã thu hồi, hết hạn, sai user hoặc user bị khóa).
         """
-        # Ví dụ: Xóa các token đã hết hạn
-        expired_tokens_query = select(RefreshToken).where(RefreshToken.expires_at <= datetime.now(timezone.utc))
-        expired_tokens = db.exec(expired_tokens_query).all()
+        now = datetime.now(timezone.utc)
+        claim_statement = (
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == token_hash)
+            .where(RefreshToken.user_id == user_id)
+            .where(RefreshToken.is_revoked == False)
+            .where(RefreshToken.expires_at > now)
+            .where(RefreshToken.user_id == User.id)
+            .where(User.is_active == True)
+            .values(is_revoked=True, updated_at=now)
+            .returning(RefreshToken.family)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = (await db.exec(claim_statement)).first()
+        if claimed is None:
+            await db.rollback()
+            return None
 
-        # Hoặc xóa các token đã bị thu hồi và đã cũ (ví dụ: thu hồi hơn 30 ngày trước)
-        # old_revoked_tokens_query = select(RefreshToken).where(RefreshToken.is_revoked == True).where(RefreshToken.updated_at < some_past_date)
-        # old_revoked_tokens = db.exec(old_revoked_tokens_query).all()
+        new_token = RefreshToken(
+            user_id=user_id,
+            token_hash=new_token_hash,
+            expires_at=new_expires_at,
+            family=claimed.family or uuid4(),
+            ip_address=ip_address,
+            user_agent=user_agent,
+            is_revoked=False,
+        )
+        db.add(new_token)
+        await db.commit()
+        return new_token
 
-        count = 0
-        for token in expired_tokens: # Thay bằng list token bạn muốn xóa
-            db.delete(token)
-            count += 1
+    async def revoke_all_for_user(self, db: AsyncSession, *, user_id: UUID, except_token_hash: Optional[str] = None) -> int:
+        result = await db.exec(_revoke_all_for_user_statement(user_id, except_token_hash))
+        await db.commit()
+        return result.rowcount
 
-        if count > 0:
-            db.commit()
-        return count
+    async def revoke_family(self, db: AsyncSession, *, user_id: UUID, family_id: UUID, except_token_hash: Optional[str] = None) -> int:
+        if not family_id:
+            return 0
 
-# Tạo instance của repository
-refresh_token_repo = RefreshTokenRepository(RefreshToken)
\ No newline at end of file
+        result = await db.exec(_revoke_family_statement(user_id, family_id, except_token_hash))
+        await db.commit()
+        return result.rowcount
+
+    async def delete_expired_tokens(self, db: AsyncSession) -> int:
+        result = await db.exec(_delete_expired_statement())
+        await db.commit()
+        return result.rowcount
+
+    async def delete_expired_tokens_in_batches(
+        self, db: AsyncSession, *, batch_size: int = 1000, pause_seconds: float = 0.0
+    ) -> int:
+        total = 0
+        while True:
+            result = await db.exec(_delete_expired_batch_statement(batch_size))
+            await db.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                return total
+            if pause_seconds > 0:
+                await asyncio.sleep(pause_seconds)
+
+async_refresh_token_repo = AsyncRefreshTokenRepository(RefreshToken)
@@ -1,21 +1,59 @@
-from typing import Optional, Dict, Any, Union
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Sequence, Tuple, Union
 from uuid import UUID
+from sqlalchemy import delete, func, or_, update
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import ORMOption
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.models.follow_model import Follow
+from app.models.post_model import Post
+from app.models.refresh_token_model import RefreshToken
 from app.models.user_model import User
 from app.schemas.user_schema import UserCreate, UserUpdate
-from app.repositories.base_repository import BaseRepository
-from app.core.security import get_password_hash
+from app.repositories.base_repository import BaseRepository, AsyncBaseRepository
+from app.core.security import get_password_hash, get_password_hash_async, get_password_hashes_async
+
+# Opt-in eager load of all of a user's posts. Responses should prefer a paged
+# PostRepository query (see UserService.get_user_with_posts).
+WITH_POSTS = (selectinload(User.posts),)
+
+def _reconcile_post_counts_statement(user_ids: Sequence[UUID]):
+    actual = select(func.count()).select_from(Post).where(Post.owner_id == User.id).scalar_subquery()
+    return (
+        update(User)
+        .where(User.id.in_(user_ids))
+        .where(User.post_count != actual)
+        .values(post_count=actual)
+        .execution_options(synchronize_session=False)
+    )
 
 class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
-    def get_by_username(self, db: Session, *, username: str) -> Optional[User]:
-        statement = select(User).where(User.username == username)
+    def get_by_username(
+        self, db: Session, *, username: str, options: Sequence[ORMOption] = ()
+    ) -> Optional[User]:
+        statement = select(User).where(User.username == username).options(*options)
         return db.exec(statement).first()
     
-    def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
-        statement = select(User).where(User.email == email)
+    def get_by_email(
+        self, db: Session, *, email: str, options: Sequence[ORMOption] = ()
+    ) -> Optional[User]:
+        statement = select(User).where(User.email == email).options(*options)
         return db.exec(statement).first()
     
+    def get_validator_fields(self, db: Session, *, id: UUID) -> Optional[Tuple[datetime, int, Optional[datetime]]]:
+        """
+        (updated_at, post_count, latest post updated_at) of one user in one
+        statement; None when the user does not exist. The latest post is a
+        single probe of ix_post_owner_id_updated_at, so no posts are counted.
+        """
+        posts_updated_at = select(func.max(Post.updated_at)).where(Post.owner_id == User.id).scalar_subquery()
+        statement = select(User.updated_at, User.post_count, posts_updated_at).where(User.id == id)
+        row = db.exec(statement).first()
+        return tuple(row) if row else None
+
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
         
         user_data_for_model = obj_in.model_dump(exclude={"password"})
@@ -46,5 +84,116 @@ class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
             del update_data["password"]
         
         return super().update(db, db_obj=db_obj, obj_in=update_data)
+
+    def remove(self, db: Session, *, id: UUID) -> Optional[User]:
+        """Deletes the user with their posts, follows and refresh tokens, in one transaction."""
+        user = db.get(User, id)
+        if not user:
+            return None
+        followees = select(Follow.followee_id).where(Follow.follower_id == id)
+        db.exec(
+            update(User)
+            .where(User.id.in_(followees))
+            .values(follower_count=User.follower_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+        for statement in (
+            delete(Follow).where(or_(Follow.follower_id == id, Follow.followee_id == id)),
+            delete(Post).where(Post.owner_id == id),
+            delete(RefreshToken).where(RefreshToken.user_id == id),
+        ):
+            db.exec(statement.execution_options(synchronize_session=False))
+        db.delete(user)
+        db.commit()
+        return user
+
+    def reconcile_post_counts(self, db: Session, *, batch_size: int = 1000, pause_seconds: float = 0.0) -> int:
+        """
+        Recounts User.post_count from the post table, walking users by id in
+        batches of batch_size with one short transaction each. Only drifted
+        rows are written. Returns the number of users repaired.
+        """
+        repaired = 0
+        last_id: Optional[UUID] = None
+        while True:
+            statement = select(User.id).order_by(User.id).limit(batch_size)
+            if last_id is not None:
+                statement = statement.where(User.id > last_id)
+            user_ids = db.exec(statement).all()
+            if not user_ids:
+                return repaired
+            result = db.exec(_reconcile_post_counts_statement(user_ids))
+            db.commit()
+            repaired += result.rowcount
+            if len(user_ids) < batch_size:
+                return repaired
+            last_id = user_ids[-1]
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)
+
+    def _build_row(self, obj_in: Union[UserCreate, Dict[str, Any]], update: Dict[str, Any]) -> Dict[str, Any]:
+        if isinstance(obj_in, dict):
+            obj_in = UserCreate.model_validate(obj_in)
+        hashed_password = get_password_hash(obj_in.password)
+        return super()._build_row(
+            obj_in.model_dump(exclude={"password"}), {**update, "hashed_password": hashed_password}
+        )
     
-user_repo = UserRepository(User)
\ No newline at end of file
+user_repo = UserRepository(User)
+
+
+class AsyncUserRepository(AsyncBaseRepository[User, UserCreate, UserUpdate]):
+    async def get_by_username(
+        self, db: AsyncSession, *, username: str, options: Sequence[ORMOption] = ()
+    ) -> Optional[User]:
+        statement = select(User).where(User.username == username).options(*options)
+        result = await db.exec(statement)
+        return result.first()
+
+    async def get_by_email(
+        self, db: AsyncSession, *, email: str, options: Sequence[ORMOption] = ()
+    ) -> Optional[User]:
+        statement = select(User).where(User.email == email).options(*options)
+        result = await db.exec(statement)
+        return result.first()
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+        user_data_for_model = obj_in.model_dump(exclude={"password"})
+        hashed_password = await get_password_hash_async(obj_in.password)
+        db_obj = User(**user_data_for_model, hashed_password=hashed_password)
+
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> User:
+        update_data = {}
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+
+        if "password" in update_data and update_data["password"]:
+            hashed_password = await get_password_hash_async(update_data["password"])
+            db_obj.hashed_password = hashed_password
+            del update_data["password"]
+
+        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+
+    async def _build_rows(self, batch: List[Union[UserCreate, Dict[str, Any]]], update: Dict[str, Any]) -> List[Dict[str, Any]]:
+        users_in = [UserCreate.model_validate(obj_in) if isinstance(obj_in, dict) else obj_in for obj_in in batch]
+        # The whole batch is hashed concurrently on the hasher pool, not row by row
+        hashed_passwords = await get_password_hashes_async([user_in.password for user_in in users_in])
+        return [
+            self._build_row(user_in.model_dump(exclude={"password"}), {**update, "hashed_password": hashed_password})
+            for user_in, hashed_password in zip(users_in, hashed_passwords)
+        ]
+
+async_user_repo = AsyncUserRepository(User)
@@ -1,25 +1,85 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing import List, Optional, TYPE_CHECKING
+from typing_extensions import TypedDict
 from uuid import UUID
 from datetime import datetime
 
-from .user_schema import UserResponse
+if TYPE_CHECKING:
+    from .user_schema import UserResponse
 
 class PostBase(BaseModel):
-    title: str
+    title: str = Field(max_length=200)
     content: Optional[str] = None
     
 class PostCreate(PostBase):
     pass
 
 class PostUpdate(PostBase):
-    title: Optional[str] = None
+    title: Optional[str] = Field(default=None, max_length=200)
     content: Optional[str] = None
     
+class PostSummaryResponse(PostBase):
+    id: UUID
+    created_at: datetime
+    updated_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
 class PostResponse(PostBase):
     id: UUID
     created_at: datetime
     updated_at: datetime
     owner_id: UUID
-    owner: Optional[UserResponse] = None
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    owner: Optional["UserResponse"] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class PostPageResponse(BaseModel):
+    items: List[PostResponse] = []
+    next_cursor: Optional[str] = None
+
+# Plain-dict mirrors of PostPageResponse for the fast list path: rows projected
+# straight from SQL are serialized by a precompiled adapter, skipping ORM
+# objects and model validation. Keys are emitted in insertion order, which the
+# projection keeps identical to the model's field order.
+class PostOwnerRow(TypedDict):
+    username: str
+    email: str
+    is_active: bool
+    id: UUID
+    created_at: datetime
+    updated_at: datetime
+    post_count: int
+
+class PostRow(TypedDict):
+    title: str
+    content: Optional[str]
+    id: UUID
+    created_at: datetime
+    updated_at: datetime
+    owner_id: UUID
+    owner: Optional[PostOwnerRow]
+
+class PostPageRows(TypedDict):
+    items: List[PostRow]
+    next_cursor: Optional[str]
+
+post_page_rows_adapter = TypeAdapter(PostPageRows)
+
+class PostImportError(BaseModel):
+    line: int
+    error: str
+
+class PostImportBatchResult(BaseModel):
+    batch: int
+    first_line: int
+    last_line: int
+    inserted: int = 0
+    errors: List[PostImportError] = []
+
+class PostImportResponse(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    batches: List[PostImportBatchResult] = []
+
+from .user_schema import UserResponse  # noqa: E402
+
+PostResponse.model_rebuild()
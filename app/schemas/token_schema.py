@@ -11,3 +11,7 @@ class TokenPayload(BaseModel):
     jti: Optional[str] = None
     exp: Optional[int] = None
     type: Optional[str] = None
+    fam: Optional[str] = None  # refresh-token family; absent on tokens issued before it was added
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
@@ -1,14 +1,15 @@
 from pydantic import BaseModel, ConfigDict, EmailStr
-from typing import Optional, List
+from typing import Optional, List, TYPE_CHECKING
 from uuid import UUID
 from datetime import datetime
 
-from app.schemas.post_schema import PostResponse
+if TYPE_CHECKING:
+    from app.schemas.post_schema import PostSummaryResponse
 
 class UserBase(BaseModel):
     username: str
     email: EmailStr
-    is_active: bool
+    is_active: bool = True
     
 class UserCreate(UserBase):
     password: str
@@ -23,5 +24,14 @@ class UserResponse(UserBase):
     id: UUID
     created_at: datetime
     updated_at: datetime
-    posts: List["PostResponse"] = [] # Sử dụng forward reference string "PostResponse"
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    post_count: int = 0
+    model_config = ConfigDict(from_attributes=True)
+
+class UserWithPostsResponse(UserResponse):
+    # Một trang bài viết của user; dùng posts_next_cursor để lấy trang tiếp theo
+    posts: List["PostSummaryResponse"] = [] # Sử dụng forward reference string "PostSummaryResponse"
+    posts_next_cursor: Optional[str] = None
+
+from app.schemas.post_schema import PostSummaryResponse  # noqa: E402
+
+UserWithPostsResponse.model_rebuild()
@@ -1,58 +1,458 @@
+import hashlib
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
 from uuid import UUID
 from fastapi import HTTPException, status
+from pydantic import ValidationError
+import redis
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
+from app.config.settings import get_settings
+from app.core.cache import ReadThroughCache
+from app.core.metrics import registry
+from app.core.redis import get_sync_redis_client
+from app.core.replicas import primary_session
+from app.core.timeline import TimelineEntry, TimelineStore, score_datetime, timeline_reads, timeline_score, timeline_store
 from app.models.post_model import Post
 from app.models.user_model import User
-from app.repositories.post_repository import post_repo
-from app.schemas.post_schema import PostCreate
+from app.repositories.follow_repository import follow_repo
+from app.repositories.post_repository import OWNER_ROW_PREFIX, async_post_repo, post_repo
+from app.repositories.user_repository import user_repo
+from app.schemas.post_schema import (
+    PostCreate,
+    PostImportBatchResult,
+    PostImportError,
+    PostImportResponse,
+    PostPageResponse,
+    PostResponse,
+    PostRow,
+    post_page_rows_adapter,
+)
+from app.schemas.user_schema import UserResponse
+from app.utils.export import ExportFormat, encode_rows
+from app.utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+# PostResponse embeds the owner; load it in the same query instead of once per post
+WITH_OWNER = (joinedload(Post.owner),)
+
+# Columns written by exports; the same fields as PostResponse without the owner object
+EXPORT_COLUMNS = (Post.id, Post.owner_id, Post.title, Post.content, Post.created_at, Post.updated_at)
+
+# Field order of the JSON documents; projected rows follow the response models exactly
+POST_ROW_FIELDS = tuple(field for field in PostResponse.model_fields if field != "owner")
+OWNER_ROW_FIELDS = tuple(UserResponse.model_fields)
+
+def project_post_row(row) -> PostRow:
+    """Shapes a get_page_rows row like PostResponse without building ORM objects or models."""
+    mapping = row._mapping
+    post = {field: mapping[field] for field in POST_ROW_FIELDS}
+    post["owner"] = {field: mapping[OWNER_ROW_PREFIX + field] for field in OWNER_ROW_FIELDS}
+    return post
+
+@lru_cache()
+def get_post_cache() -> Optional[ReadThroughCache]:
+    """The shared post cache, or None when POST_CACHE_ENABLED is off."""
+    settings = get_settings()
+    if not settings.POST_CACHE_ENABLED:
+        return None
+    return ReadThroughCache(
+        get_sync_redis_client,
+        namespace="posts",
+        l1_max_entries=settings.POST_CACHE_L1_MAX_ENTRIES,
+        l1_ttl_seconds=settings.POST_CACHE_L1_TTL_SECONDS,
+    )
+
+# Default for PostService(cache=...): get_post_cache(), resolved on first use
+_SHARED_CACHE: Any = object()
 
 class PostService:
-    def __init__(self, repository=post_repo):
+    def __init__(
+        self,
+        repository=post_repo,
+        cache: Optional[ReadThroughCache] = _SHARED_CACHE,
+        async_repository=async_post_repo,
+        follow_repository=follow_repo,
+        timelines: Optional[TimelineStore] = timeline_store,
+        user_repository=user_repo,
+    ):
         self.repository = repository
-        
-    def get_post_by_id(self, db: Session, post_id: UUID) -> Post:
-        post = self.repository.get(db, id=post_id)
-        
+        self.async_repository = async_repository
+        self.user_repository = user_repository
+        self._cache = cache
+        self.follow_repository = follow_repository
+        self.timelines = timelines
+
+    @property
+    def cache(self) -> Optional[ReadThroughCache]:
+        if self._cache is _SHARED_CACHE:
+            self._cache = get_post_cache()
+        return self._cache
+
+    @cache.setter
+    def cache(self, cache: Optional[ReadThroughCache]) -> None:
+        self._cache = cache
+
+    def _post_key(self, post_id: UUID) -> str:
+        return self.cache.key("item", post_id)
+
+    def _owner_key(self, owner_id: UUID) -> str:
+        return self.cache.key("owner", owner_id, "item")
+
+    def _list_version_key(self) -> str:
+        return self.cache.key("list", "version")
+
+    def _owner_version_key(self, owner_id: UUID) -> str:
+        return self.cache.key("owner", owner_id, "version")
+
+    def _invalidate(self, post: Post, *, item: bool = False, owner: bool = False) -> None:
+        if self.cache is None:
+            return
+        keys = [self._post_key(post.id)] if item else []
+        if owner:
+            keys.append(self._owner_key(post.owner_id))
+        self.cache.invalidate(
+            keys=keys,
+            bump_versions=[self._list_version_key(), self._owner_version_key(post.owner_id)],
+        )
+
+    def invalidate_owner(self, owner_id: UUID) -> None:
+        """
+        Drops everything that embeds the owner: their cached UserResponse and,
+        through the version bumps, every cached page. Call after the user
+        changes, including their post_count.
+        """
+        if self.cache is None:
+            return
+        self.cache.invalidate(
+            keys=[self._owner_key(owner_id)],
+            bump_versions=[self._list_version_key(), self._owner_version_key(owner_id)],
+        )
+
+    def _get_post_or_404(self, db: Session, post_id: UUID) -> Post:
+        post = self.repository.get(db, id=post_id, options=WITH_OWNER)
+
         if not post:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
         return post
-    
-    def get_posts(self, db: Session, skip: int = 0, limit: int = 100) -> list[Post]:
-        return self.repository.get_multi(db, skip=skip, limit=limit)
-    
+
+    def _load_page(self, load) -> str:
+        try:
+            page = load()
+        except InvalidCursorError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+        return PostPageResponse(
+            items=[PostResponse.model_validate(post) for post in page.items],
+            next_cursor=page.next_cursor,
+        ).model_dump_json()
+
+    def get_post_by_id(self, db: Session, post_id: UUID) -> PostResponse:
+        """
+        Posts and their owners are cached apart, so that owner changes (a new
+        username, another post) only drop the one owner entry instead of
+        every cached post embedding it. Like every cache fill here, misses
+        are loaded from the primary, never from a possibly lagging replica.
+        """
+        if self.cache is None:
+            return PostResponse.model_validate(self._get_post_or_404(db, post_id))
+
+        def load_post() -> str:
+            post = self.repository.get(primary_session(db), id=post_id)
+            if not post:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+            # Without the owner, and without touching post.owner (a lazy load)
+            return PostResponse.model_validate({field: getattr(post, field) for field in POST_ROW_FIELDS}).model_dump_json()
+
+        post = PostResponse.model_validate_json(
+            self.cache.get_or_load(self._post_key(post_id), load_post, get_settings().POST_CACHE_TTL_SECONDS)
+        )
+
+        def load_owner() -> str:
+            owner = self.user_repository.get(primary_session(db), id=post.owner_id)
+            if not owner:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+            return UserResponse.model_validate(owner).model_dump_json()
+
+        post.owner = UserResponse.model_validate_json(
+            self.cache.get_or_load(self._owner_key(post.owner_id), load_owner, get_settings().POST_CACHE_TTL_SECONDS)
+        )
+        return post
+
+    def _load_page_rows(self, db: Session, *, owner_id: Optional[UUID], cursor: Optional[str], limit: int) -> str:
+        try:
+            page = self.repository.get_page_rows(db, owner_id=owner_id, cursor=cursor, limit=limit)
+        except InvalidCursorError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+        return post_page_rows_adapter.dump_json(
+            {"items": [project_post_row(row) for row in page.items], "next_cursor": page.next_cursor}
+        ).decode("utf-8")
+
+    def get_posts_json(self, db: Session, *, cursor: Optional[str] = None, limit: int = 100) -> str:
+        """A PostPageResponse as a JSON document, ready to be sent as-is."""
+        def load() -> str:
+            return self._load_page_rows(primary_session(db), owner_id=None, cursor=cursor, limit=limit)
+
+        if self.cache is None:
+            return self._load_page_rows(db, owner_id=None, cursor=cursor, limit=limit)
+        version = self.cache.version(self._list_version_key())
+        key = self.cache.key("list", f"v{version}", cursor or "-", limit)
+        return self.cache.get_or_load(key, load, get_settings().POST_LIST_CACHE_TTL_SECONDS)
+
+    def get_posts(self, db: Session, *, cursor: Optional[str] = None, limit: int = 100) -> PostPageResponse:
+        return PostPageResponse.model_validate_json(self.get_posts_json(db, cursor=cursor, limit=limit))
+
+    def get_posts_by_owner_json(
+        self, db: Session, *, owner_id: UUID, cursor: Optional[str] = None, limit: int = 100
+    ) -> str:
+        def load() -> str:
+            return self._load_page_rows(primary_session(db), owner_id=owner_id, cursor=cursor, limit=limit)
+
+        if self.cache is None:
+            return self._load_page_rows(db, owner_id=owner_id, cursor=cursor, limit=limit)
+        version = self.cache.version(self._owner_version_key(owner_id))
+        key = self.cache.key("owner", owner_id, f"v{version}", cursor or "-", limit)
+        return self.cache.get_or_load(key, load, get_settings().POST_LIST_CACHE_TTL_SECONDS)
+
     def get_posts_by_owner(
-        self, db: Session, *, owner_id: UUID, skip: int = 0, limit: int = 100
-    ) -> list[Post]:
-        return self.repository.get_multi_by_owner(db, owner_id=owner_id, skip=skip, limit=limit)
-    
+        self, db: Session, *, owner_id: UUID, cursor: Optional[str] = None, limit: int = 100
+    ) -> PostPageResponse:
+        return PostPageResponse.model_validate_json(
+            self.get_posts_by_owner_json(db, owner_id=owner_id, cursor=cursor, limit=limit)
+        )
+
+    def search_posts(
+        self, db: Session, *, query: str, cursor: Optional[str] = None, limit: int = 20
+    ) -> PostPageResponse:
+        def load(session: Session) -> str:
+            return self._load_page(
+                lambda: self.repository.search(session, query=query, cursor=cursor, limit=limit, options=WITH_OWNER)
+            )
+
+        if self.cache is None:
+            return PostPageResponse.model_validate_json(load(db))
+        # Every write bumps the list version, which also retires cached search results
+        version = self.cache.version(self._list_version_key())
+        query_digest = hashlib.sha1(" ".join(query.lower().split()).encode("utf-8")).hexdigest()
+        key = self.cache.key("search", f"v{version}", query_digest, cursor or "-", limit)
+        payload = self.cache.get_or_load(key, lambda: load(primary_session(db)), get_settings().POST_LIST_CACHE_TTL_SECONDS)
+        return PostPageResponse.model_validate_json(payload)
+
+    def _fans_out(self, author: User) -> bool:
+        # Authors above the limit are pulled into timelines at read time instead
+        return self.timelines is not None and 0 < author.follower_count <= get_settings().TIMELINE_FANOUT_MAX_FOLLOWERS
+
+    def _follower_batches(self, db: Session, author_id: UUID) -> Iterator[List[UUID]]:
+        batch_size = get_settings().TIMELINE_FANOUT_BATCH_SIZE
+        after = None
+        while True:
+            batch = self.follow_repository.get_follower_ids(db, followee_id=author_id, after=after, limit=batch_size)
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+            after = batch[-1]
+
+    def _rebuild_timeline(self, db: Session, user_id: UUID) -> List[TimelineEntry]:
+        # Stored for days and only patched by fan-out from then on, so built from the primary
+        db = primary_session(db)
+        settings = get_settings()
+        authors = self.follow_repository.get_followee_ids(
+            db, follower_id=user_id, max_follower_count=settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+        )
+        rows = self.repository.get_recent_ids(db, owner_ids=authors, limit=settings.TIMELINE_MAX_ENTRIES)
+        entries = [(timeline_score(created_at), post_id) for post_id, created_at in rows[: settings.TIMELINE_MAX_ENTRIES]]
+        self.timelines.replace(user_id, entries)
+        return entries
+
+    def _cached_timeline(
+        self, db: Session, user_id: UUID, *, before: Optional[TimelineEntry], limit: int
+    ) -> Tuple[str, Optional[List[TimelineEntry]]]:
+        if self.timelines is None:
+            return "database", None
+        try:
+            entries = self.timelines.read(user_id, before=before, limit=limit)
+        except redis.RedisError as e:
+            print(f"Timeline of {user_id} unavailable, reading followed authors from the database: {e}")
+            return "database", None
+        if entries is not None:
+            return "cached", entries
+        entries = [entry for entry in self._rebuild_timeline(db, user_id) if before is None or entry < before]
+        return "rebuilt", entries[:limit]
+
+    def get_timeline_json(self, db: Session, *, user_id: UUID, cursor: Optional[str] = None, limit: int = 20) -> str:
+        """
+        The newest posts by authors user_id follows, as a PostPageResponse
+        JSON document. Post ids come from the user's Redis timeline, merged
+        with the recent posts of followed authors too big to fan out; the
+        page is then loaded in one query. Without Redis every followed author
+        is read from the database.
+        """
+        try:
+            position = decode_cursor(cursor) if cursor else None
+        except InvalidCursorError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+        before = (timeline_score(position[0]), position[1]) if position else None
+
+        source, cached = self._cached_timeline(db, user_id, before=before, limit=limit + 1)
+        pulled_authors = self.follow_repository.get_followee_ids(
+            db,
+            follower_id=user_id,
+            min_follower_count=None if cached is None else get_settings().TIMELINE_FANOUT_MAX_FOLLOWERS + 1,
+        )
+        pulled = self.repository.get_recent_ids(db, owner_ids=pulled_authors, cursor=cursor, limit=limit)
+        timeline_reads.labels(source).inc()
+
+        entries = sorted(
+            set(cached or ()) | {(timeline_score(created_at), post_id) for post_id, created_at in pulled}, reverse=True
+        )
+        page = entries[:limit]
+        rows = {row.id: row for row in self.repository.get_rows_by_ids(db, ids=[post_id for _, post_id in page])}
+        deleted = [post_id for _, post_id in page if post_id not in rows]
+        if deleted and self.timelines is not None:
+            # Left behind when the author stopped fanning out before deleting; clean up lazily
+            self.timelines.remove([user_id], deleted)
+
+        next_cursor = None
+        if len(entries) > limit and page:
+            next_cursor = encode_cursor(score_datetime(page[-1][0]), page[-1][1])
+        return post_page_rows_adapter.dump_json({
+            "items": [project_post_row(rows[post_id]) for _, post_id in page if post_id in rows],
+            "next_cursor": next_cursor,
+        }).decode("utf-8")
+
     def create_post(
         self, db: Session, *, post_in: PostCreate, current_user: User
     ) -> Post:
         new_post = self.repository.create_with_owner(db, obj_in=post_in, owner_id=current_user.id)
+        # The owner's post_count changed
+        self._invalidate(new_post, owner=True)
+        if self._fans_out(current_user):
+            entry = (timeline_score(new_post.created_at), new_post.id)
+            for follower_ids in self._follower_batches(db, current_user.id):
+                self.timelines.fan_out(follower_ids, entry)
         return new_post
-    
+
     def update_post(
         self, db: Session, *, post_id_to_update: UUID, post_in: PostCreate, current_user: User
     ) -> Post:
-        db_post_to_update = self.get_post_by_id(db, post_id=post_id_to_update)
-        if not db_post_to_update:
+        db_post_to_update = self._get_post_or_404(db, post_id=post_id_to_update)
+        if db_post_to_update.owner_id != current_user.id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions to update this post")
-        
+
         updated_post = self.repository.update(db, db_obj=db_post_to_update, obj_in=post_in)
+        self._invalidate(updated_post, item=True)
         return updated_post
-    
+
     def delete_post(
         self, db: Session, *, post_id_to_delete: UUID, current_user: User
     ) -> Post:
-        db_post_to_delete = self.get_post_by_id(db, post_id=post_id_to_delete)
-        
+        db_post_to_delete = self._get_post_or_404(db, post_id=post_id_to_delete)
+
         if db_post_to_delete.owner_id != current_user.id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions to delete this post")
-        
+
         deleted_post_data = self.repository.remove(db, id=post_id_to_delete)
         if not deleted_post_data:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to delete post")
+        self._invalidate(deleted_post_data, item=True, owner=True)
+        if self._fans_out(current_user):
+            for follower_ids in self._follower_batches(db, current_user.id):
+                self.timelines.remove(follower_ids, [deleted_post_data.id])
         return deleted_post_data
-    
-post_service = PostService()
\ No newline at end of file
+
+    async def _insert_import_batch(
+        self, db: AsyncSession, *, batch: PostImportBatchResult, posts_in: List[PostCreate], owner_id: UUID
+    ) -> None:
+        if not posts_in:
+            return
+        try:
+            batch.inserted = await self.async_repository.create_many_with_owner(
+                db, objs_in=posts_in, owner_id=owner_id, batch_size=len(posts_in)
+            )
+        except SQLAlchemyError as e:
+            await db.rollback()
+            batch.errors.append(
+                PostImportError(line=batch.first_line, error=f"Batch insert failed: {e.__class__.__name__}")
+            )
+
+    async def import_posts(
+        self,
+        db: AsyncSession,
+        *,
+        lines: AsyncIterator[Tuple[int, Optional[bytes]]],
+        current_user: User,
+        batch_size: Optional[int] = None,
+    ) -> PostImportResponse:
+        """
+        Imports NDJSON post lines as they arrive, inserting every `batch_size`
+        input lines in one transaction. Invalid lines are reported and skipped;
+        a failed insert fails only its own batch.
+        """
+        batch_size = batch_size or get_settings().BULK_INSERT_BATCH_SIZE
+        report = PostImportResponse()
+        batch: Optional[PostImportBatchResult] = None
+        posts_in: List[PostCreate] = []
+
+        async def flush() -> None:
+            invalid_lines = len(batch.errors)
+            await self._insert_import_batch(db, batch=batch, posts_in=posts_in, owner_id=current_user.id)
+            report.batches.append(batch)
+            report.inserted += batch.inserted
+            report.failed += invalid_lines + len(posts_in) - batch.inserted
+            posts_in.clear()
+
+        async for line_number, line in lines:
+            if batch is None:
+                batch = PostImportBatchResult(batch=len(report.batches) + 1, first_line=line_number, last_line=line_number)
+            batch.last_line = line_number
+
+            if line is None:
+                batch.errors.append(PostImportError(line=line_number, error="Line is too long"))
+            else:
+                try:
+                    posts_in.append(PostCreate.model_validate_json(line))
+                except ValidationError as e:
+                    error = e.errors()[0]
+                    location = ".".join(str(part) for part in error["loc"])
+                    message = f"{location}: {error['msg']}" if location else error["msg"]
+                    batch.errors.append(PostImportError(line=line_number, error=message))
+
+            if batch.last_line - batch.first_line + 1 >= batch_size:
+                await flush()
+                batch = None
+
+        if batch is not None:
+            await flush()
+        if report.inserted:
+            await run_in_threadpool(self.invalidate_owner, current_user.id)
+        return report
+
+    def export_posts(
+        self, db: AsyncSession, *, format: ExportFormat, owner_id: Optional[UUID] = None
+    ) -> AsyncIterator[bytes]:
+        rows = self.async_repository.stream_rows(
+            db,
+            columns=EXPORT_COLUMNS,
+            where=[Post.owner_id == owner_id] if owner_id else [],
+        )
+        return encode_rows(rows, fields=[column.key for column in EXPORT_COLUMNS], format=format)
+
+post_service = PostService()
+
+def _post_cache_metrics():
+    cache = post_service.cache
+    if cache is None:
+        return []
+    return [
+        ("post_cache_lookups_total", "counter", "Post cache lookups by the tier that answered", [
+            ({"result": "l1_hit"}, cache.l1_hits),
+            ({"result": "hit"}, cache.hits),
+            ({"result": "miss"}, cache.misses),
+        ]),
+        ("post_cache_errors_total", "counter", "Redis errors the post cache fell back from", [({}, cache.errors)]),
+    ]
+
+registry.add_collector(_post_cache_metrics)
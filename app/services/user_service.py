@@ -1,16 +1,41 @@
-from typing import List, Optional, Dict, Any, Union
+from typing import AsyncIterator, List, Optional, Dict, Any, Union
 from uuid import UUID
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException, status
 
-from app.repositories.user_repository import user_repo
-from app.schemas.user_schema import UserCreate, UserUpdate, UserResponse
+from app.core.timeline import TimelineStore, timeline_store
+from app.repositories.follow_repository import follow_repo
+from app.repositories.user_repository import async_user_repo, user_repo
+from app.schemas.user_schema import UserCreate, UserUpdate, UserResponse, UserWithPostsResponse
+from app.schemas.post_schema import PostSummaryResponse
+from app.repositories.post_repository import post_repo
+from app.services.post_service import post_service
 from app.models.user_model import User
-from app.core.security import verify_password
+from app.core.security import verify_password, verify_password_async
+from app.utils.conditional import Validators, make_validators
+from app.utils.export import ExportFormat, encode_rows
+from app.utils.pagination import Page, InvalidCursorError
+
+# Columns written by exports; never includes hashed_password
+EXPORT_COLUMNS = (User.id, User.username, User.email, User.is_active, User.created_at, User.updated_at)
 
 class UserService:
-    def __init__(self, repository=user_repo):
+    def __init__(
+        self,
+        repository=user_repo,
+        post_repository=post_repo,
+        async_repository=async_user_repo,
+        follow_repository=follow_repo,
+        timelines: Optional[TimelineStore] = timeline_store,
+        posts=post_service,
+    ):
         self.repository = repository
+        self.async_repository = async_repository
+        self.post_repository = post_repository
+        self.follow_repository = follow_repository
+        self.timelines = timelines
+        self.posts = posts
         
     def get_user_by_id(self, db: Session, user_id: UUID) -> Optional[User]:
         return self.repository.get(db, id=user_id)
@@ -22,9 +47,46 @@ class UserService:
         return self.repository.get_by_email(db, email=email)
     
     def get_users(
-        self, db: Session, *, skip: int = 0, limit: int = 100
-    ) -> List[User]:
-        return self.repository.get_multi(db, skip=skip, limit=limit)
+        self, db: Session, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> Page[User]:
+        try:
+            return self.repository.get_page(db, cursor=cursor, limit=limit)
+        except InvalidCursorError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+    
+    def get_user_validators(self, db: Session, user_id: UUID) -> Validators:
+        """
+        Validators for get_user_with_posts. The response includes a page of
+        posts, so the owner's post count and latest post change are mixed in;
+        the ETag is weak because it does not hash the body itself.
+        """
+        fields = self.repository.get_validator_fields(db, id=user_id)
+        if fields is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        updated_at, post_count, posts_updated_at = fields
+        return make_validators(
+            user_id, updated_at, post_count, posts_updated_at, timestamps=[updated_at, posts_updated_at], weak=True
+        )
+    
+    def get_user_with_posts(
+        self, db: Session, *, user_id: UUID, posts_cursor: Optional[str] = None, posts_limit: int = 20
+    ) -> UserWithPostsResponse:
+        """User kèm theo một trang bài viết, thay vì nạp toàn bộ User.posts."""
+        user = self.repository.get(db, id=user_id)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        try:
+            posts_page = self.post_repository.get_page_by_owner(
+                db, owner_id=user_id, cursor=posts_cursor, limit=posts_limit
+            )
+        except InvalidCursorError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+        # Không validate trực tiếp từ `user`: from_attributes sẽ đọc (và lazy load) toàn bộ User.posts
+        return UserWithPostsResponse(
+            **UserResponse.model_validate(user).model_dump(),
+            posts=[PostSummaryResponse.model_validate(post) for post in posts_page.items],
+            posts_next_cursor=posts_page.next_cursor,
+        )
     
     def create_user(self, db: Session, *, user_in: UserCreate) -> User:
         existing_user_by_username = self.repository.get_by_username(db, username=user_in.username)
@@ -69,8 +131,38 @@ class UserService:
                 )
         
         updated_user = self.repository.update(db, db_obj=db_user_to_update, obj_in=user_in)
+        # Cached posts and pages embed the user
+        self.posts.invalidate_owner(updated_user.id)
         return updated_user
     
+    def delete_user(self, db: Session, *, user_id_to_delete: UUID, current_user: User) -> User:
+        db_user_to_delete = self.repository.get(db, id=user_id_to_delete)
+        if not db_user_to_delete:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        if db_user_to_delete.id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+
+        deleted_user = self.repository.remove(db, id=user_id_to_delete)
+        # Their posts are gone from every cached page; cached single posts 404 once the owner entry is dropped
+        self.posts.invalidate_owner(deleted_user.id)
+        if self.timelines is not None:
+            self.timelines.forget(deleted_user.id)
+        return deleted_user
+
+    def follow_user(self, db: Session, *, followee_id: UUID, current_user: User) -> None:
+        if followee_id == current_user.id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Users cannot follow themselves")
+        if not self.repository.get(db, id=followee_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        # The cached timeline lacks the new author's posts; rebuild it on the next read
+        if self.follow_repository.follow(db, follower_id=current_user.id, followee_id=followee_id) and self.timelines is not None:
+            self.timelines.forget(current_user.id)
+
+    def unfollow_user(self, db: Session, *, followee_id: UUID, current_user: User) -> None:
+        if self.follow_repository.unfollow(db, follower_id=current_user.id, followee_id=followee_id) and self.timelines is not None:
+            self.timelines.forget(current_user.id)
+
     def authenticate_user(
         self, db: Session, *, username: str, password_in: str
     ) -> Optional[User]:
@@ -83,4 +175,18 @@ class UserService:
             return None
         return user
     
+    async def authenticate_user_async(
+        self, db: AsyncSession, *, username: str, password_in: str
+    ) -> Optional[User]:
+        user = await self.async_repository.get_by_username(db, username=username)
+        if not user or not user.is_active:
+            return None
+        if not await verify_password_async(password_in, user.hashed_password):
+            return None
+        return user
+    
+    def export_users(self, db: AsyncSession, *, format: ExportFormat) -> AsyncIterator[bytes]:
+        rows = self.async_repository.stream_rows(db, columns=EXPORT_COLUMNS)
+        return encode_rows(rows, fields=[column.key for column in EXPORT_COLUMNS], format=format)
+    
 user_service = UserService()
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""
+Repairs drift in the denormalized User.post_count, in bounded batches.
+
+Run it after bulk data fixes, or from cron as a safety net:
+
+    python -m app.tasks.post_count_reconciler --batch-size 1000 --pause 0.1
+"""
+import argparse
+
+from sqlmodel import Session
+
+from app.config.settings import get_settings
+from app.core.database import get_engine
+from app.repositories.user_repository import user_repo
+
+def run(batch_size: int, pause_seconds: float) -> int:
+    with Session(get_engine()) as session:
+        return user_repo.reconcile_post_counts(session, batch_size=batch_size, pause_seconds=pause_seconds)
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Recount User.post_count from the post table in batches")
+    parser.add_argument("--batch-size", type=int, default=settings.POST_COUNT_RECONCILE_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=settings.POST_COUNT_RECONCILE_PAUSE_SECONDS,
+                        help="seconds to sleep between batches")
+    args = parser.parse_args()
+
+    repaired = run(args.batch_size, args.pause)
+    print(f"Repaired post_count for {repaired} users")
+
+if __name__ == "__main__":
+    main()
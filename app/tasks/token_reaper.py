@@ -0,0 +1,34 @@
+"""
+Purges expired refresh tokens in bounded batches.
+
+Run it from cron or a scheduled job:
+
+    python -m app.tasks.token_reaper --batch-size 1000 --pause 0.1
+"""
+import argparse
+
+from sqlmodel import Session
+
+from app.config.settings import get_settings
+from app.core.database import get_engine
+from app.repositories.refresh_token_repository import refresh_token_repo
+
+def run(batch_size: int, pause_seconds: float) -> int:
+    with Session(get_engine()) as session:
+        return refresh_token_repo.delete_expired_tokens_in_batches(
+            session, batch_size=batch_size, pause_seconds=pause_seconds
+        )
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Delete expired refresh tokens in batches")
+    parser.add_argument("--batch-size", type=int, default=settings.REFRESH_TOKEN_PURGE_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=settings.REFRESH_TOKEN_PURGE_PAUSE_SECONDS,
+                        help="seconds to sleep between batches")
+    args = parser.parse_args()
+
+    deleted = run(args.batch_size, args.pause)
+    print(f"Deleted {deleted} expired refresh tokens")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Mapping, Optional, Union
+
+from fastapi import Response, status
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: Optional[datetime] = None
+
+    def headers(self) -> dict:
+        headers = {"ETag": self.etag}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def apply(self, response: Response) -> None:
+        response.headers.update(self.headers())
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamps are stored naive; they are treated as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def make_validators(*parts: object, timestamps: Iterable[Optional[datetime]], weak: bool = False) -> Validators:
+    """
+    Validators derived from identifiers and updated_at values only, so they can
+    be computed from a narrow query without loading or serializing the resource.
+    """
+    timestamps = [_as_utc(ts) for ts in timestamps if ts is not None]
+    digest = hashlib.sha1(
+        "|".join(str(_as_utc(p).isoformat() if isinstance(p, datetime) else p) for p in parts).encode("utf-8")
+    ).hexdigest()
+    etag = f'W/"{digest}"' if weak else f'"{digest}"'
+    return Validators(etag=etag, last_modified=max(timestamps).replace(microsecond=0) if timestamps else None)
+
+def collection_validators(items: Iterable[object], *extra: object) -> Validators:
+    """Weak validators for a page of items that each have `id` and `updated_at`."""
+    items = list(items)
+    parts = [f"{item.id}@{_as_utc(item.updated_at).isoformat()}" for item in items]
+    return make_validators(*parts, *extra, timestamps=[item.updated_at for item in items], weak=True)
+
+def body_validators(body: Union[str, bytes], *, timestamps: Iterable[Optional[datetime]] = ()) -> Validators:
+    """
+    Strong ETag over an exact pre-serialized body, plus Last-Modified from
+    the newest of `timestamps` when any are given (taken from that same body).
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    timestamps = [_as_utc(ts) for ts in timestamps if ts is not None]
+    return Validators(
+        etag=f'"{hashlib.sha1(body).hexdigest()}"',
+        last_modified=max(timestamps).replace(microsecond=0) if timestamps else None,
+    )
+
+def _strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+def is_not_modified(request_headers: Mapping[str, str], validators: Validators) -> bool:
+    """
+    RFC 9110 conditional GET: If-None-Match (weak comparison) takes precedence
+    over If-Modified-Since, which is only consulted when the former is absent.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        current = _strip_weak(validators.etag)
+        return any(_strip_weak(tag.strip()) == current for tag in if_none_match.split(","))
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is None or validators.last_modified is None:
+        return False
+    try:
+        since = _as_utc(parsedate_to_datetime(if_modified_since))
+    except (TypeError, ValueError):
+        return False
+    return validators.last_modified <= since
+
+def not_modified_response(validators: Validators) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators.headers())
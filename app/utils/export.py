@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, List, Mapping, Sequence
+from uuid import UUID
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+    @property
+    def media_type(self) -> str:
+        return "application/x-ndjson" if self is ExportFormat.ndjson else "text/csv"
+
+def _to_text(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+def _encode_ndjson(rows: List[Mapping[str, Any]], fields: Sequence[str]) -> str:
+    return "".join(
+        json.dumps({field: _to_text(row[field]) for field in fields}, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+def _encode_csv(rows: List[Mapping[str, Any]], fields: Sequence[str]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_to_text(row[field]) for field in fields] for row in rows)
+    return buffer.getvalue()
+
+async def encode_rows(
+    rows: AsyncIterator[Mapping[str, Any]],
+    *,
+    fields: Sequence[str],
+    format: ExportFormat,
+    rows_per_chunk: int = 500,
+) -> AsyncIterator[bytes]:
+    """
+    Serializes streamed rows into NDJSON or CSV body chunks of up to
+    `rows_per_chunk` rows. The CSV header is sent before the first row is
+    fetched, so the first byte never waits on the query.
+    """
+    encode = _encode_ndjson if format is ExportFormat.ndjson else _encode_csv
+    if format is ExportFormat.csv:
+        yield _encode_csv([dict(zip(fields, fields))], fields).encode("utf-8")
+
+    pending: List[Mapping[str, Any]] = []
+    async for row in rows:
+        pending.append(row)
+        if len(pending) >= rows_per_chunk:
+            yield encode(pending, fields).encode("utf-8")
+            pending.clear()
+    if pending:
+        yield encode(pending, fields).encode("utf-8")
@@ -0,0 +1,42 @@
+from typing import AsyncIterator, Optional, Tuple
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes], *, max_line_bytes: int
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Splits a byte stream into NDJSON lines as it arrives, yielding
+    (line_number, line). Blank lines are skipped. Lines longer than
+    `max_line_bytes` are yielded as None and never buffered in full, so memory
+    stays bounded by one line regardless of the stream size.
+    """
+    buffer = bytearray()
+    oversized = False
+    line_number = 0
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end == -1:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        oversized = True
+                        buffer.clear()
+                break
+
+            line_number += 1
+            if not oversized:
+                buffer += chunk[start:end]
+            if oversized or len(buffer) > max_line_bytes:
+                yield line_number, None
+            elif buffer.strip():
+                yield line_number, bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = end + 1
+
+    if oversized:
+        yield line_number + 1, None
+    elif buffer.strip():
+        yield line_number + 1, bytes(buffer)
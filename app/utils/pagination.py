@@ -0,0 +1,73 @@
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Generic, List, Optional, Sequence, Tuple, TypeVar
+from uuid import UUID
+
+from sqlalchemy import tuple_
+
+T = TypeVar("T")
+
+class InvalidCursorError(ValueError):
+    pass
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+def _encode(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    return _encode({"c": created_at.isoformat(), "i": str(id)})
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        data = _decode(cursor)
+        return datetime.fromisoformat(data["c"]), UUID(data["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+def encode_rank_cursor(rank: float, id: UUID) -> str:
+    return _encode({"r": rank, "i": str(id)})
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, UUID]:
+    try:
+        data = _decode(cursor)
+        return float(data["r"]), UUID(data["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+def apply_keyset(statement, model, *, cursor: Optional[str], limit: int):
+    """
+    Orders by (created_at, id) newest first and seeks past the cursor instead
+    of using OFFSET, so every page is a bounded index range scan. One extra
+    row is fetched to tell whether another page exists.
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        statement = statement.where(tuple_(model.created_at, model.id) < tuple_(created_at, last_id))
+    return statement.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+def build_page(rows: Sequence[T], *, limit: int) -> Page[T]:
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return Page(items=items, next_cursor=next_cursor)
+
+def build_ranked_page(rows: Sequence[Tuple[T, float]], *, limit: int) -> Page[T]:
+    """Like build_page, for (item, rank) rows ordered by (rank, id) descending."""
+    next_cursor = None
+    if len(rows) > limit and limit > 0:
+        last, rank = rows[limit - 1]
+        next_cursor = encode_rank_cursor(rank, last.id)
+    return Page(items=[item for item, _ in rows[:limit]], next_cursor=next_cursor)
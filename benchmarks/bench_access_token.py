@@ -0,0 +1,70 @@
+"""
+Per-request cost of validating a bearer token with and without the decoded
+token cache:
+
+- jwt_decode:  jose's jwt.decode alone (base64, JSON, HMAC, claims)
+- uncached:    decode_access_token with the decoded-token cache disabled
+- cached:      decode_access_token answered from the decoded-token cache
+
+The revocation check still runs in both decode_access_token variants. It is
+answered by the per-worker revocation cache here, so no Redis round-trip
+(and no fake one) is part of the numbers.
+
+    python -m benchmarks.bench_access_token --tokens 100 --iterations 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import fakeredis
+
+from app.config.settings import get_settings
+from app.core import security
+from app.core.revocation_cache import RevocationCache
+from app.core.security import create_access_token, decode_access_token
+from app.core.token_cache import DecodedTokenCache
+
+async def _measure(fn, tokens, iterations: int) -> dict:
+    for token in tokens:  # warm-up; fills the caches
+        await fn(token)
+    started = time.perf_counter()
+    for i in range(iterations):
+        await fn(tokens[i % len(tokens)])
+    elapsed = time.perf_counter() - started
+    return {"calls_per_second": round(iterations / elapsed, 1), "us_per_call": round(elapsed / iterations * 1e6, 2)}
+
+async def run(*, tokens: int, iterations: int) -> dict:
+    issued = [create_access_token(subject=f"user-{i}") for i in range(tokens)]
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    # Long negative TTL so revocation lookups stay local for the whole run
+    security.revocation_cache = RevocationCache(negative_ttl=3600, max_entries=tokens * 2)
+
+    settings = get_settings()
+
+    async def jwt_decode(token):
+        security.jwt.decode(token, settings.ACCESS_TOKEN_SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    async def validate(token):
+        assert await decode_access_token(token, redis_client)
+
+    results = {"tokens": tokens, "iterations": iterations}
+    results["jwt_decode"] = await _measure(jwt_decode, issued, iterations)
+    security.decoded_token_cache = DecodedTokenCache(max_entries=0)
+    results["uncached"] = await _measure(validate, issued, iterations)
+    security.decoded_token_cache = DecodedTokenCache(max_entries=tokens)
+    results["cached"] = await _measure(validate, issued, iterations)
+
+    results["saved_us_per_call"] = round(results["uncached"]["us_per_call"] - results["cached"]["us_per_call"], 2)
+    results["speedup"] = round(results["cached"]["calls_per_second"] / results["uncached"]["calls_per_second"], 2)
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=100, help="distinct bearer tokens cycled through")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(tokens=args.tokens, iterations=args.iterations)), indent=2))
+
+if __name__ == "__main__":
+    main()
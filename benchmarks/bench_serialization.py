@@ -0,0 +1,101 @@
+"""
+Compares the list-response serialization paths for one page of posts:
+
+- model:  ORM objects (owner joined) -> PostResponse.model_validate -> the
+          response_model round-trip FastAPI does (validate, dump to JSON-able
+          python, json.dumps)
+- fast:   plain rows (owner joined) -> project_post_row -> precompiled
+          TypeAdapter.dump_json
+
+Each path is measured end to end (query + serialization) and serialization
+only (rows/objects fetched once up front). Runs against in-memory SQLite.
+
+    python -m benchmarks.bench_serialization --page-size 100 --iterations 500
+"""
+import argparse
+import json
+import time
+
+from pydantic import TypeAdapter
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.schemas.post_schema import PostPageResponse, PostResponse, post_page_rows_adapter
+from app.services.post_service import WITH_OWNER, PostService, project_post_row
+
+# What FastAPI does with a response_model: validate the returned value, then dump it
+response_model_adapter = TypeAdapter(PostPageResponse)
+
+def _seed(db: Session, *, posts: int, users: int) -> None:
+    owners = [User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x") for i in range(users)]
+    db.add_all(owners)
+    db.commit()
+    db.add_all([
+        Post(title=f"Post {i}", content="lorem ipsum " * 40, owner_id=owners[i % users].id)
+        for i in range(posts)
+    ])
+    db.commit()
+
+def _model_serialize(page) -> bytes:
+    model = PostPageResponse(items=[PostResponse.model_validate(post) for post in page.items], next_cursor=page.next_cursor)
+    content = response_model_adapter.dump_python(response_model_adapter.validate_python(model), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def _fast_serialize(page) -> bytes:
+    return post_page_rows_adapter.dump_json(
+        {"items": [project_post_row(row) for row in page.items], "next_cursor": page.next_cursor}
+    )
+
+def _measure(fn, iterations: int) -> dict:
+    fn()  # warm-up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - started
+    return {"pages_per_second": round(iterations / elapsed, 1), "ms_per_page": round(elapsed / iterations * 1000, 3)}
+
+def run(*, page_size: int, iterations: int) -> dict:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    service = PostService(cache=None)
+
+    with Session(engine) as db:
+        _seed(db, posts=page_size * 2, users=10)
+
+        def model_end_to_end():
+            db.expunge_all()
+            return _model_serialize(service.repository.get_page(db, limit=page_size, options=WITH_OWNER))
+
+        def fast_end_to_end():
+            return _fast_serialize(service.repository.get_page_rows(db, limit=page_size))
+
+        orm_page = service.repository.get_page(db, limit=page_size, options=WITH_OWNER)
+        row_page = service.repository.get_page_rows(db, limit=page_size)
+        assert json.loads(_model_serialize(orm_page)) == json.loads(_fast_serialize(row_page))
+
+        results = {
+            "page_size": page_size,
+            "iterations": iterations,
+            "end_to_end": {"model": _measure(model_end_to_end, iterations), "fast": _measure(fast_end_to_end, iterations)},
+            "serialization_only": {
+                "model": _measure(lambda: _model_serialize(orm_page), iterations),
+                "fast": _measure(lambda: _fast_serialize(row_page), iterations),
+            },
+        }
+
+    for section in ("end_to_end", "serialization_only"):
+        model, fast = results[section]["model"], results[section]["fast"]
+        results[section]["speedup"] = round(fast["pages_per_second"] / model["pages_per_second"], 2)
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+    print(json.dumps(run(page_size=args.page_size, iterations=args.iterations), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Startup cost of a worker, each sample in a fresh interpreter:
+
+- import:        `import app.main` (no engine, pool, Redis client or bcrypt
+                 context is built at import any more)
+- warmup:        the lifespan warmup step (DB/Redis connections when asked
+                 for, bcrypt backend and hasher threads)
+- first_hash:    the first password hash after startup, without and with
+                 the warmup; the difference is what the first login no
+                 longer pays
+
+DB and Redis warmup need the configured services, so they are off by default:
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --db-connections 2 --redis-connections 2
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+def _child(mode: str, db_connections: int, redis_connections: int) -> dict:
+    started = time.perf_counter()
+    import app.main  # noqa: F401
+    from app.core.lifespan import warm_up
+    from app.core.security import get_password_hash
+    result = {"import": time.perf_counter() - started}
+
+    if mode == "warm":
+        started = time.perf_counter()
+        asyncio.run(warm_up(db_connections=db_connections, redis_connections=redis_connections))
+        result["warmup"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    get_password_hash("benchmark-password")
+    result["first_hash"] = time.perf_counter() - started
+    return result
+
+def _sample(mode: str, args) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode,
+         "--db-connections", str(args.db_connections), "--redis-connections", str(args.redis_connections)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    # The app may print while starting; the measurement is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+def _summary(samples) -> dict:
+    return {"median_ms": round(statistics.median(samples) * 1000, 2), "min_ms": round(min(samples) * 1000, 2)}
+
+def run(args) -> dict:
+    cold = [_sample("cold", args) for _ in range(args.runs)]
+    warm = [_sample("warm", args) for _ in range(args.runs)]
+    return {
+        "runs": args.runs,
+        "db_connections": args.db_connections,
+        "redis_connections": args.redis_connections,
+        "import": _summary([sample["import"] for sample in cold + warm]),
+        "warmup": _summary([sample["warmup"] for sample in warm]),
+        "first_hash": {
+            "cold": _summary([sample["first_hash"] for sample in cold]),
+            "warm": _summary([sample["first_hash"] for sample in warm]),
+        },
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--db-connections", type=int, default=0)
+    parser.add_argument("--redis-connections", type=int, default=0)
+    parser.add_argument("--child", choices=("cold", "warm"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(args.child, args.db_connections, args.redis_connections)))
+        return
+    print(json.dumps(run(args), indent=2))
+
+if __name__ == "__main__":
+    main()
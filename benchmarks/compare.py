@@ -0,0 +1,60 @@
+"""
+Compares two benchmark result files written by benchmarks.run.
+
+    python -m benchmarks.compare benchmarks/results/<baseline>.json benchmarks/results/<current>.json
+
+Prints the relative change per scenario and exits with status 1 when a
+latency percentile regressed by more than --threshold percent, so it can
+gate CI jobs.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_METRIC = "throughput_per_second"
+HEADERS = {"p50_ms": "p50 ms", "p95_ms": "p95 ms", "p99_ms": "p99 ms", THROUGHPUT_METRIC: "ops/s"}
+
+def _change(baseline: float, current: float) -> float:
+    return (current - baseline) / baseline * 100 if baseline else 0.0
+
+def compare(baseline: dict, current: dict, *, threshold: float) -> bool:
+    """Prints the comparison table; returns True if any latency percentile regressed past the threshold."""
+    regressed = False
+    print(f"baseline {baseline['meta'].get('commit')}  current {current['meta'].get('commit')}")
+    if baseline["meta"].get("params") != current["meta"].get("params"):
+        print("warning: runs used different parameters", file=sys.stderr)
+
+    header = f"{'scenario':<18}" + "".join(f"{HEADERS[metric]:>18}" for metric in (*LATENCY_METRICS, THROUGHPUT_METRIC))
+    print(header)
+    for name, current_stats in current["scenarios"].items():
+        baseline_stats = baseline["scenarios"].get(name)
+        if baseline_stats is None:
+            print(f"{name:<18}{'(new)':>18}")
+            continue
+        cells = []
+        for metric in LATENCY_METRICS:
+            change = _change(baseline_stats[metric], current_stats[metric])
+            flag = "!" if change > threshold else " "
+            regressed = regressed or change > threshold
+            cells.append(f"{current_stats[metric]:>9.3f} {change:+6.1f}%{flag}")
+        change = _change(baseline_stats[THROUGHPUT_METRIC], current_stats[THROUGHPUT_METRIC])
+        cells.append(f"{current_stats[THROUGHPUT_METRIC]:>9.1f} {change:+6.1f}% ")
+        print(f"{name:<18}" + "".join(f"{cell:>18}" for cell in cells))
+    return regressed
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed latency regression in percent")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    if compare(baseline, current, threshold=args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
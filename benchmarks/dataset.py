@@ -0,0 +1,97 @@
+"""
+Deterministic benchmark dataset: N users, M posts each and K refresh-token
+families. Ids, names, text and timestamps come from a seeded RNG, so two runs
+with the same parameters produce the same rows. Password hashes and JWTs are
+the exception (bcrypt salts, token jti/exp), which does not affect timings.
+"""
+import hashlib
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List
+from uuid import UUID
+
+from sqlmodel import Session
+
+from app.core.security import create_refresh_token_with_payload, get_password_hash
+from app.models.post_model import Post
+from app.models.refresh_token_model import RefreshToken
+from app.models.user_model import User
+from app.repositories.base_repository import chunked
+
+BENCHMARK_PASSWORD = "benchmark-password"
+EPOCH = datetime(2024, 1, 1)
+WORDS = (
+    "api cache index query latency python postgres redis token cursor page stream batch pool "
+    "request response schema model service async thread worker queue metric trace profile"
+).split()
+
+@dataclass
+class Dataset:
+    seed: int
+    user_ids: List[UUID] = field(default_factory=list)
+    usernames: List[str] = field(default_factory=list)
+    post_ids: List[UUID] = field(default_factory=list)
+    # One live refresh token per family; scenarios rotate them forward
+    refresh_tokens: List[str] = field(default_factory=list)
+
+def _uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def generate(db: Session, *, users: int, posts_per_user: int, token_families: int, seed: int = 42) -> Dataset:
+    rng = random.Random(seed)
+    dataset = Dataset(seed=seed)
+    # bcrypt dominates generation time; every user shares one hash of the same password
+    hashed_password = get_password_hash(BENCHMARK_PASSWORD)
+
+    user_rows = []
+    for i in range(users):
+        created_at = EPOCH + timedelta(minutes=i)
+        user = User(
+            id=_uuid(rng),
+            username=f"bench_user_{i}",
+            email=f"bench_user_{i}@example.com",
+            hashed_password=hashed_password,
+            post_count=posts_per_user,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        user_rows.append(user)
+        dataset.user_ids.append(user.id)
+        dataset.usernames.append(user.username)
+    db.add_all(user_rows)
+    db.commit()
+
+    def posts():
+        for i in range(users * posts_per_user):
+            created_at = EPOCH + timedelta(seconds=i * 7)
+            post_id = _uuid(rng)
+            dataset.post_ids.append(post_id)
+            yield {
+                "id": post_id,
+                "title": _text(rng, 6),
+                "content": _text(rng, 120),
+                "owner_id": dataset.user_ids[i % users],
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    for batch in chunked(posts(), 1000):
+        db.add_all([Post(**row) for row in batch])
+        db.commit()
+
+    for i in range(token_families):
+        user_id = dataset.user_ids[i % users]
+        token, payload = create_refresh_token_with_payload(subject=str(user_id))
+        db.add(RefreshToken(
+            user_id=user_id,
+            token_hash=hashlib.sha256(token.encode("utf-8")).hexdigest(),
+            expires_at=datetime.fromtimestamp(payload.exp, tz=timezone.utc),
+            family=_uuid(rng),
+        ))
+        dataset.refresh_tokens.append(token)
+    db.commit()
+    return dataset
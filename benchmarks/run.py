@@ -0,0 +1,279 @@
+"""
+Benchmark suite for the auth and post hot paths.
+
+Builds a deterministic dataset (benchmarks.dataset), then runs each scenario
+against the real services with fakeredis standing in for Redis, reporting
+latency percentiles and throughput. Results are written as JSON for
+comparison between commits (benchmarks.compare).
+
+    python -m benchmarks.run                          # temporary SQLite file
+    python -m benchmarks.run --database-url postgresql+psycopg://user:pw@localhost/bench_scratch
+    python -m benchmarks.run --scenario login --scenario refresh --iterations 50
+
+The database is reset (drop_all/create_all): point --database-url at a
+scratch database. Settings are still loaded, so the usual environment
+variables must be set.
+"""
+import argparse
+import asyncio
+import contextlib
+import inspect
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+import fakeredis
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import ReadThroughCache
+from app.core.security import create_access_token, decode_access_token
+from app.models.user_model import User
+from app.schemas.post_schema import PostCreate
+from app.services.auth_service import auth_service
+from app.services.post_service import PostService
+from app.services.user_service import user_service
+from benchmarks.dataset import BENCHMARK_PASSWORD, Dataset, generate
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+Operation = Callable[[], Union[None, Awaitable[None]]]
+
+@dataclass
+class BenchContext:
+    db: Session
+    async_db: AsyncSession
+    dataset: Dataset
+    redis: fakeredis.FakeRedis
+    async_redis: fakeredis.FakeAsyncRedis
+    post_service: PostService
+    rng: random.Random
+
+def _login(ctx: BenchContext) -> Operation:
+    # What POST /auth/login runs after its rate limit check
+    async def op():
+        username = ctx.rng.choice(ctx.dataset.usernames)
+        user = await user_service.authenticate_user_async(ctx.async_db, username=username, password_in=BENCHMARK_PASSWORD)
+        assert user
+        await auth_service.issue_tokens(ctx.async_db, user_id=user.id, redis_client=ctx.async_redis)
+    return op
+
+def _refresh(ctx: BenchContext) -> Operation:
+    tokens = ctx.dataset.refresh_tokens
+    counter = iter(range(sys.maxsize))
+
+    async def op():
+        # Walk the families round-robin, always presenting the family's newest token
+        family = next(counter) % len(tokens)
+        result = await auth_service.validate_and_process_refresh_token(
+            ctx.async_db, received_refresh_token=tokens[family], redis_client=ctx.async_redis
+        )
+        tokens[family] = result["refresh_token"]
+    return op
+
+def _access_validation(ctx: BenchContext) -> Operation:
+    tokens = [create_access_token(subject=str(user_id)) for user_id in ctx.dataset.user_ids[:100]]
+
+    async def op():
+        assert await decode_access_token(ctx.rng.choice(tokens), ctx.async_redis)
+    return op
+
+def _post_get(ctx: BenchContext) -> Operation:
+    def op():
+        ctx.post_service.get_post_by_id(ctx.db, ctx.rng.choice(ctx.dataset.post_ids))
+    return op
+
+def _post_list(ctx: BenchContext) -> Operation:
+    def op():
+        ctx.post_service.get_posts_json(ctx.db, limit=20)
+    return op
+
+def _post_by_owner(ctx: BenchContext) -> Operation:
+    def op():
+        ctx.post_service.get_posts_by_owner_json(ctx.db, owner_id=ctx.rng.choice(ctx.dataset.user_ids), limit=20)
+    return op
+
+def _post_create(ctx: BenchContext) -> Operation:
+    authors = [ctx.db.get(User, user_id) for user_id in ctx.dataset.user_ids[:10]]
+
+    def op():
+        post_in = PostCreate(title="benchmark post", content="benchmark body " * 20)
+        ctx.post_service.create_post(ctx.db, post_in=post_in, current_user=ctx.rng.choice(authors))
+    return op
+
+SCENARIOS: Dict[str, Callable[[BenchContext], Operation]] = {
+    "login": _login,
+    "refresh": _refresh,
+    "access_validation": _access_validation,
+    "post_get": _post_get,
+    "post_list": _post_list,
+    "post_by_owner": _post_by_owner,
+    "post_create": _post_create,
+}
+
+def _percentile(sorted_samples: List[float], percent: float) -> float:
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_samples) - 1, round(percent / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+def summarize(samples: List[float], wall_seconds: float) -> dict:
+    ordered = sorted(samples)
+    to_ms = lambda seconds: round(seconds * 1000, 4)
+    return {
+        "iterations": len(samples),
+        "throughput_per_second": round(len(samples) / wall_seconds, 2),
+        "mean_ms": to_ms(sum(samples) / len(samples)),
+        "p50_ms": to_ms(_percentile(ordered, 50)),
+        "p95_ms": to_ms(_percentile(ordered, 95)),
+        "p99_ms": to_ms(_percentile(ordered, 99)),
+        "max_ms": to_ms(ordered[-1]),
+    }
+
+async def measure(op: Operation, *, iterations: int, warmup: int) -> dict:
+    is_async = inspect.iscoroutinefunction(op)
+
+    async def call():
+        result = op()
+        if is_async:
+            await result
+
+    for _ in range(warmup):
+        await call()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        op_started = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - op_started)
+    return summarize(samples, time.perf_counter() - started)
+
+def _async_url(database_url: str) -> str:
+    if database_url.startswith("sqlite://"):
+        return database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return database_url
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(
+    *,
+    database_url: str,
+    scenarios: List[str],
+    users: int,
+    posts_per_user: int,
+    token_families: int,
+    iterations: int,
+    warmup: int,
+    seed: int,
+    post_cache: bool,
+) -> dict:
+    engine = create_engine(database_url)
+    async_engine = create_async_engine(_async_url(database_url))
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+
+    server = fakeredis.FakeServer()
+    redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+    async_redis = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    cache = ReadThroughCache(lambda: redis, namespace="posts") if post_cache else None
+    results = {}
+    try:
+        with Session(engine) as db:
+            dataset = generate(
+                db, users=users, posts_per_user=posts_per_user, token_families=token_families, seed=seed
+            )
+            async with async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)() as async_db:
+                ctx = BenchContext(
+                    db=db,
+                    async_db=async_db,
+                    dataset=dataset,
+                    redis=redis,
+                    async_redis=async_redis,
+                    post_service=PostService(cache=cache),
+                    rng=random.Random(seed),
+                )
+                for name in scenarios:
+                    op = SCENARIOS[name](ctx)
+                    # The services print on some paths; keep the report readable
+                    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                        results[name] = await measure(op, iterations=iterations, warmup=warmup)
+                    print(f"{name:<18} {results[name]['p50_ms']:>9.3f} ms p50 {results[name]['p99_ms']:>9.3f} ms p99 "
+                          f"{results[name]['throughput_per_second']:>10.1f} ops/s", file=sys.stderr)
+    finally:
+        SQLModel.metadata.drop_all(engine)
+        engine.dispose()
+        await async_engine.dispose()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dialect": engine.dialect.name,
+            "params": {
+                "users": users,
+                "posts_per_user": posts_per_user,
+                "token_families": token_families,
+                "iterations": iterations,
+                "warmup": warmup,
+                "seed": seed,
+                "post_cache": post_cache,
+            },
+        },
+        "scenarios": results,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the auth and post hot paths")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="repeatable; default: all")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--posts-per-user", type=int, default=20)
+    parser.add_argument("--token-families", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-post-cache", dest="post_cache", action="store_false")
+    parser.add_argument("--output", type=Path, help=f"defaults to {RESULTS_DIR}/<timestamp>-<commit>.json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/bench.db"
+        report = asyncio.run(run(
+            database_url=database_url,
+            scenarios=args.scenario or list(SCENARIOS),
+            users=args.users,
+            posts_per_user=args.posts_per_user,
+            token_families=args.token_families,
+            iterations=args.iterations,
+            warmup=args.warmup,
+            seed=args.seed,
+            post_cache=args.post_cache,
+        ))
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = RESULTS_DIR / f"{stamp}-{report['meta']['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Results written to {output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import fakeredis
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import app.models  # noqa: F401 (registers every table on SQLModel.metadata)
+
+SQLALCHEMY_DATABASE_URL = "sqlite://"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite://"
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def engine():
+    """An in-memory database; StaticPool keeps every session on its one connection."""
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    SQLModel.metadata.drop_all(engine)
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        yield session
+
+@pytest.fixture
+async def async_session_factory():
+    engine = create_async_engine(
+        ASYNC_SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+@pytest.fixture
+async def async_db(async_session_factory):
+    async with async_session_factory() as session:
+        yield session
+
+# Clients decode responses like the app's own (app.core.redis); the lua extra
+# covers the scripts run by the timeline and the Redis refresh session store.
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+@pytest.fixture
+async def async_redis_client():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield client
+    await client.aclose()
+
+@pytest.fixture
+def redis_round_trips(async_redis_client, monkeypatch):
+    """Command counts of the pipelines async_redis_client has sent, one round-trip each."""
+    sent = []
+    make_pipeline = async_redis_client.pipeline
+
+    def pipeline(*args, **kwargs):
+        pipe = make_pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def counted_execute(*execute_args, **execute_kwargs):
+            sent.append(len(pipe))
+            return await execute(*execute_args, **execute_kwargs)
+
+        pipe.execute = counted_execute
+        return pipe
+
+    monkeypatch.setattr(async_redis_client, "pipeline", pipeline)
+    return sent
@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import auth
+from app.core.database import get_async_session
+from app.core.rate_limit import LOGIN_LIMIT_PER_USERNAME, RateLimiter
+from app.core.redis import get_redis_client
+from app.main import app
+from app.services.user_service import user_service
+
+@pytest.fixture
+def client(monkeypatch):
+    async def no_session():
+        yield None
+
+    async def no_redis():
+        return None
+
+    # No Redis: the limiter runs on its local fallback buckets
+    monkeypatch.setattr(auth, "rate_limiter", RateLimiter())
+    app.dependency_overrides[get_async_session] = no_session
+    app.dependency_overrides[get_redis_client] = no_redis
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def test_login_is_rejected_before_password_check_once_limited(client, monkeypatch):
+    attempts = []
+
+    async def authenticate(db, *, username, password_in):
+        attempts.append(username)
+        return None
+
+    monkeypatch.setattr(user_service, "authenticate_user_async", authenticate)
+
+    for _ in range(LOGIN_LIMIT_PER_USERNAME.limit):
+        response = client.post("/api/v1/auth/login", data={"username": "Alice", "password": "wrong"})
+        assert response.status_code == 401
+
+    response = client.post("/api/v1/auth/login", data={"username": "alice", "password": "wrong"})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    assert len(attempts) == LOGIN_LIMIT_PER_USERNAME.limit
+
+def test_refresh_with_garbage_token_is_limited_per_ip(client, monkeypatch):
+    monkeypatch.setattr(auth, "REFRESH_LIMIT_PER_IP", LOGIN_LIMIT_PER_USERNAME)
+    processed = []
+
+    async def process(db, **kwargs):
+        processed.append(kwargs["received_refresh_token"])
+        raise auth.HTTPException(status_code=401, detail="invalid")
+
+    monkeypatch.setattr(auth.auth_service, "validate_and_process_refresh_token", process)
+
+    statuses = [
+        client.post("/api/v1/auth/refresh", json={"refresh_token": "garbage"}).status_code
+        for _ in range(LOGIN_LIMIT_PER_USERNAME.limit + 1)
+    ]
+    assert statuses[-1] == 429
+    assert len(processed) == LOGIN_LIMIT_PER_USERNAME.limit
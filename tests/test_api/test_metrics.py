@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+
+from app.core.cache import ReadThroughCache
+from app.main import app
+from app.services.post_service import post_service
+
+def test_metrics_endpoint_exposes_prometheus_text():
+    client = TestClient(app)
+    client.get("/api/v1/posts/not-a-uuid")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/posts/{post_id}",status="422"}' in body
+    assert "# TYPE http_requests_in_flight gauge" in body
+    assert "# TYPE db_pool_checkout_wait_seconds histogram" in body
+    assert "# TYPE password_hash_duration_seconds histogram" in body
+    assert "# TYPE redis_command_duration_seconds histogram" in body
+
+def test_metrics_endpoint_exposes_post_cache_counters(redis_client, monkeypatch):
+    cache = ReadThroughCache(lambda: redis_client, namespace="posts")
+    monkeypatch.setattr(post_service, "cache", cache)
+    cache.get_or_load(cache.key("item", "1"), lambda: "{}", ttl_seconds=60)
+    cache.get_or_load(cache.key("item", "1"), lambda: "{}", ttl_seconds=60)
+
+    body = TestClient(app).get("/metrics").text
+
+    assert 'post_cache_lookups_total{result="hit"} 1\n' in body
+    assert 'post_cache_lookups_total{result="miss"} 1\n' in body
+    assert "post_cache_errors_total 0\n" in body
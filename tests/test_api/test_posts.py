@@ -0,0 +1,133 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from app.main import app
+from app.core.cache import ReadThroughCache
+from app.core.database import get_session
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.services.post_service import post_service
+
+@pytest.fixture
+def client(engine, monkeypatch):
+    monkeypatch.setattr(post_service, "cache", None)
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def test_search_posts(client, engine):
+    with Session(engine) as db:
+        user = User(username="author", email="author@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        db.add_all([Post(title=f"Full text search {i}", content="", owner_id=user.id) for i in range(3)])
+        db.add(Post(title="Unrelated", content="", owner_id=user.id))
+        db.commit()
+
+    response = client.get("/api/v1/posts/search", params={"q": "search", "limit": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["items"]) == 2
+    assert data["items"][0]["owner"]["username"] == "author"
+
+    response = client.get("/api/v1/posts/search", params={"q": "search", "cursor": data["next_cursor"]})
+    assert len(response.json()["items"]) == 1
+    assert response.json()["next_cursor"] is None
+
+def test_search_posts_rejects_bad_cursor(client):
+    response = client.get("/api/v1/posts/search", params={"q": "search", "cursor": "garbage"})
+    assert response.status_code == 400
+
+def _add_post(engine, title="Cached"):
+    with Session(engine) as db:
+        user = User(username="author", email="author@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        post = Post(title=title, content="", owner_id=user.id)
+        db.add(post)
+        db.commit()
+        return post.id
+
+def test_get_post_honors_if_none_match(client, engine):
+    post_id = _add_post(engine)
+
+    response = client.get(f"/api/v1/posts/{post_id}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["last-modified"].endswith("GMT")
+
+    response = client.get(f"/api/v1/posts/{post_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    with Session(engine) as db:
+        post = db.get(Post, post_id)
+        post.title = "Changed"
+        db.add(post)
+        db.commit()
+
+    response = client.get(f"/api/v1/posts/{post_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+def test_get_post_honors_if_modified_since(client, engine):
+    post_id = _add_post(engine)
+    last_modified = client.get(f"/api/v1/posts/{post_id}").headers["last-modified"]
+
+    response = client.get(f"/api/v1/posts/{post_id}", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    response = client.get(f"/api/v1/posts/{post_id}", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+    assert response.status_code == 200
+
+def test_get_post_validators_match_the_cached_body(client, engine, redis_client, monkeypatch):
+    monkeypatch.setattr(post_service, "cache", ReadThroughCache(lambda: redis_client, namespace="posts"))
+    post_id = _add_post(engine)
+    response = client.get(f"/api/v1/posts/{post_id}")
+    etag = response.headers["etag"]
+
+    # Changed behind the cache's back: the cached body is still served, so its ETag must not change
+    with Session(engine) as db:
+        owner = db.get(Post, post_id).owner
+        owner.username = "renamed"
+        db.add(owner)
+        db.commit()
+
+    response = client.get(f"/api/v1/posts/{post_id}")
+    assert response.json()["owner"]["username"] == "author"
+    assert response.headers["etag"] == etag
+
+    redis_client.flushall()
+    response = client.get(f"/api/v1/posts/{post_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["owner"]["username"] == "renamed"
+    assert response.headers["etag"] != etag
+
+def test_list_posts_returns_collection_etag(client, engine):
+    _add_post(engine)
+
+    response = client.get("/api/v1/posts/")
+    etag = response.headers["etag"]
+    assert etag.startswith('"')
+
+    response = client.get("/api/v1/posts/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+def test_get_missing_post_is_404(client):
+    response = client.get("/api/v1/posts/00000000-0000-0000-0000-000000000000")
+    assert response.status_code == 404
+
+def test_responses_carry_sql_stats_headers(client, engine):
+    post_id = _add_post(engine)
+
+    response = client.get(f"/api/v1/posts/{post_id}")
+
+    # The post and its owner in one query; validators come from the body
+    assert int(response.headers["x-db-query-count"]) == 1
+    assert float(response.headers["x-db-time-ms"]) >= 0
@@ -1,22 +1,11 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
-from sqlalchemy.pool import StaticPool
+from sqlmodel import Session
 from app.main import app
-from app.config.database import get_session
-from app.models.user_model import User
-
-SQLALCHEMY_DATABASE_URL = "sqlite://"
+from app.core.database import get_session
 
 @pytest.fixture
-def client():
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
-    SQLModel.metadata.create_all(engine)
-
+def client(engine):
     def get_session_override():
         with Session(engine) as session:
             yield session
@@ -25,7 +14,6 @@ def client():
 
     client = TestClient(app)
     yield client
-    SQLModel.metadata.drop_all(engine)
 
 def test_create_user(client):
     response = client.post(
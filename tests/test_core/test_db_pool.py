@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlmodel import create_engine
+
+from app.core import database
+from app.core.db_pool import InstrumentedQueuePool
+
+def _small_engine():
+    return create_engine(
+        "sqlite://",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+
+def test_checkouts_beyond_the_pool_time_out_and_are_counted(monkeypatch):
+    engine = _small_engine()
+    monkeypatch.setattr(database, "_engines", {"sync": engine})
+
+    with engine.connect(), engine.connect():
+        stats = database.get_pool_stats()["sync"]
+        assert stats["pool_size"] == 1
+        assert stats["max_overflow"] == 1
+        assert stats["checked_out"] == 2
+        assert stats["overflow_in_use"] == 1
+
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    stats = database.get_pool_stats()["sync"]
+    assert stats["checked_out"] == 0
+    assert stats["checkout_timeouts"] == 1
+    wait = stats["checkout_wait_seconds"]
+    assert wait["count"] == 3
+    # The failed checkout waited out pool_timeout
+    assert wait["sum"] >= 0.04
+
+def test_stats_survive_dispose():
+    engine = _small_engine()
+    with engine.connect(), engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    engine.dispose()
+    with engine.connect():
+        pass
+
+    snapshot = engine.pool.snapshot()
+    assert snapshot["checkout_timeouts"] == 1
+    assert snapshot["checkout_wait_seconds"]["count"] == 4
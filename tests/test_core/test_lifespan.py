@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from sqlalchemy.pool import QueuePool
+from sqlmodel import create_engine
+
+from app.config.settings import get_settings
+from app.core.database import warm_up_pool
+from app.core.security import PasswordHasher
+from app.main import app
+
+def test_warm_up_pool_leaves_connections_checked_in(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/warm.db", poolclass=QueuePool, pool_size=3)
+
+    assert warm_up_pool(engine, 5) == 3
+    assert engine.pool.checkedin() == 3
+    assert engine.pool.checkedout() == 0
+
+@pytest.mark.anyio
+async def test_password_hasher_warm_up_starts_every_worker():
+    hasher = PasswordHasher(CryptContext(schemes=["bcrypt"], bcrypt__rounds=4), max_workers=2, max_pending=4)
+    try:
+        await hasher.warm_up()
+        assert hasher.hash_seconds.snapshot()["count"] == 1
+        assert len(hasher._executor._threads) == 2
+    finally:
+        hasher.shutdown()
+
+def test_ready_only_after_lifespan_startup(monkeypatch):
+    monkeypatch.setattr(get_settings(), "STARTUP_WARMUP_ENABLED", False)
+
+    assert TestClient(app).get("/health/ready").status_code == 503
+    with TestClient(app) as client:
+        assert client.get("/health/ready").json() == {"status": "ready"}
+        assert client.get("/health/live").status_code == 200
+
+def test_services_import_without_database_settings():
+    # Settings requires POSTGRES_*; nothing below app.main may build it at import
+    env = {name: value for name, value in os.environ.items() if not name.startswith("POSTGRES_")}
+    modules = "app.core.database, app.services.post_service, app.services.auth_service, app.core.lifespan, app.api.deps, app.api.v1.router"
+    result = subprocess.run(
+        [sys.executable, "-c", f"import {modules}"], env=env, cwd=Path(__file__).parents[2], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,40 @@
+import pytest
+
+from app.core.metrics import Histogram, MetricsRegistry
+
+def test_render_labeled_counter_and_gauge():
+    registry = MetricsRegistry()
+    outcomes = registry.counter("rotations_total", "Rotations by outcome", labels=("outcome",))
+    in_flight = registry.gauge("in_flight", "Requests in flight")
+
+    outcomes.labels("rotated").inc(3)
+    outcomes.labels('odd "value"').inc()
+    in_flight.inc()
+
+    text = registry.render()
+    assert "# HELP rotations_total Rotations by outcome\n# TYPE rotations_total counter\n" in text
+    assert 'rotations_total{outcome="rotated"} 3\n' in text
+    assert 'rotations_total{outcome="odd \\"value\\""} 1\n' in text
+    assert "in_flight 1.0\n" in text
+
+def test_render_histogram_from_collector():
+    registry = MetricsRegistry()
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    registry.add_collector(lambda: [("wait_seconds", "histogram", "Wait", [({"pool": "sync"}, histogram)])])
+
+    lines = registry.render().splitlines()
+    assert 'wait_seconds_bucket{pool="sync",le="0.1"} 1' in lines
+    assert 'wait_seconds_bucket{pool="sync",le="1.0"} 2' in lines
+    assert 'wait_seconds_bucket{pool="sync",le="+Inf"} 3' in lines
+    assert 'wait_seconds_sum{pool="sync"} 5.55' in lines
+    assert 'wait_seconds_count{pool="sync"} 3' in lines
+
+def test_duplicate_names_and_wrong_label_count_are_rejected():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests", labels=("method",))
+    with pytest.raises(ValueError):
+        registry.gauge("requests_total", "Again")
+    with pytest.raises(ValueError):
+        counter.labels("GET", "extra")
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.core.security import PasswordHasher, PasswordHasherBusyError
+
+class BlockingContext:
+    """Holds every hash until released, so jobs stay pending."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def hash(self, password):
+        self.release.wait(5)
+        return f"hashed:{password}"
+
+    def verify(self, plain_password, hashed_password):
+        return hashed_password == f"hashed:{plain_password}"
+
+@pytest.fixture
+def fast_hasher():
+    hasher = PasswordHasher(CryptContext(schemes=["bcrypt"], bcrypt__rounds=4), max_workers=2, max_pending=4)
+    yield hasher
+    hasher.shutdown()
+
+def test_hash_and_verify_round_trip_through_the_pool(fast_hasher):
+    hashed = fast_hasher.hash("secret")
+
+    assert hashed.startswith("$2")
+    assert fast_hasher.verify("secret", hashed)
+    assert not fast_hasher.verify("wrong", hashed)
+
+    stats = fast_hasher.stats()
+    assert stats["pending"] == 0
+    assert stats["hash_seconds"]["count"] == 1
+    assert stats["verify_seconds"]["count"] == 2
+    assert stats["queue_wait_seconds"]["count"] == 3
+
+@pytest.mark.anyio
+async def test_async_hash_and_verify_round_trip(fast_hasher):
+    hashed = await fast_hasher.hash_async("secret")
+
+    assert await fast_hasher.verify_async("secret", hashed)
+    assert not await fast_hasher.verify_async("wrong", hashed)
+
+@pytest.mark.anyio
+async def test_rejects_work_beyond_max_pending():
+    context = BlockingContext()
+    hasher = PasswordHasher(context, max_workers=1, max_pending=2)
+    try:
+        # One job running, one queued behind it
+        pending = [asyncio.ensure_future(hasher.hash_async(password)) for password in ("a", "b")]
+        await asyncio.sleep(0)
+        assert hasher.stats()["pending"] == 2
+
+        with pytest.raises(PasswordHasherBusyError) as exc_info:
+            await hasher.verify_async("c", "hashed:c")
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers == {"Retry-After": "1"}
+        assert hasher.stats()["rejected"] == 1
+
+        context.release.set()
+        assert await asyncio.gather(*pending) == ["hashed:a", "hashed:b"]
+        # Capacity is back once the jobs finish
+        assert await hasher.verify_async("c", "hashed:c")
+        assert hasher.stats()["pending"] == 0
+    finally:
+        context.release.set()
+        hasher.shutdown()
+
+@pytest.mark.anyio
+async def test_hash_many_stays_within_max_pending():
+    hasher = PasswordHasher(CryptContext(schemes=["bcrypt"], bcrypt__rounds=4), max_workers=2, max_pending=2)
+    try:
+        hashed = await hasher.hash_many_async([f"password{i}" for i in range(5)])
+
+        assert len(hashed) == 5
+        assert hasher.verify("password3", hashed[3])
+        assert hasher.stats()["rejected"] == 0
+    finally:
+        hasher.shutdown()
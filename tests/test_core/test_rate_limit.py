@@ -0,0 +1,54 @@
+import pytest
+import redis.asyncio as redis_async
+
+from app.core.rate_limit import RateLimit, RateLimiter, RateLimitExceeded, TokenBucketLimiter
+
+class UnavailableRedis:
+    def register_script(self, script):
+
+        async def call(keys, args):
+            raise redis_async.ConnectionError("connection refused")
+
+        call.registered_client = self
+        return call
+
+def test_token_bucket_refills_at_the_window_rate(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.rate_limit.time.monotonic", lambda: now[0])
+    buckets = TokenBucketLimiter(max_keys=10)
+    rule = RateLimit(limit=2, window_seconds=10)
+
+    assert buckets.hit([("k", rule)]) == 0
+    assert buckets.hit([("k", rule)]) == 0
+    assert buckets.hit([("k", rule)]) == pytest.approx(5.0)
+
+    now[0] += 5
+    assert buckets.hit([("k", rule)]) == 0
+    assert buckets.hit([("k", rule)]) > 0
+
+def test_token_bucket_rejection_consumes_no_key():
+    buckets = TokenBucketLimiter(max_keys=10)
+    tight, loose = RateLimit(limit=1, window_seconds=60), RateLimit(limit=2, window_seconds=60)
+
+    assert buckets.hit([("user", tight), ("ip", loose)]) == 0
+    assert buckets.hit([("user", tight), ("ip", loose)]) > 0
+    # The rejected attempt did not spend the IP's second token
+    assert buckets.hit([("other-user", tight), ("ip", loose)]) == 0
+
+@pytest.mark.anyio
+async def test_limiter_falls_back_to_local_buckets_when_redis_fails():
+    limiter = RateLimiter()
+    checks = [("username", "alice", RateLimit(limit=2, window_seconds=60))]
+
+    await limiter.hit(UnavailableRedis(), endpoint="login", checks=checks)
+    await limiter.hit(None, endpoint="login", checks=checks)
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        await limiter.hit(UnavailableRedis(), endpoint="login", checks=checks)
+
+    assert exc_info.value.status_code == 429
+    assert int(exc_info.value.headers["Retry-After"]) >= 1
+
+def test_keys_hash_client_values():
+    key = RateLimiter().key("login", "username", "a" * 500)
+    assert key.startswith("rate_limit:login:username:")
+    assert len(key) < 100
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from app.config.settings import get_settings
+from app.core import security
+from app.core.redis import RedisBatch, create_redis_client
+from app.core.revocation_cache import RevocationCache
+
+@pytest.fixture
+def fresh_revocation_cache(monkeypatch):
+    cache = RevocationCache(negative_ttl=60, max_entries=1000)
+    monkeypatch.setattr(security, "revocation_cache", cache)
+    return cache
+
+@pytest.mark.anyio
+async def test_client_uses_one_capped_pool():
+    settings = get_settings()
+    client = create_redis_client()
+    try:
+        pool = client.connection_pool
+        assert pool.max_connections == settings.REDIS_MAX_CONNECTIONS
+        assert pool.connection_kwargs["socket_timeout"] == settings.REDIS_SOCKET_TIMEOUT
+        assert pool.connection_kwargs["socket_connect_timeout"] == settings.REDIS_CONNECT_TIMEOUT
+        assert pool.connection_kwargs["health_check_interval"] == settings.REDIS_HEALTH_CHECK_INTERVAL
+        assert pool.connection_kwargs["retry"].get_retries() == settings.REDIS_RETRY_ATTEMPTS
+    finally:
+        await client.aclose()
+
+@pytest.mark.anyio
+async def test_batch_sends_nothing_when_the_block_raises(async_redis_client, redis_round_trips):
+    with pytest.raises(RuntimeError):
+        async with RedisBatch(async_redis_client) as batch:
+            batch.setex("key", 10, "value")
+            raise RuntimeError("abort")
+
+    assert redis_round_trips == []
+    assert await async_redis_client.keys() == []
+
+@pytest.mark.anyio
+async def test_revocations_are_written_and_checked_in_one_round_trip(fresh_revocation_cache, async_redis_client, redis_round_trips):
+    expires_at = int(time.time()) + 600
+
+    await security.revoke_tokens([("a", expires_at), ("b", expires_at), ("old", 1)], async_redis_client)
+    assert len(redis_round_trips) == 1
+    assert sorted(await async_redis_client.keys()) == [f"{security.REVOKED_TOKENS_REDIS_PREFIX}a", f"{security.REVOKED_TOKENS_REDIS_PREFIX}b"]
+
+    # A fresh worker: nothing cached locally, so Redis is asked once for all of them
+    security.revocation_cache = RevocationCache(negative_ttl=60, max_entries=1000)
+    tokens = [("a", expires_at), ("b", expires_at), ("c", expires_at)]
+    assert await security.find_revoked(tokens, async_redis_client) == {"a", "b"}
+    assert len(redis_round_trips) == 2
+
+    # Every answer is now cached
+    assert await security.find_revoked(tokens, async_redis_client) == {"a", "b"}
+    assert len(redis_round_trips) == 2
@@ -0,0 +1,118 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.pool import QueuePool
+from sqlmodel import Session, SQLModel, create_engine
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core import database
+from app.core.cache import ReadThroughCache
+from app.core.replicas import READ_YOUR_WRITES_COOKIE, ReadYourWritesMiddleware, ReplicaSet, primary_session, wants_primary
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.services.post_service import PostService
+
+OWNER_ID, POST_ID = uuid4(), uuid4()
+
+def _engine(url="sqlite://"):
+    # Replicas get queue pools in production; SQLite's default pool has no checkedout()
+    return create_engine(url, poolclass=QueuePool)
+
+def _request(method="GET", cookie=None):
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "method": method, "path": "/", "headers": headers, "query_string": b""})
+
+def test_round_robin_skips_replicas_marked_down(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.replicas.time.monotonic", lambda: now[0])
+    first, second = _engine(), _engine()
+    replicas = ReplicaSet([first, second], retry_after_seconds=30)
+
+    assert [replicas.choose() for _ in range(4)] == [first, second, first, second]
+
+    replicas.mark_down(first)
+    assert {replicas.choose() for _ in range(3)} == {second}
+
+    replicas.mark_down(second)
+    assert replicas.choose() is None
+
+    now[0] += 31
+    assert replicas.choose() in (first, second)
+
+def test_least_connections_prefers_the_idle_replica():
+    busy, idle = _engine(), _engine()
+    replicas = ReplicaSet([busy, idle], strategy="least_connections")
+
+    with busy.connect():
+        assert replicas.choose() is idle
+
+def test_writes_and_recent_writers_stay_on_the_primary():
+    assert wants_primary("POST", {})
+    assert not wants_primary("GET", {})
+    assert wants_primary("GET", {READ_YOUR_WRITES_COOKIE: "200"}, now=100)
+    assert not wants_primary("GET", {READ_YOUR_WRITES_COOKIE: "50"}, now=100)
+    assert not wants_primary("GET", {READ_YOUR_WRITES_COOKIE: "garbage"}, now=100)
+
+def test_read_session_routes_to_replica_and_fails_over(monkeypatch):
+    replica = _engine()
+    dead = _engine("sqlite:////nonexistent-directory/replica.db")
+    replicas = ReplicaSet([dead, replica])
+    monkeypatch.setattr(database, "get_replica_set", lambda: replicas)
+    primary = Session(_engine())
+
+    sessions = [database.get_read_session(_request(), primary) for _ in range(2)]
+    binds = [next(session).get_bind() for session in sessions]
+
+    # The first pick was the dead replica: served by the primary, and taken out of rotation
+    assert binds == [primary.get_bind(), replica]
+    assert replicas.healthy() == [replica]
+
+    pinned = database.get_read_session(_request(cookie=f"{READ_YOUR_WRITES_COOKIE}=9999999999"), primary)
+    assert next(pinned) is primary
+
+def test_successful_writes_set_the_read_your_writes_cookie():
+    async def ok(request):
+        return PlainTextResponse("ok", status_code=201)
+
+    async def rejected(request):
+        return PlainTextResponse("no", status_code=400)
+
+    app = Starlette(routes=[
+        Route("/ok", ok, methods=["GET", "POST"]),
+        Route("/rejected", rejected, methods=["POST"]),
+    ])
+    client = TestClient(ReadYourWritesMiddleware(app, window_seconds=5))
+
+    assert READ_YOUR_WRITES_COOKIE in client.post("/ok").headers["set-cookie"]
+    assert "set-cookie" not in client.get("/ok").headers
+    assert "set-cookie" not in client.post("/rejected").headers
+
+def _database(tmp_path, name, title):
+    engine = create_engine(f"sqlite:///{tmp_path}/{name}.db", poolclass=QueuePool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        user = User(id=OWNER_ID, username="author", email="author@example.com", hashed_password="x")
+        db.add(user)
+        db.add(Post(id=POST_ID, title=title, content="", owner_id=OWNER_ID))
+        db.commit()
+    return engine
+
+def test_cache_misses_on_a_replica_are_loaded_from_the_primary(tmp_path, redis_client, monkeypatch):
+    # The replica lags behind a write that already invalidated the cache
+    primary = Session(_database(tmp_path, "primary", "after the write"))
+    replica = _database(tmp_path, "replica", "before the write")
+    monkeypatch.setattr(database, "get_replica_set", lambda: ReplicaSet([replica]))
+    service = PostService(cache=ReadThroughCache(lambda: redis_client, namespace="posts"))
+
+    read_session = next(database.get_read_session(_request(), primary))
+    assert read_session.get_bind() is replica
+    assert primary_session(read_session) is primary
+
+    assert service.get_post_by_id(read_session, POST_ID).title == "after the write"
+    assert service.get_posts(read_session, limit=10).items[0].title == "after the write"
+    # Uncached reads still use the replica
+    assert PostService(cache=None).get_post_by_id(read_session, POST_ID).title == "before the write"
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config.settings import get_settings
+from app.core.revocation_cache import (
+    REVOKED_TOKENS_CHANNEL,
+    RevocationCache,
+    format_revocation_message,
+    listen_for_revocations,
+)
+from app.main import app
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.revocation_cache.time.monotonic", lambda: now[0])
+    return now
+
+def test_revoked_entries_live_until_the_token_expires(clock):
+    cache = RevocationCache(negative_ttl=5, max_entries=10)
+    assert cache.lookup("jti") is None
+
+    cache.mark_not_revoked("jti")
+    assert cache.lookup("jti") is False
+    cache.mark_revoked("jti", 60)
+    assert cache.lookup("jti") is True
+
+    clock[0] += 59
+    assert cache.lookup("jti") is True
+    clock[0] += 2
+    assert cache.lookup("jti") is None
+    assert cache.stats() == {"hits": 3, "misses": 2, "revoked_entries": 0, "not_revoked_entries": 0}
+
+def test_not_revoked_answers_expire_after_the_negative_ttl(clock):
+    cache = RevocationCache(negative_ttl=5, max_entries=10)
+    cache.mark_not_revoked("jti")
+
+    clock[0] += 4.9
+    assert cache.lookup("jti") is False
+    clock[0] += 0.2
+    assert cache.lookup("jti") is None
+
+    # A zero TTL disables negative caching; already expired tokens are never cached as revoked
+    uncached = RevocationCache(negative_ttl=0, max_entries=10)
+    uncached.mark_not_revoked("jti")
+    uncached.mark_revoked("old", 0)
+    assert uncached.lookup("jti") is None
+    assert uncached.lookup("old") is None
+
+def test_least_recently_written_entries_are_evicted(clock):
+    cache = RevocationCache(negative_ttl=5, max_entries=2)
+    for jti in ("a", "b", "c"):
+        cache.mark_revoked(jti, 60)
+    cache.mark_revoked("b", 60)
+    cache.mark_revoked("d", 60)
+
+    assert cache.lookup("a") is None
+    assert cache.lookup("c") is None
+    assert cache.lookup("b") is True
+    assert cache.lookup("d") is True
+
+@pytest.mark.anyio
+async def test_listener_applies_published_revocations(async_redis_client):
+    cache = RevocationCache(negative_ttl=60, max_entries=10)
+    cache.mark_not_revoked("stale")
+    task = asyncio.create_task(listen_for_revocations(async_redis_client, cache))
+    try:
+        for _ in range(100):
+            if await async_redis_client.pubsub_numsub(REVOKED_TOKENS_CHANNEL) == [(REVOKED_TOKENS_CHANNEL, 1)]:
+                break
+            await asyncio.sleep(0.01)
+        assert await async_redis_client.pubsub_channels() == [REVOKED_TOKENS_CHANNEL]
+        # Answers cached before subscribing may have missed a revocation
+        assert cache.lookup("stale") is None
+
+        cache.mark_not_revoked("jti")
+        await async_redis_client.publish(REVOKED_TOKENS_CHANNEL, format_revocation_message("jti", 600))
+        for _ in range(100):
+            if cache.lookup("jti"):
+                break
+            await asyncio.sleep(0.01)
+        assert cache.lookup("jti") is True
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+def test_lifespan_runs_the_listener(monkeypatch):
+    monkeypatch.setattr(get_settings(), "STARTUP_WARMUP_ENABLED", False)
+    started, cancelled = asyncio.Event(), []
+
+    async def listener(redis_client):
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    monkeypatch.setattr("app.core.lifespan.listen_for_revocations", listener)
+    with TestClient(app) as client:
+        client.portal.call(asyncio.wait_for, started.wait(), 1)
+    assert cancelled == [True]
@@ -0,0 +1,50 @@
+import pytest
+from sqlmodel import Session, select
+
+from app.core.sql_stats import statement_shape, track_queries
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.repositories.user_repository import WITH_POSTS
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        users = [User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x") for i in range(5)]
+        session.add_all(users)
+        session.commit()
+        session.add_all([Post(title="post", content="", owner_id=user.id) for user in users])
+        session.commit()
+        session.expunge_all()
+        yield session
+
+def test_statement_shape_ignores_parameter_lists():
+    assert statement_shape("SELECT * FROM post WHERE id IN (?, ?, ?)") == statement_shape(
+        "SELECT *\n  FROM post WHERE id IN (?)"
+    )
+    assert statement_shape("INSERT INTO t (a) VALUES (%(a_0)s), (%(a_1)s)") == "INSERT INTO t (a) VALUES (?)"
+
+def test_lazy_relationship_loop_is_reported_as_repeated(db):
+    with track_queries() as stats:
+        users = db.exec(select(User)).all()
+        for user in users:
+            user.posts
+
+    assert stats.count == 6
+    assert stats.total_seconds > 0
+    with pytest.raises(AssertionError, match="N\\+1"):
+        stats.assert_no_repeated_statements(threshold=2)
+
+def test_eager_loading_passes_query_assertions(db):
+    with track_queries() as stats:
+        users = db.exec(select(User).options(*WITH_POSTS)).all()
+        assert all(len(user.posts) == 1 for user in users)
+
+    stats.assert_max_queries(2)
+    stats.assert_no_repeated_statements()
+    assert len(stats.slowest) == 2
+
+def test_queries_outside_a_tracked_block_are_not_recorded(db):
+    with track_queries() as stats:
+        pass
+    db.exec(select(User)).all()
+    assert stats.count == 0
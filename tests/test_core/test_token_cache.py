@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from app.core import security
+from app.core.revocation_cache import RevocationCache
+from app.core.security import create_access_token, create_refresh_token, decode_access_token
+from app.core.token_cache import DecodedTokenCache
+from app.schemas.token_schema import TokenPayload
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(security, "revocation_cache", RevocationCache(negative_ttl=0, max_entries=1000))
+    monkeypatch.setattr(security, "decoded_token_cache", DecodedTokenCache(max_entries=100))
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    calls = []
+    original = security.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", counting_decode)
+    return calls
+
+@pytest.mark.anyio
+async def test_repeated_access_token_is_decoded_once(decode_calls, async_redis_client):
+    token = create_access_token(subject="user-1")
+
+    first = await decode_access_token(token, async_redis_client)
+    second = await decode_access_token(token, async_redis_client)
+
+    assert first == second
+    assert first.sub == "user-1"
+    assert len(decode_calls) == 1
+    assert security.decoded_token_cache.stats()["hits"] == 1
+
+@pytest.mark.anyio
+async def test_cached_token_is_still_checked_for_revocation(decode_calls, async_redis_client, redis_round_trips):
+    token = create_access_token(subject="user-1")
+    claims = await decode_access_token(token, async_redis_client)
+
+    await async_redis_client.set(f"{security.REVOKED_TOKENS_REDIS_PREFIX}{claims.jti}", "revoked")
+
+    assert await decode_access_token(token, async_redis_client) is None
+    assert len(redis_round_trips) == 2
+    assert len(decode_calls) == 1
+
+@pytest.mark.anyio
+async def test_refresh_token_is_not_accepted_from_the_access_cache(async_redis_client):
+    assert await decode_access_token(create_refresh_token(subject="user-1"), async_redis_client) is None
+    assert security.decoded_token_cache.stats()["entries"] == 0
+
+def test_entries_expire_with_the_token_and_are_bounded():
+    cache = DecodedTokenCache(max_entries=2)
+    expired = TokenPayload(sub="a", jti="1", exp=int(time.time()) - 1, type="access")
+    cache.put("access", "expired", expired)
+    assert cache.get("access", "expired") is None
+
+    live = int(time.time()) + 60
+    for name in ("t1", "t2", "t3"):
+        cache.put("access", name, TokenPayload(sub=name, jti=name, exp=live, type="access"))
+    assert cache.get("access", "t1") is None
+    assert cache.get("access", "t3").sub == "t3"
+    assert cache.get("refresh", "t3") is None
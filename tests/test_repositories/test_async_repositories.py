@@ -0,0 +1,55 @@
+import pytest
+
+from app.repositories.post_repository import async_post_repo
+from app.repositories.user_repository import async_user_repo
+from app.schemas.post_schema import PostCreate
+from app.schemas.user_schema import UserCreate
+
+@pytest.mark.anyio
+async def test_create_and_get_user(async_db):
+    user = await async_user_repo.create(
+        async_db,
+        obj_in=UserCreate(username="testuser", email="test@example.com", is_active=True, password="testpassword"),
+    )
+    assert user.hashed_password != "testpassword"
+
+    fetched = await async_user_repo.get_by_username(async_db, username="testuser")
+    assert fetched is not None
+    assert fetched.id == user.id
+
+@pytest.mark.anyio
+async def test_create_post_with_owner(async_db):
+    user = await async_user_repo.create(
+        async_db,
+        obj_in=UserCreate(username="author", email="author@example.com", is_active=True, password="testpassword"),
+    )
+    post = await async_post_repo.create_with_owner(async_db, obj_in=PostCreate(title="Hello", content="World"), owner_id=user.id)
+    assert post.owner_id == user.id
+
+    posts = await async_post_repo.get_multi_by_owner(async_db, owner_id=user.id)
+    assert [p.id for p in posts] == [post.id]
+
+@pytest.mark.anyio
+async def test_create_many_inserts_in_batches(async_db):
+    owner = await async_user_repo.create(
+        async_db,
+        obj_in=UserCreate(username="author", email="author@example.com", is_active=True, password="testpassword"),
+    )
+    posts_in = (PostCreate(title=f"post {i}", content="") for i in range(25))
+
+    inserted = await async_post_repo.create_many_with_owner(async_db, objs_in=posts_in, owner_id=owner.id, batch_size=10)
+
+    assert inserted == 25
+    page = await async_post_repo.get_page_by_owner(async_db, owner_id=owner.id, limit=100)
+    assert len(page.items) == 25
+    assert len({post.id for post in page.items}) == 25
+
+@pytest.mark.anyio
+async def test_create_many_hashes_user_passwords(async_db):
+    inserted = await async_user_repo.create_many(
+        async_db, objs_in=[{"username": f"user{i}", "email": f"user{i}@example.com", "password": "secret"} for i in range(3)]
+    )
+
+    assert inserted == 3
+    user = await async_user_repo.get_by_username(async_db, username="user1")
+    assert user.hashed_password.startswith("$2")
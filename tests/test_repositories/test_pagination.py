@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.repositories.post_repository import post_repo
+from app.utils.pagination import InvalidCursorError
+
+@pytest.fixture
+def owner(db):
+    user = User(username="author", email="author@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+def _add_posts(db, owner, count):
+    base = datetime(2024, 1, 1)
+    # Pairs of posts share a timestamp so the id tie-breaker is exercised
+    posts = [
+        Post(title=f"post {i}", content="", owner_id=owner.id, created_at=base + timedelta(seconds=i // 2))
+        for i in range(count)
+    ]
+    db.add_all(posts)
+    db.commit()
+    return posts
+
+def test_get_page_walks_every_row_once_newest_first(db, owner):
+    posts = _add_posts(db, owner, 25)
+    expected = sorted(posts, key=lambda p: (p.created_at, p.id), reverse=True)
+
+    seen = []
+    cursor = None
+    while True:
+        page = post_repo.get_page(db, cursor=cursor, limit=10)
+        seen.extend(page.items)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    assert [p.id for p in seen] == [p.id for p in expected]
+
+def test_get_page_by_owner_filters_owner(db, owner):
+    _add_posts(db, owner, 3)
+    other = User(username="other", email="other@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    _add_posts(db, other, 2)
+
+    page = post_repo.get_page_by_owner(db, owner_id=owner.id, limit=10)
+    assert len(page.items) == 3
+    assert page.next_cursor is None
+
+def test_invalid_cursor_is_rejected(db):
+    with pytest.raises(InvalidCursorError):
+        post_repo.get_page(db, cursor="not-a-cursor", limit=10)
@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import update
+
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.repositories.post_repository import async_post_repo, post_repo
+from app.repositories.user_repository import user_repo
+from app.schemas.post_schema import PostCreate
+from app.schemas.user_schema import UserResponse
+
+def _user(db, name):
+    user = User(username=name, email=f"{name}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+def _count(db, user):
+    db.refresh(user)
+    return user.post_count
+
+def test_writes_keep_post_count_in_step(db):
+    owner = _user(db, "author")
+    post = post_repo.create_with_owner(db, obj_in=PostCreate(title="One", content=""), owner_id=owner.id)
+    post_repo.create_many_with_owner(
+        db, objs_in=[PostCreate(title=f"Bulk {i}", content="") for i in range(5)], owner_id=owner.id, batch_size=2
+    )
+    assert _count(db, owner) == 6
+
+    post_repo.remove(db, id=post.id)
+    assert _count(db, owner) == 5
+    assert UserResponse.model_validate(owner).post_count == 5
+
+def test_reconcile_repairs_drift_in_batches(db):
+    users = [_user(db, f"user{i}") for i in range(3)]
+    for i, user in enumerate(users):
+        db.add_all([Post(title=f"p{j}", content="", owner_id=user.id) for j in range(i)])
+    db.commit()
+    # Rows written behind the repository's back: every counter is still 0
+    db.exec(update(User).where(User.id == users[0].id).values(post_count=7))
+    db.commit()
+
+    assert user_repo.reconcile_post_counts(db, batch_size=2) == 3
+    assert [_count(db, user) for user in users] == [0, 1, 2]
+    assert user_repo.reconcile_post_counts(db, batch_size=2) == 0
+
+@pytest.mark.anyio
+async def test_async_writes_keep_post_count_in_step(async_db):
+    owner = User(username="author", email="author@example.com", hashed_password="x")
+    async_db.add(owner)
+    await async_db.commit()
+
+    post = await async_post_repo.create_with_owner(async_db, obj_in=PostCreate(title="One", content=""), owner_id=owner.id)
+    await async_post_repo.create_many_with_owner(
+        async_db, objs_in=[PostCreate(title="Two", content=""), PostCreate(title="Three", content="")], owner_id=owner.id
+    )
+    await async_post_repo.remove(async_db, id=post.id)
+
+    await async_db.refresh(owner)
+    assert owner.post_count == 2
@@ -0,0 +1,66 @@
+import pytest
+
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.repositories.post_repository import post_repo
+
+@pytest.fixture
+def owner(db):
+    user = User(username="author", email="author@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+def test_search_ranks_title_matches_first(db, owner):
+    db.add_all([
+        Post(title="Cooking notes", content="a short postgres aside", owner_id=owner.id),
+        Post(title="Postgres tuning", content="indexes and vacuum", owner_id=owner.id),
+        Post(title="Gardening", content="nothing relevant", owner_id=owner.id),
+    ])
+    db.commit()
+
+    page = post_repo.search(db, query="postgres", limit=10)
+
+    assert [p.title for p in page.items] == ["Postgres tuning", "Cooking notes"]
+    assert page.next_cursor is None
+
+def test_search_cursor_walks_every_match_once(db, owner):
+    posts = [Post(title=f"redis {i}", content="redis " * (i % 3), owner_id=owner.id) for i in range(12)]
+    db.add_all(posts)
+    db.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        page = post_repo.search(db, query="redis", cursor=cursor, limit=5)
+        seen.extend(p.id for p in page.items)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    assert sorted(seen) == sorted(p.id for p in posts)
+    assert len(seen) == len(set(seen))
+
+def test_search_index_follows_updates_and_deletes(db, owner):
+    post = Post(title="Draft", content="", owner_id=owner.id)
+    db.add(post)
+    db.commit()
+
+    post.title = "Published: sqlite fts5"
+    db.add(post)
+    db.commit()
+    assert [p.id for p in post_repo.search(db, query="fts5").items] == [post.id]
+    assert post_repo.search(db, query="draft").items == []
+
+    db.delete(post)
+    db.commit()
+    assert post_repo.search(db, query="fts5").items == []
+
+def test_search_treats_input_as_plain_terms(db, owner):
+    db.add(Post(title="C++ tips", content="", owner_id=owner.id))
+    db.commit()
+
+    assert len(post_repo.search(db, query='tips" OR NOT (').items) == 0
+    assert len(post_repo.search(db, query="tips").items) == 1
+    assert post_repo.search(db, query="   ").items == []
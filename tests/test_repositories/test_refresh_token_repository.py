@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlmodel import select
+
+from app.models.refresh_token_model import RefreshToken
+from app.models.user_model import User
+from app.repositories.refresh_token_repository import refresh_token_repo
+
+@pytest.fixture
+def user(db):
+    user = User(username="testuser", email="test@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+def _add_tokens(db, user, count, *, expires_in, family=None):
+    now = datetime.now(timezone.utc)
+    tokens = [
+        RefreshToken(
+            user_id=user.id,
+            token_hash=uuid4().hex,
+            expires_at=now + expires_in,
+            family=family,
+        )
+        for _ in range(count)
+    ]
+    db.add_all(tokens)
+    db.commit()
+    return tokens
+
+def test_revoke_all_for_user_keeps_excepted_token(db, user):
+    tokens = _add_tokens(db, user, 5, expires_in=timedelta(days=1))
+
+    revoked = refresh_token_repo.revoke_all_for_user(db, user_id=user.id, except_token_hash=tokens[0].token_hash)
+
+    assert revoked == 4
+    active = db.exec(select(RefreshToken).where(RefreshToken.is_revoked == False)).all()
+    assert [t.token_hash for t in active] == [tokens[0].token_hash]
+
+def test_revoke_family_only_touches_family(db, user):
+    family = uuid4()
+    _add_tokens(db, user, 3, expires_in=timedelta(days=1), family=family)
+    _add_tokens(db, user, 2, expires_in=timedelta(days=1), family=uuid4())
+
+    assert refresh_token_repo.revoke_family(db, user_id=user.id, family_id=family) == 3
+    assert refresh_token_repo.revoke_family(db, user_id=user.id, family_id=family) == 0
+
+def test_delete_expired_tokens_in_batches(db, user):
+    _add_tokens(db, user, 25, expires_in=timedelta(days=-1))
+    _add_tokens(db, user, 3, expires_in=timedelta(days=1))
+
+    deleted = refresh_token_repo.delete_expired_tokens_in_batches(db, batch_size=10)
+
+    assert deleted == 25
+    assert len(db.exec(select(RefreshToken)).all()) == 3
@@ -0,0 +1,105 @@
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import select
+
+from app.core.revocation_cache import RevocationCache
+from app.core.security import create_refresh_token, read_refresh_token_claims
+from app.models.refresh_token_model import RefreshToken
+from app.models.user_model import User
+from app.services.auth_service import auth_service, rotation_outcomes
+
+def _use_fresh_revocation_cache(monkeypatch):
+    monkeypatch.setattr("app.core.security.revocation_cache", RevocationCache(negative_ttl=0, max_entries=1000))
+
+@pytest.fixture(autouse=True)
+def fresh_revocation_cache(monkeypatch):
+    _use_fresh_revocation_cache(monkeypatch)
+
+@pytest.fixture
+async def user(async_db):
+    user = User(username="testuser", email="test@example.com", hashed_password="x")
+    async_db.add(user)
+    await async_db.commit()
+    return user
+
+async def _issue_refresh_token(db, user, redis_client):
+    token = create_refresh_token(subject=str(user.id))
+    await auth_service.store_refresh_token_in_db(
+        db, user_id=user.id, refresh_token_str=token, family_id=uuid4(), redis_client=redis_client
+    )
+    return token
+
+async def _tokens(db, user_id):
+    result = await db.exec(select(RefreshToken).where(RefreshToken.user_id == user_id))
+    return result.all()
+
+@pytest.mark.anyio
+async def test_rotation_revokes_old_and_keeps_family(async_db, user, async_redis_client):
+    user_id = user.id
+    old_token = await _issue_refresh_token(async_db, user, async_redis_client)
+
+    tokens = await auth_service.validate_and_process_refresh_token(
+        async_db, received_refresh_token=old_token, redis_client=async_redis_client
+    )
+
+    rows = {row.token_hash: row for row in await _tokens(async_db, user_id)}
+    old_row = rows[auth_service._hash_refresh_token(old_token)]
+    new_row = rows[auth_service._hash_refresh_token(tokens["refresh_token"])]
+    assert old_row.is_revoked
+    assert not new_row.is_revoked
+    assert new_row.family == old_row.family
+
+@pytest.mark.anyio
+async def test_replayed_token_is_rejected_and_family_revoked(async_db, user, async_redis_client, monkeypatch):
+    user_id = user.id
+    before = {outcome: rotation_outcomes.labels(outcome).value for outcome in ("rotated", "reuse_detected", "family_revoked")}
+    old_token = await _issue_refresh_token(async_db, user, async_redis_client)
+    tokens = await auth_service.validate_and_process_refresh_token(
+        async_db, received_refresh_token=old_token, redis_client=async_redis_client
+    )
+
+    # A second refresh with the same token (a concurrent request that lost the
+    # race, or a stolen copy) on a worker that has not seen the Redis revocation
+    # yet must be caught by the database claim and not mint another token.
+    _use_fresh_revocation_cache(monkeypatch)
+    await async_redis_client.flushall()
+    with pytest.raises(HTTPException) as exc_info:
+        await auth_service.validate_and_process_refresh_token(
+            async_db, received_refresh_token=old_token, redis_client=async_redis_client
+        )
+    assert exc_info.value.status_code == 401
+
+    rows = {row.token_hash: row for row in await _tokens(async_db, user_id)}
+    assert len(rows) == 2
+    assert rows[auth_service._hash_refresh_token(tokens["refresh_token"])].is_revoked
+
+    after = {outcome: rotation_outcomes.labels(outcome).value for outcome in before}
+    assert {outcome: after[outcome] - before[outcome] for outcome in before} == {
+        "rotated": 1, "reuse_detected": 1, "family_revoked": 1,
+    }
+
+@pytest.mark.anyio
+async def test_issue_tokens_stores_the_new_token_without_decoding_it(async_db, user, async_redis_client, monkeypatch):
+    async def no_decode(**kwargs):
+        raise AssertionError("the new refresh token was decoded again")
+
+    monkeypatch.setattr("app.services.auth_service.decode_refresh_token", no_decode)
+    tokens = await auth_service.issue_tokens(async_db, user_id=user.id, redis_client=async_redis_client)
+
+    stored = await _tokens(async_db, user.id)
+    assert len(stored) == 1
+    assert stored[0].expires_at.timestamp() == read_refresh_token_claims(tokens["refresh_token"]).exp
+
+@pytest.mark.anyio
+async def test_login_tokens_carry_their_family_through_rotation(async_db, user, async_redis_client):
+    user_id = user.id
+    tokens = await auth_service.issue_tokens(async_db, user_id=user_id, redis_client=async_redis_client)
+    rotated = await auth_service.validate_and_process_refresh_token(
+        async_db, received_refresh_token=tokens["refresh_token"], redis_client=async_redis_client
+    )
+
+    family = read_refresh_token_claims(tokens["refresh_token"]).fam
+    assert read_refresh_token_claims(rotated["refresh_token"]).fam == family
+    assert {str(row.family) for row in await _tokens(async_db, user_id)} == {family}
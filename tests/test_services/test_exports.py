@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+
+import pytest
+
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.services.post_service import PostService
+from app.services.user_service import UserService
+from app.utils.export import ExportFormat
+
+@pytest.fixture
+async def owner(async_db):
+    user = User(username="author", email="author@example.com", hashed_password="secret-hash")
+    async_db.add(user)
+    await async_db.commit()
+    async_db.add_all([Post(title=f"post {i}", content="a, \"quoted\"\nbody", owner_id=user.id) for i in range(1200)])
+    await async_db.commit()
+    return user
+
+async def _read(chunks) -> str:
+    return b"".join([chunk async for chunk in chunks]).decode("utf-8")
+
+@pytest.mark.anyio
+async def test_export_posts_ndjson(async_db, owner):
+    body = await _read(PostService(cache=None).export_posts(async_db, format=ExportFormat.ndjson))
+
+    rows = [json.loads(line) for line in body.splitlines()]
+    assert len(rows) == 1200
+    assert rows[0]["owner_id"] == str(owner.id)
+    assert rows[0]["content"] == "a, \"quoted\"\nbody"
+
+@pytest.mark.anyio
+async def test_export_posts_csv_by_owner(async_db, owner):
+    body = await _read(PostService(cache=None).export_posts(async_db, format=ExportFormat.csv, owner_id=owner.id))
+
+    rows = list(csv.DictReader(io.StringIO(body)))
+    assert len(rows) == 1200
+    assert set(rows[0]) == {"id", "owner_id", "title", "content", "created_at", "updated_at"}
+
+@pytest.mark.anyio
+async def test_export_users_omits_password_hash(async_db, owner):
+    body = await _read(UserService().export_users(async_db, format=ExportFormat.ndjson))
+
+    assert [json.loads(line)["username"] for line in body.splitlines()] == ["author"]
+    assert "secret-hash" not in body
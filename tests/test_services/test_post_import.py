@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from app.models.user_model import User
+from app.services.post_service import PostService
+from app.utils.ndjson import iter_ndjson_lines
+
+@pytest.fixture
+async def owner(async_db):
+    user = User(username="author", email="author@example.com", hashed_password="x")
+    async_db.add(user)
+    await async_db.commit()
+    return user
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+@pytest.mark.anyio
+async def test_iter_ndjson_lines_splits_across_chunks():
+    data = b'{"a": 1}\n\n{"b": 2}\n' + b"x" * 50 + b'\n{"c": 3}'
+
+    lines = [line async for line in iter_ndjson_lines(_chunks(data, 3), max_line_bytes=20)]
+
+    assert lines == [(1, b'{"a": 1}'), (3, b'{"b": 2}'), (4, None), (5, b'{"c": 3}')]
+
+@pytest.mark.anyio
+async def test_import_posts_reports_per_batch(async_db, owner):
+    rows = [json.dumps({"title": f"post {i}", "content": "body"}) for i in range(5)]
+    rows.insert(2, "not json")
+    rows.insert(4, json.dumps({"content": "missing title"}))
+    data = ("\n".join(rows) + "\n").encode()
+
+    service = PostService(cache=None)
+    report = await service.import_posts(
+        async_db, lines=iter_ndjson_lines(_chunks(data, 7), max_line_bytes=1024), current_user=owner, batch_size=3
+    )
+
+    assert report.inserted == 5
+    assert report.failed == 2
+    assert [(b.first_line, b.last_line, b.inserted) for b in report.batches] == [(1, 3, 2), (4, 6, 2), (7, 7, 1)]
+    assert [e.line for b in report.batches for e in b.errors] == [3, 5]
+    assert report.batches[1].errors[0].error.startswith("title")
+
+    page = await service.async_repository.get_page_by_owner(async_db, owner_id=owner.id, limit=10)
+    assert len(page.items) == 5
@@ -0,0 +1,82 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.cache import ReadThroughCache
+from app.models.user_model import User
+from app.schemas.post_schema import PostCreate, PostPageResponse, PostResponse
+from app.schemas.user_schema import UserUpdate
+from app.services.post_service import WITH_OWNER, PostService
+from app.services.user_service import UserService
+
+@pytest.fixture
+def owner(db):
+    user = User(username="author", email="author@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+@pytest.fixture
+def service(redis_client):
+    return PostService(cache=ReadThroughCache(lambda: redis_client, namespace="posts"))
+
+def test_get_post_by_id_is_read_through(db, owner, service):
+    post = service.create_post(db, post_in=PostCreate(title="Hello", content=""), current_user=owner)
+
+    first = service.get_post_by_id(db, post.id)
+    second = service.get_post_by_id(db, post.id)
+
+    assert first == second
+    assert first.owner.username == "author"
+    # The post and its owner are cached separately
+    assert service.cache.stats()["misses"] == 2
+    assert service.cache.stats()["hits"] == 2
+
+def test_owner_changes_reach_cached_posts_and_pages(db, owner, service):
+    post = service.create_post(db, post_in=PostCreate(title="Hello", content=""), current_user=owner)
+    assert service.get_post_by_id(db, post.id).owner.post_count == 1
+    assert service.get_posts(db, limit=10).items[0].owner.post_count == 1
+    assert service.get_posts_by_owner(db, owner_id=owner.id, limit=10).items[0].owner.post_count == 1
+
+    service.create_post(db, post_in=PostCreate(title="Second", content=""), current_user=owner)
+    assert service.get_post_by_id(db, post.id).owner.post_count == 2
+
+    users = UserService(posts=service)
+    users.update_user(db, user_id_to_update=owner.id, user_in=UserUpdate(username="renamed"), current_user=owner)
+    assert service.get_post_by_id(db, post.id).owner.username == "renamed"
+    assert {item.owner.username for item in service.get_posts(db, limit=10).items} == {"renamed"}
+    assert {item.owner.username for item in service.get_posts_by_owner(db, owner_id=owner.id, limit=10).items} == {"renamed"}
+
+def test_update_and_delete_invalidate_item(db, owner, service):
+    post = service.create_post(db, post_in=PostCreate(title="Hello", content=""), current_user=owner)
+    service.get_post_by_id(db, post.id)
+
+    service.update_post(db, post_id_to_update=post.id, post_in=PostCreate(title="Edited", content=""), current_user=owner)
+    assert service.get_post_by_id(db, post.id).title == "Edited"
+
+    service.delete_post(db, post_id_to_delete=post.id, current_user=owner)
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_post_by_id(db, post.id)
+    assert exc_info.value.status_code == 404
+
+def test_create_bumps_list_versions(db, owner, service):
+    service.create_post(db, post_in=PostCreate(title="First", content=""), current_user=owner)
+    assert len(service.get_posts(db, limit=10).items) == 1
+    assert len(service.get_posts_by_owner(db, owner_id=owner.id, limit=10).items) == 1
+
+    service.create_post(db, post_in=PostCreate(title="Second", content=""), current_user=owner)
+    assert [p.title for p in service.get_posts(db, limit=10).items] == ["Second", "First"]
+    assert len(service.get_posts_by_owner(db, owner_id=owner.id, limit=10).items) == 2
+
+def test_fast_list_json_matches_model_serialization(db, owner):
+    service = PostService(cache=None)
+    for i in range(3):
+        service.create_post(db, post_in=PostCreate(title=f"post {i}", content="body"), current_user=owner)
+
+    page = service.repository.get_page(db, limit=2, options=WITH_OWNER)
+    expected = PostPageResponse(
+        items=[PostResponse.model_validate(post) for post in page.items], next_cursor=page.next_cursor
+    ).model_dump_json()
+
+    assert service.get_posts_json(db, limit=2) == expected
+    assert service.get_posts_by_owner_json(db, owner_id=owner.id, limit=2) == expected
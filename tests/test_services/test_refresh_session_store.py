@@ -0,0 +1,122 @@
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import select
+
+from app.core.revocation_cache import RevocationCache
+from app.core.security import REVOKED_TOKENS_REDIS_PREFIX, create_refresh_token
+from app.models.refresh_token_model import RefreshTokenAudit
+from app.models.user_model import User
+from app.repositories.refresh_session_store import (
+    DatabaseRefreshSessionStore,
+    RedisRefreshSessionStore,
+    RefreshTokenAuditWriter,
+)
+from app.services.auth_service import AuthService, rotation_outcomes
+
+async def _forget_blacklist(redis_client):
+    """As if the token's revocation never reached Redis, so only the session store can catch a replay."""
+    keys = [key async for key in redis_client.scan_iter(f"{REVOKED_TOKENS_REDIS_PREFIX}*")]
+    if keys:
+        await redis_client.delete(*keys)
+
+@pytest.fixture(autouse=True)
+def fresh_revocation_cache(monkeypatch):
+    monkeypatch.setattr("app.core.security.revocation_cache", RevocationCache(negative_ttl=0, max_entries=1000))
+
+@pytest.fixture
+async def user(async_db):
+    user = User(username="testuser", email="test@example.com", hashed_password="x")
+    async_db.add(user)
+    await async_db.commit()
+    return user
+
+@pytest.fixture(params=[DatabaseRefreshSessionStore, RedisRefreshSessionStore], ids=["database", "redis"])
+def backend(request, async_redis_client):
+    """(AuthService, redis_client) for each session store."""
+    return AuthService(session_store=request.param()), async_redis_client
+
+async def _issue(service, db, user, redis_client, family="new"):
+    token = create_refresh_token(subject=str(user.id))
+    await service.store_refresh_token_in_db(
+        db, user_id=user.id, refresh_token_str=token, family_id=uuid4() if family == "new" else family, redis_client=redis_client
+    )
+    return token
+
+async def _stored(service, db, redis_client, token):
+    return await service.session_store.get(db, redis_client=redis_client, token_hash=service._hash_refresh_token(token))
+
+def _outcomes():
+    return {outcome: rotation_outcomes.labels(outcome).value for outcome in ("rotated", "reuse_detected", "family_revoked", "all_revoked")}
+
+@pytest.mark.anyio
+async def test_replay_revokes_the_family_in_every_store(backend, async_db, user, monkeypatch):
+    service, redis_client = backend
+    user_id = user.id
+    other_family_token = await _issue(service, async_db, user, redis_client)
+    old_token = await _issue(service, async_db, user, redis_client)
+    before = _outcomes()
+
+    tokens = await service.validate_and_process_refresh_token(async_db, received_refresh_token=old_token, redis_client=redis_client)
+    old, new = await _stored(service, async_db, redis_client, old_token), await _stored(service, async_db, redis_client, tokens["refresh_token"])
+    assert old.is_revoked and not new.is_revoked
+    assert new.family == old.family and new.user_id == user_id
+
+    # Replayed on a worker that has not seen the revocation: caught by the store's claim
+    monkeypatch.setattr("app.core.security.revocation_cache", RevocationCache(negative_ttl=0, max_entries=1000))
+    await _forget_blacklist(redis_client)
+    with pytest.raises(HTTPException) as exc_info:
+        await service.validate_and_process_refresh_token(async_db, received_refresh_token=old_token, redis_client=redis_client)
+    assert exc_info.value.status_code == 401
+
+    assert (await _stored(service, async_db, redis_client, tokens["refresh_token"])).is_revoked
+    assert not (await _stored(service, async_db, redis_client, other_family_token)).is_revoked
+    after = _outcomes()
+    assert {outcome: after[outcome] - before[outcome] for outcome in before} == {
+        "rotated": 1, "reuse_detected": 1, "family_revoked": 1, "all_revoked": 0,
+    }
+
+@pytest.mark.anyio
+async def test_replay_of_a_token_without_family_revokes_everything(backend, async_db, user):
+    service, redis_client = backend
+    other_token = await _issue(service, async_db, user, redis_client)
+    token = await _issue(service, async_db, user, redis_client, family=None)
+    before = _outcomes()
+
+    rotated = await service.session_store.rotate(
+        async_db, redis_client=redis_client, token_hash=service._hash_refresh_token(token), user_id=user.id,
+        new_token_hash="next", new_expires_at=(await _stored(service, async_db, redis_client, token)).expires_at,
+    )
+    assert rotated.family is not None
+    # Loses the race: already claimed
+    assert await service.session_store.rotate(
+        async_db, redis_client=redis_client, token_hash=service._hash_refresh_token(token), user_id=user.id,
+        new_token_hash="other", new_expires_at=rotated.expires_at,
+    ) is None
+
+    with pytest.raises(HTTPException):
+        await service.validate_and_process_refresh_token(async_db, received_refresh_token=token, redis_client=redis_client)
+    assert (await _stored(service, async_db, redis_client, other_token)).is_revoked
+    assert _outcomes()["all_revoked"] - before["all_revoked"] == 1
+
+@pytest.mark.anyio
+async def test_inactive_user_cannot_rotate(backend, async_db, user):
+    service, redis_client = backend
+    token = await _issue(service, async_db, user, redis_client)
+    user.is_active = False
+    async_db.add(user)
+    await async_db.commit()
+
+    with pytest.raises(HTTPException):
+        await service.validate_and_process_refresh_token(async_db, received_refresh_token=token, redis_client=redis_client)
+
+@pytest.mark.anyio
+async def test_audit_writer_batches_and_bounds_pending_events(async_session_factory, async_db, user):
+    writer = RefreshTokenAuditWriter(session_factory=async_session_factory, batch_size=2, max_pending=3, flush_seconds=60)
+    for event in ("issued", "rotated", "rotated", "family_revoked"):
+        writer.record(event, user_id=user.id, family=uuid4())
+
+    assert await writer.flush() == 3
+    rows = (await async_db.exec(select(RefreshTokenAudit))).all()
+    assert sorted(row.event for row in rows) == ["issued", "rotated", "rotated"]
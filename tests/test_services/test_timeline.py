@@ -0,0 +1,156 @@
+import json
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+import redis
+from fastapi import HTTPException
+
+from app.config.settings import get_settings
+from app.core.timeline import TimelineStore, timeline_reads
+from app.models.post_model import Post
+from app.models.user_model import User
+from app.repositories.follow_repository import follow_repo
+from app.schemas.post_schema import PostCreate
+from app.services.post_service import PostService
+from app.services.user_service import UserService
+
+class BrokenRedis:
+    """Every command fails, as when Redis is down."""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise redis.ConnectionError("Redis is down")
+        return fail
+
+@pytest.fixture
+def users(db):
+    users = [User(username=name, email=f"{name}@example.com", hashed_password="x") for name in ("reader", "small", "big", "other")]
+    db.add_all(users)
+    db.commit()
+    for user in users:
+        db.refresh(user)
+    return users
+
+@pytest.fixture
+def store(redis_client):
+    return TimelineStore(lambda: redis_client, max_entries=5, ttl_seconds=60)
+
+def _services(store, monkeypatch, max_followers=1):
+    monkeypatch.setattr(get_settings(), "TIMELINE_FANOUT_MAX_FOLLOWERS", max_followers)
+    monkeypatch.setattr(get_settings(), "TIMELINE_FANOUT_BATCH_SIZE", 1)
+    return PostService(cache=None, timelines=store), UserService(timelines=store)
+
+def _post(db, service, author, title, minutes_ago=0):
+    post = service.create_post(db, post_in=PostCreate(title=title, content=""), current_user=author)
+    if minutes_ago:
+        post.created_at = datetime.now() - timedelta(minutes=minutes_ago)
+        db.add(post)
+        db.commit()
+    return post
+
+def _titles(payload):
+    page = json.loads(payload)
+    return [item["title"] for item in page["items"]], page["next_cursor"]
+
+def _reads():
+    return {source: timeline_reads.labels(source).value for source in ("cached", "rebuilt", "database")}
+
+def test_follow_keeps_follower_counts(db, users):
+    reader, small, _, _ = users
+    assert follow_repo.follow(db, follower_id=reader.id, followee_id=small.id)
+    assert not follow_repo.follow(db, follower_id=reader.id, followee_id=small.id)
+    db.refresh(small)
+    assert small.follower_count == 1
+
+    assert follow_repo.unfollow(db, follower_id=reader.id, followee_id=small.id)
+    assert not follow_repo.unfollow(db, follower_id=reader.id, followee_id=small.id)
+    db.refresh(small)
+    assert small.follower_count == 0
+
+def test_follow_rejects_self_and_missing_users(db, users):
+    reader = users[0]
+    service = UserService(timelines=None)
+    with pytest.raises(HTTPException) as exc_info:
+        service.follow_user(db, followee_id=reader.id, current_user=reader)
+    assert exc_info.value.status_code == 400
+    with pytest.raises(HTTPException) as exc_info:
+        service.follow_user(db, followee_id=uuid4(), current_user=reader)
+    assert exc_info.value.status_code == 404
+
+def test_timeline_merges_fanned_out_and_pulled_posts(db, users, store, monkeypatch):
+    reader, small, big, other = users
+    posts, accounts = _services(store, monkeypatch)
+    accounts.follow_user(db, followee_id=small.id, current_user=reader)
+    accounts.follow_user(db, followee_id=big.id, current_user=reader)
+    # big now has more followers than the fan-out limit, so its posts are pulled at read time
+    follow_repo.follow(db, follower_id=other.id, followee_id=big.id)
+    _post(db, posts, small, "small old", minutes_ago=3)
+    _post(db, posts, big, "big", minutes_ago=2)
+    _post(db, posts, other, "not followed", minutes_ago=1)
+    before = _reads()
+
+    # First read rebuilds the timeline from the database, with only the small author's posts
+    assert _titles(posts.get_timeline_json(db, user_id=reader.id)) == (["big", "small old"], None)
+    assert len(store.read(reader.id, before=None, limit=10)) == 1
+
+    # Later posts by small authors are written to the existing timeline
+    db.refresh(small)
+    fresh = _post(db, posts, small, "small new")
+    assert store.read(reader.id, before=None, limit=1)[0][1] == fresh.id
+    titles, cursor = _titles(posts.get_timeline_json(db, user_id=reader.id, limit=2))
+    assert titles == ["small new", "big"]
+    assert _titles(posts.get_timeline_json(db, user_id=reader.id, cursor=cursor, limit=2)) == (["small old"], None)
+
+    after = _reads()
+    assert after["rebuilt"] - before["rebuilt"] == 1
+    assert after["cached"] - before["cached"] == 2
+
+def test_deleted_posts_leave_the_timeline(db, users, store, monkeypatch):
+    reader, small, _, _ = users
+    posts, accounts = _services(store, monkeypatch)
+    accounts.follow_user(db, followee_id=small.id, current_user=reader)
+    db.refresh(small)
+    kept = _post(db, posts, small, "kept", minutes_ago=1)
+    posts.get_timeline_json(db, user_id=reader.id)
+    gone = _post(db, posts, small, "gone")
+
+    posts.delete_post(db, post_id_to_delete=gone.id, current_user=small)
+    assert [post_id for _, post_id in store.read(reader.id, before=None, limit=10)] == [kept.id]
+
+    # Removed from the database behind the timeline's back: skipped, then dropped on read
+    stale = _post(db, posts, small, "stale")
+    db.delete(db.get(Post, stale.id))
+    db.commit()
+    assert _titles(posts.get_timeline_json(db, user_id=reader.id)) == (["kept"], None)
+    assert [post_id for _, post_id in store.read(reader.id, before=None, limit=10)] == [kept.id]
+
+def test_unfollow_drops_the_timeline(db, users, store, monkeypatch):
+    reader, small, _, _ = users
+    posts, accounts = _services(store, monkeypatch)
+    accounts.follow_user(db, followee_id=small.id, current_user=reader)
+    _post(db, posts, small, "hello")
+    assert _titles(posts.get_timeline_json(db, user_id=reader.id))[0] == ["hello"]
+
+    accounts.unfollow_user(db, followee_id=small.id, current_user=reader)
+    assert store.read(reader.id, before=None, limit=10) is None
+    assert _titles(posts.get_timeline_json(db, user_id=reader.id))[0] == []
+
+def test_timeline_falls_back_to_the_database_without_redis(db, users, monkeypatch):
+    reader, small, big, _ = users
+    posts, accounts = _services(TimelineStore(BrokenRedis, max_entries=5, ttl_seconds=60), monkeypatch)
+    accounts.follow_user(db, followee_id=small.id, current_user=reader)
+    accounts.follow_user(db, followee_id=big.id, current_user=reader)
+    db.refresh(small)
+    _post(db, posts, small, "first", minutes_ago=2)
+    _post(db, posts, big, "second", minutes_ago=1)
+    before = _reads()
+
+    titles, cursor = _titles(posts.get_timeline_json(db, user_id=reader.id, limit=1))
+    assert titles == ["second"]
+    assert _titles(posts.get_timeline_json(db, user_id=reader.id, cursor=cursor, limit=1)) == (["first"], None)
+    assert _reads()["database"] - before["database"] == 2
+
+    with pytest.raises(HTTPException) as exc_info:
+        posts.get_timeline_json(db, user_id=reader.id, cursor="not-a-cursor")
+    assert exc_info.value.status_code == 400
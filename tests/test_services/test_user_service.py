@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import select
+
+from app.models.follow_model import Follow
+from app.models.post_model import Post
+from app.models.refresh_token_model import RefreshToken
+from app.models.user_model import User
+from app.core.sql_stats import track_queries
+from app.repositories.follow_repository import follow_repo
+from app.schemas.post_schema import PostCreate
+from app.services.post_service import PostService
+from app.services.user_service import UserService, user_service
+
+@pytest.fixture
+def owner(db):
+    user = User(username="author", email="author@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    base = datetime(2024, 1, 1)
+    db.add_all([
+        Post(title=f"post {i}", content="", owner_id=user.id, created_at=base + timedelta(seconds=i))
+        for i in range(5)
+    ])
+    db.commit()
+    db.expire_all()
+    return user
+
+def test_get_user_does_not_load_posts(db, owner):
+    user = user_service.get_user_by_username(db, username="author")
+    assert "posts" not in user.__dict__
+
+def test_get_user_with_posts_embeds_one_page(db, owner):
+    response = user_service.get_user_with_posts(db, user_id=owner.id, posts_limit=2)
+
+    assert [p.title for p in response.posts] == ["post 4", "post 3"]
+    assert response.posts_next_cursor is not None
+    assert "posts" not in db.get(User, owner.id).__dict__
+
+def test_user_validators_follow_post_changes_without_counting_posts(db, owner):
+    owner_id = owner.id
+    with track_queries() as stats:
+        etag = user_service.get_user_validators(db, owner_id).etag
+    stats.assert_max_queries(1)
+    assert not any("count(" in shape.lower() for shape in stats.shapes)
+
+    post = db.exec(select(Post).where(Post.owner_id == owner_id)).first()
+    post.title, post.updated_at = "edited", datetime(2030, 1, 1)
+    db.add(post)
+    db.commit()
+    edited = user_service.get_user_validators(db, owner_id)
+    assert edited.etag != etag
+    assert edited.last_modified == datetime(2030, 1, 1, tzinfo=edited.last_modified.tzinfo)
+
+    PostService(cache=None, timelines=None).create_post(db, post_in=PostCreate(title="new", content=""), current_user=owner)
+    assert user_service.get_user_validators(db, owner_id).etag != edited.etag
+
+    with pytest.raises(HTTPException) as exc_info:
+        user_service.get_user_validators(db, uuid4())
+    assert exc_info.value.status_code == 404
+
+def test_delete_user_removes_their_posts_follows_and_tokens(db, owner):
+    service = UserService(timelines=None, posts=PostService(cache=None, timelines=None))
+    other = User(username="other", email="other@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    follow_repo.follow(db, follower_id=owner.id, followee_id=other.id)
+    follow_repo.follow(db, follower_id=other.id, followee_id=owner.id)
+    db.add(RefreshToken(token_hash="hash", expires_at=datetime(2030, 1, 1), user_id=owner.id))
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.delete_user(db, user_id_to_delete=owner.id, current_user=other)
+    assert exc_info.value.status_code == 403
+
+    service.delete_user(db, user_id_to_delete=owner.id, current_user=owner)
+    db.expire_all()
+    assert db.get(User, owner.id) is None
+    assert db.exec(select(Post)).all() == []
+    assert db.exec(select(Follow)).all() == []
+    assert db.exec(select(RefreshToken)).all() == []
+    assert db.get(User, other.id).follower_count == 0
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.delete_user(db, user_id_to_delete=owner.id, current_user=owner)
+    assert exc_info.value.status_code == 404